@@ -1,17 +1,27 @@
 import os
 import json
-import streamlit as st
-import pandas as pd
-import re
-from typing import Dict, List, Any, Optional
-from dataclasses import dataclass
-import plotly.express as px
-import plotly.graph_objects as go
-from datetime import datetime
 import time
-import requests
-import google.generativeai as genai
+from contextlib import nullcontext
+from datetime import datetime
+from typing import Dict
+
+import streamlit as st
 from dotenv import load_dotenv
+
+from persona_designer import (CAMPAIGN_HORIZON_DAYS, DEMO_CUSTOMER_DATA, DEMO_PRODUCT_INFO, FALLBACK_REASONS,
+                              JSON_EXPORT_FORMATS, REPORT_FORMATS, SIMULATION_DEFAULTS, TABLE_NAMES,
+                              ArtifactPrefetcher, ArtifactStore, ConversationMemory, EnhancedAIAnalysisEngine,
+                              PersonaVersionStore, RunStore, budget_frontier, build_budget_problem,
+                              build_export_payload, build_result_tables, create_budget_allocation_chart,
+                              create_budget_frontier_chart, create_confidence_chart, create_journey_map_chart,
+                              create_market_size_chart, create_persona_similarity_heatmap, create_power_curve_chart,
+                              create_roi_comparison_chart, customer_data_from_frame, export_tables_zip,
+                              export_to_tempfile, generate_artifacts_batch, generate_persona_insights,
+                              get_fallback_registry, get_tracer, is_fallback, make_backend, optimize_budget_allocation,
+                              provenance, render_report, resolve_table_format, run_pipeline, score_review_sentiment,
+                              traced, validate_and_score_data)
+from persona_designer.lazy_imports import genai, go, pd
+from persona_designer.memory import _estimate_tokens
 load_dotenv()
 
 # Configure page
@@ -143,6 +153,19 @@ st.markdown("""
         60% { transform: translateY(-3px); }
     }
     
+    .provenance-badge {
+        padding: 0.2rem 0.6rem;
+        border-radius: 10px;
+        font-size: 0.8rem;
+        font-weight: bold;
+        color: white;
+        display: inline-block;
+        margin-bottom: 0.5rem;
+    }
+    
+    .provenance-model { background: #2ecc71; }
+    .provenance-fallback { background: #e67e22; }
+    
     .new-feature {
         background: linear-gradient(45deg, #00c9ff, #92fe9d);
         color: white;
@@ -156,834 +179,35 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# Enhanced Data Structures
-@dataclass
-class EnhancedPersona:
-    name: str
-    tagline: str
-    demographics: Dict[str, Any]
-    psychographics: Dict[str, Any]
-    behavior_patterns: Dict[str, Any]
-    pain_points: List[str]
-    goals: List[str]
-    preferred_channels: List[str]
-    messaging_preferences: Dict[str, Any]
-    confidence_score: float
-    market_size: str
-    business_value: str
-    is_refined: bool = False
-    refinement_history: List[str] = None
-
-@dataclass
-class EnhancedCampaign:
-    title: str
-    persona_target: str
-    theme: str
-    key_message: str
-    value_propositions: List[str]
-    channels: List[str]
-    content_formats: List[str]
-    success_metrics: List[str]
-    predicted_roi: str
-    confidence_interval: str
-    budget_allocation: Dict[str, str]
-
-@dataclass
-class PersonaJourney:
-    stages: List[str]
-    touchpoints: List[str]
-    emotions: List[str]
-    opportunities: List[str]
-
-# Enhanced AI Analysis Engine with Fixed Bugs
-class EnhancedAIAnalysisEngine:
-    def __init__(self, api_key, model_name='gemini-2.0-flash'):
-        genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel(model_name)
-        self.model_name = model_name
-    
-    def analyze_customer_data(self, customer_data: str, product_info: str) -> Dict:
-        """Analyze customer data using Gemini"""
-        
-        prompt = f"""
-        As an expert marketing data analyst, analyze this customer research data and product information:
-
-        CUSTOMER DATA:
-        {customer_data}
-
-        PRODUCT INFO:
-        {product_info}
-
-        Provide a comprehensive analysis in JSON format with:
-        1. Customer segments (3-4 distinct behavioral clusters)
-        2. Key demographic patterns
-        3. Pain points and motivations
-        4. Communication preferences
-        5. Market opportunities
-
-        Return only valid JSON without any markdown formatting.
-        """
-        
-        try:
-            response = self.model.generate_content(prompt)
-            response_text = response.text.strip()
-            if response_text.startswith('```json'):
-                response_text = response_text[7:]
-            if response_text.endswith('```'):
-                response_text = response_text[:-3]
-            
-            return json.loads(response_text)
-        except Exception as e:
-            return self._get_fallback_analysis()
-    
-    def create_personas(self, analysis_data: Dict, num_personas: int = 3) -> Dict:
-        """Create detailed personas based on analysis"""
-        
-        prompt = f"""
-        Based on this customer analysis data, create exactly {num_personas} detailed marketing personas:
-
-        ANALYSIS DATA:
-        {json.dumps(analysis_data, indent=2)}
-
-        For each persona, provide:
-        1. Name and tagline
-        2. Detailed demographics
-        3. Psychographic profile
-        4. Behavioral patterns
-        5. Pain points and goals
-        6. Communication preferences
-        7. Confidence scores (0-1)
-
-        Return as JSON with a "personas" array containing exactly {num_personas} personas. No markdown formatting.
-        """
-        
-        try:
-            response = self.model.generate_content(prompt)
-            response_text = response.text.strip()
-            if response_text.startswith('```json'):
-                response_text = response_text[7:]
-            if response_text.endswith('```'):
-                response_text = response_text[:-3]
-            
-            return json.loads(response_text)
-        except Exception as e:
-            return self._get_fallback_personas(num_personas)
-    
-    def create_campaigns(self, personas_data: Dict) -> Dict:
-        """Create campaign strategies for each persona"""
-        
-        prompt = f"""
-        Create comprehensive marketing campaign strategies for these personas:
-
-        PERSONAS:
-        {json.dumps(personas_data, indent=2)}
-
-        For each persona, create a campaign with:
-        1. Campaign title and central theme (memorable tagline)
-        2. Core messaging strategy
-        3. Channel recommendations
-        4. Content strategy
-        5. ROI predictions
-        6. Success metrics
-
-        Return as JSON with a "campaigns" array. Each campaign must include:
-        - title
-        - theme (catchy campaign theme/tagline)
-        - persona_target
-        - key_message
-        - value_propositions (array)
-        - channels (array)
-        - content_strategy (array)
-        - predicted_roi
-        - confidence_interval
- 
-        No markdown formatting.
-        """
-        
-        
-        try:
-            response = self.model.generate_content(prompt)
-            response_text = response.text.strip()
-            if response_text.startswith('```json'):
-                response_text = response_text[7:]
-            if response_text.endswith('```'):
-                response_text = response_text[:-3]
-            
-            return json.loads(response_text)
-        except Exception as e:
-            return self._get_fallback_campaigns()
-    
-    def refine_persona(self, original_persona: Dict, feedback: str) -> Dict:
-        """FIXED: Refine persona based on user feedback"""
-        prompt = f"""
-        Refine this marketing persona based on the user feedback. Make meaningful changes to improve the persona:
-        
-        ORIGINAL PERSONA:
-        {json.dumps(original_persona, indent=2)}
-        
-        USER FEEDBACK:
-        {feedback}
-        
-        Based on the feedback, update relevant fields while keeping the JSON structure intact.
-        Make sure to incorporate the feedback into demographics, psychographics, pain_points, goals, or other relevant sections.
-        Return the complete updated persona as JSON with no markdown formatting.
-        """
-        
-        try:
-            response = self.model.generate_content(prompt)
-            response_text = response.text.strip()
-            if response_text.startswith('```json'):
-                response_text = response_text[7:]
-            if response_text.endswith('```'):
-                response_text = response_text[:-3]
-            
-            refined_persona = json.loads(response_text)
-            
-            # Add refinement metadata
-            refined_persona['is_refined'] = True
-            refined_persona['last_refinement'] = datetime.now().isoformat()
-            refined_persona['refinement_feedback'] = feedback
-            
-            if 'refinement_history' not in refined_persona:
-                refined_persona['refinement_history'] = []
-            refined_persona['refinement_history'].append({
-                'timestamp': datetime.now().isoformat(),
-                'feedback': feedback
-            })
-            
-            return refined_persona
-        except Exception as e:
-            st.error(f"Refinement failed: {str(e)}")
-            return original_persona
-    
-    def generate_content_sample(self, campaign_data: Dict) -> Dict:
-        """Generate sample marketing content for campaign"""
-        prompt = f"""
-        Generate comprehensive marketing content samples for this campaign:
-        
-        CAMPAIGN DATA:
-        {json.dumps(campaign_data, indent=2)}
-
-        Create realistic, engaging content including:
-        1. Email subject line and full body
-        2. Social media posts (3 variations)
-        3. Google Ad copy (headline + description)
-        4. Blog post title and introduction paragraph
-        5. Landing page headline and value proposition
-
-        Return as JSON with detailed content. No markdown formatting.
-        """
-        
-        try:
-            response = self.model.generate_content(prompt)
-            response_text = response.text.strip()
-            if response_text.startswith('```json'):
-                response_text = response_text[7:]
-            if response_text.endswith('```'):
-                response_text = response_text[:-3]
-            
-            return json.loads(response_text)
-        except:
-            return {
-                "email": {
-                    "subject": "Transform Your Business with AI-Powered Solutions",
-                    "body": "Dear [Name],\n\nDiscover how our innovative platform can revolutionize your workflow and boost productivity by 300%. Join thousands of successful businesses who've already made the switch.\n\nBest regards,\nYour Marketing Team"
-                },
-                "social_posts": [
-                    "🚀 Ready to 3x your productivity? Our AI-powered solution is changing the game! #Innovation #Productivity",
-                    "Join 10,000+ businesses already saving time with our platform. What are you waiting for? 💪",
-                    "The future is here! Experience the power of intelligent automation. Try it free today! ⚡"
-                ],
-                "google_ad": {
-                    "headline": "Boost Productivity 300% | AI Solution",
-                    "description": "Transform your workflow with intelligent automation. Join 10,000+ satisfied customers. Free trial available!"
-                },
-                "blog": {
-                    "title": "The Future of Productivity: How AI is Transforming Business Operations",
-                    "intro": "In today's fast-paced business environment, staying competitive means embracing innovation. Artificial Intelligence isn't just a buzzword—it's a game-changing technology that's helping businesses of all sizes achieve unprecedented levels of efficiency and growth."
-                },
-                "landing_page": {
-                    "headline": "Unlock 300% More Productivity with AI",
-                    "value_prop": "Revolutionary AI platform that automates your workflow, saves time, and drives results. Join 10,000+ businesses already experiencing the transformation."
-                }
-            }
-    
-    def generate_journey_map(self, persona_data: Dict) -> Dict:
-        """Generate detailed customer journey map"""
-        prompt = f"""
-        Create a comprehensive customer journey map for this persona:
-        
-        PERSONA DATA:
-        {json.dumps(persona_data, indent=2)}
-
-        Generate a detailed journey with:
-        1. 6-7 key stages (Awareness to Advocacy)
-        2. Specific touchpoints for each stage
-        3. Emotional states throughout journey
-        4. Pain points at each stage
-        5. Opportunities for engagement
-        6. Recommended actions
-
-        Return as JSON with "journey_map" containing detailed stage information.
-        """
-        
-        try:
-            response = self.model.generate_content(prompt)
-            response_text = response.text.strip()
-            if response_text.startswith('```json'):
-                response_text = response_text[7:]
-            if response_text.endswith('```'):
-                response_text = response_text[:-3]
-            
-            return json.loads(response_text)
-        except:
-            return {
-                "journey_map": [
-                    {
-                        "stage": "Awareness",
-                        "touchpoints": ["Social Media", "Search Ads", "Word of Mouth"],
-                        "emotions": ["Curious", "Skeptical"],
-                        "pain_points": ["Information overload", "Too many options"],
-                        "opportunities": ["Educational content", "Clear messaging"],
-                        "actions": ["Create awareness campaigns", "SEO optimization"]
-                    },
-                    {
-                        "stage": "Interest",
-                        "touchpoints": ["Website", "Blog", "Reviews"],
-                        "emotions": ["Interested", "Hopeful"],
-                        "pain_points": ["Unclear pricing", "Complex information"],
-                        "opportunities": ["Detailed product info", "Social proof"],
-                        "actions": ["Landing page optimization", "Customer testimonials"]
-                    },
-                    {
-                        "stage": "Consideration",
-                        "touchpoints": ["Product demos", "Sales calls", "Comparisons"],
-                        "emotions": ["Evaluating", "Cautious"],
-                        "pain_points": ["Decision fatigue", "Budget concerns"],
-                        "opportunities": ["Free trials", "ROI calculators"],
-                        "actions": ["Demo scheduling", "Competitive analysis"]
-                    },
-                    {
-                        "stage": "Purchase",
-                        "touchpoints": ["Checkout", "Sales team", "Payment"],
-                        "emotions": ["Excited", "Anxious"],
-                        "pain_points": ["Complex checkout", "Payment issues"],
-                        "opportunities": ["Smooth process", "Multiple payment options"],
-                        "actions": ["Streamline checkout", "Payment flexibility"]
-                    },
-                    {
-                        "stage": "Onboarding",
-                        "touchpoints": ["Welcome emails", "Setup guides", "Support"],
-                        "emotions": ["Overwhelmed", "Determined"],
-                        "pain_points": ["Steep learning curve", "Lack of guidance"],
-                        "opportunities": ["Step-by-step guidance", "Video tutorials"],
-                        "actions": ["Onboarding sequences", "Support resources"]
-                    },
-                    {
-                        "stage": "Usage",
-                        "touchpoints": ["Product interface", "Support", "Updates"],
-                        "emotions": ["Satisfied", "Productive"],
-                        "pain_points": ["Feature complexity", "Performance issues"],
-                        "opportunities": ["Feature training", "Performance optimization"],
-                        "actions": ["User education", "Product improvements"]
-                    },
-                    {
-                        "stage": "Advocacy",
-                        "touchpoints": ["Referrals", "Reviews", "Case studies"],
-                        "emotions": ["Proud", "Confident"],
-                        "pain_points": ["Limited referral incentives"],
-                        "opportunities": ["Referral programs", "Success stories"],
-                        "actions": ["Loyalty programs", "Case study development"]
-                    }
-                ]
-            }
-    
-    def answer_query(self, query: str, context: Dict) -> str:
-        """FIXED: Enhanced AI assistant for queries"""
-        prompt = f"""
-        You are an expert marketing consultant. Answer this query based on the analysis data provided.
-        Be specific, actionable, and reference the actual data when possible.
-        
-        USER QUERY: {query}
-        
-        CONTEXT DATA:
-        Personas: {json.dumps(context.get('personas_data', {}), indent=2)}
-        Campaigns: {json.dumps(context.get('campaigns_data', {}), indent=2)}
-        
-        Provide a helpful, detailed response with specific recommendations and insights.
-        """
-        
-        try:
-            response = self.model.generate_content(prompt)
-            return response.text.strip()
-        except Exception as e:
-            return f"I apologize, but I encountered an error: {str(e)}. Please try rephrasing your question or check the system status."
-
-    def simulate_performance(self, campaign_data: Dict) -> Dict:
-        """Generate realistic performance simulation"""
-        prompt = f"""
-        Create a detailed performance simulation for this marketing campaign:
-        
-        CAMPAIGN:
-        {json.dumps(campaign_data, indent=2)}
-
-        Generate realistic metrics including:
-        1. Projected reach and impressions
-        2. Engagement rates by channel
-        3. Detailed conversion funnel
-        4. ROI scenarios (optimistic/realistic/conservative)
-        5. Timeline predictions
-        6. Budget breakdown and efficiency metrics
-
-        Return comprehensive JSON simulation data.
-        """
-        
-        try:
-            response = self.model.generate_content(prompt)
-            response_text = response.text.strip()
-            if response_text.startswith('```json'):
-                response_text = response_text[7:]
-            if response_text.endswith('```'):
-                response_text = response_text[:-3]
-            
-            return json.loads(response_text)
-        except:
-            return {
-                "reach": {
-                    "total_impressions": "250,000",
-                    "unique_reach": "85,000",
-                    "frequency": "2.9"
-                },
-                "engagement": {
-                    "overall_rate": "4.7%",
-                    "email_open_rate": "24%",
-                    "social_engagement": "6.2%",
-                    "website_ctr": "3.1%"
-                },
-                "conversion_funnel": {
-                    "impressions": "250,000",
-                    "clicks": "7,750",
-                    "leads": "930",
-                    "qualified_leads": "465",
-                    "sales": "93",
-                    "conversion_rate": "1.2%"
-                },
-                "roi_scenarios": {
-                    "optimistic": {"roi": "4.8x", "probability": "20%"},
-                    "realistic": {"roi": "3.2x", "probability": "60%"},
-                    "conservative": {"roi": "2.1x", "probability": "20%"}
-                },
-                "timeline": {
-                    "launch_phase": "Weeks 1-2",
-                    "optimization_phase": "Weeks 3-6",
-                    "scaling_phase": "Weeks 7-12",
-                    "full_roi_expected": "Month 4"
-                },
-                "budget_efficiency": {
-                    "cost_per_click": "$0.87",
-                    "cost_per_lead": "$8.60",
-                    "customer_acquisition_cost": "$86.00",
-                    "return_on_ad_spend": "320%"
-                }
-            }
-    
-    def generate_ab_test_ideas(self, campaign_data: Dict) -> Dict:
-        """NEW FEATURE: Generate A/B test ideas"""
-        prompt = f"""
-        Generate A/B testing ideas for this campaign to optimize performance:
-        
-        CAMPAIGN:
-        {json.dumps(campaign_data, indent=2)}
-
-        Suggest 5-7 specific A/B tests covering:
-        1. Headlines and messaging
-        2. Visual elements
-        3. Call-to-action buttons
-        4. Email subject lines
-        5. Landing page layouts
-        6. Targeting parameters
-
-        Return as JSON with test ideas and expected impact.
-        """
-        
-        try:
-            response = self.model.generate_content(prompt)
-            response_text = response.text.strip()
-            if response_text.startswith('```json'):
-                response_text = response_text[7:]
-            if response_text.endswith('```'):
-                response_text = response_text[:-3]
-            
-            return json.loads(response_text)
-        except:
-            return {
-                "ab_tests": [
-                    {
-                        "test_name": "Headline Optimization",
-                        "element": "Main headline",
-                        "variant_a": "Current headline",
-                        "variant_b": "Benefit-focused headline",
-                        "expected_impact": "+15% conversion rate",
-                        "test_duration": "2 weeks"
-                    },
-                    {
-                        "test_name": "CTA Button Color",
-                        "element": "Call-to-action button",
-                        "variant_a": "Blue button",
-                        "variant_b": "Orange button",
-                        "expected_impact": "+8% click-through rate",
-                        "test_duration": "1 week"
-                    }
-                ]
-            }
-    
-    def generate_competitor_analysis(self, personas_data: Dict) -> Dict:
-        """NEW FEATURE: Competitor analysis insights"""
-        prompt = f"""
-        Based on these personas, generate a competitor analysis framework:
-        
-        PERSONAS:
-        {json.dumps(personas_data, indent=2)}
-
-        Provide:
-        1. Key competitors likely targeting these personas
-        2. Competitive positioning opportunities
-        3. Differentiation strategies
-        4. Pricing considerations
-        5. Channel strategy vs competitors
-
-        Return as JSON with actionable insights.
-        """
-        
-        try:
-            response = self.model.generate_content(prompt)
-            response_text = response.text.strip()
-            if response_text.startswith('```json'):
-                response_text = response_text[7:]
-            if response_text.endswith('```'):
-                response_text = response_text[:-3]
-            
-            return json.loads(response_text)
-        except:
-            return {
-                "competitor_landscape": {
-                    "direct_competitors": ["Competitor A", "Competitor B", "Competitor C"],
-                    "indirect_competitors": ["Alternative Solution 1", "Alternative Solution 2"],
-                    "positioning_gaps": ["Underserved premium segment", "SMB market opportunity"],
-                    "differentiation_opportunities": ["Superior customer service", "Advanced features", "Better pricing"]
-                }
-            }
-    
-    def _get_fallback_analysis(self):
-        """Fallback analysis data"""
-        return {
-            "customer_segments": [
-                {
-                    "name": "Efficiency Seekers",
-                    "size": "35%",
-                    "traits": ["time-conscious", "tech-savvy", "quality-focused"]
-                },
-                {
-                    "name": "Value Optimizers",
-                    "size": "30%", 
-                    "traits": ["budget-conscious", "research-driven", "family-oriented"]
-                },
-                {
-                    "name": "Premium Pursuers",
-                    "size": "25%",
-                    "traits": ["quality-first", "brand-loyal", "premium-willing"]
-                }
-            ],
-            "key_insights": {
-                "primary_pain_points": ["time constraints", "complex processes", "poor value"],
-                "top_motivations": ["efficiency", "savings", "quality"]
-            }
-        }
-    
-    def _get_fallback_personas(self, num_personas: int = 3):
-        """Enhanced fallback personas data"""
-        all_personas = [
-            {
-                "name": "Alex the Efficiency Expert",
-                "tagline": "Time is money, quality is non-negotiable",
-                "demographics": {
-                    "age_range": "28-40",
-                    "income_range": "$65k-$120k",
-                    "education": "Bachelor's+",
-                    "location": "Urban/Suburban",
-                    "occupation": "Project Manager/Consultant"
-                },
-                "psychographics": {
-                    "values": ["efficiency", "innovation", "work-life balance"],
-                    "personality_traits": ["analytical", "goal-oriented", "tech-savvy"],
-                    "lifestyle": "Fast-paced, digitally connected, career-focused",
-                    "interests": ["productivity tools", "tech trends", "professional development"]
-                },
-                "behavior_patterns": {
-                    "decision_making": "Research-driven, quick decisions",
-                    "brand_loyalty": "Medium - switches for better solutions",
-                    "price_sensitivity": "Low - values time savings over cost",
-                    "content_consumption": "Blogs, podcasts, video tutorials"
-                },
-                "pain_points": [
-                    "Information overload and decision fatigue",
-                    "Time-consuming processes and poor UX",
-                    "Lack of integration between tools",
-                    "Inefficient team collaboration methods"
-                ],
-                "goals": [
-                    "Maximize productivity and efficiency",
-                    "Stay ahead of technology trends", 
-                    "Achieve work-life balance",
-                    "Lead successful project outcomes"
-                ],
-                "preferred_channels": ["LinkedIn", "Email", "Professional forums", "Webinars"],
-                "messaging_preferences": {
-                    "tone": "Professional, direct, value-focused",
-                    "content_types": ["How-to guides", "Case studies", "Video demos", "ROI calculators"],
-                    "frequency": "Weekly updates, immediate alerts for relevant content"
-                },
-                "confidence_score": 0.92,
-                "market_size": "32%",
-                "business_value": "High"
-            },
-            {
-                "name": "Jordan the Value Optimizer",
-                "tagline": "Smart choices for smart families",
-                "demographics": {
-                    "age_range": "35-50",
-                    "income_range": "$45k-$85k",
-                    "education": "High School - Bachelor's",
-                    "location": "Suburban/Small City",
-                    "family_status": "Married with 2-3 children"
-                },
-                "psychographics": {
-                    "values": ["family", "financial security", "practical solutions"],
-                    "personality_traits": ["cautious", "caring", "community-minded"],
-                    "lifestyle": "Family-centered, budget-conscious, community-involved",
-                    "interests": ["family activities", "saving money", "local community"]
-                },
-                "behavior_patterns": {
-                    "decision_making": "Thorough research, seeks recommendations",
-                    "brand_loyalty": "High - sticks with trusted brands",
-                    "price_sensitivity": "High - compares prices extensively",
-                    "content_consumption": "Reviews, comparison sites, social media"
-                },
-                "pain_points": [
-                    "Limited budget with growing family needs",
-                    "Difficulty evaluating value vs cost",
-                    "Hidden fees and unexpected costs",
-                    "Time constraints for thorough research"
-                ],
-                "goals": [
-                    "Provide best value for family",
-                    "Financial stability and security",
-                    "Make smart, informed decisions",
-                    "Save time while ensuring quality"
-                ],
-                "preferred_channels": ["Facebook", "Email newsletters", "Community forums", "Local advertising"],
-                "messaging_preferences": {
-                    "tone": "Warm, trustworthy, family-focused",
-                    "content_types": ["Customer testimonials", "Comparison charts", "Family stories", "Money-saving tips"],
-                    "frequency": "Bi-weekly newsletters, seasonal promotions"
-                },
-                "confidence_score": 0.88,
-                "market_size": "28%",
-                "business_value": "Medium-High"
-            },
-            {
-                "name": "Sam the Premium Pursuer",
-                "tagline": "Quality over everything else",
-                "demographics": {
-                    "age_range": "40-65",
-                    "income_range": "$100k+",
-                    "education": "Bachelor's - Advanced Degree",
-                    "location": "Urban/Affluent Suburban",
-                    "occupation": "Executive/Business Owner"
-                },
-                "psychographics": {
-                    "values": ["quality", "exclusivity", "expertise"],
-                    "personality_traits": ["discerning", "confident", "success-oriented"],
-                    "lifestyle": "Premium-focused, time-rich but selective, status-conscious",
-                    "interests": ["luxury experiences", "industry leadership", "exclusive networks"]
-                },
-                "behavior_patterns": {
-                    "decision_making": "Expert consultation, brand reputation focused",
-                    "brand_loyalty": "Very high - premium brand advocate",
-                    "price_sensitivity": "Very low - quality is paramount",
-                    "content_consumption": "Industry publications, expert opinions, premium content"
-                },
-                "pain_points": [
-                    "Finding authentic premium quality",
-                    "Distinguishing between genuine and inflated value",
-                    "Lack of personalized service",
-                    "Time wasted on subpar solutions"
-                ],
-                "goals": [
-                    "Access the highest quality solutions",
-                    "Maintain status and exclusivity",
-                    "Save time with premium service",
-                    "Make strategic business decisions"
-                ],
-                "preferred_channels": ["Email", "Premium publications", "Exclusive events", "Executive networks"],
-                "messaging_preferences": {
-                    "tone": "Sophisticated, exclusive, expert-level",
-                    "content_types": ["Expert insights", "Behind-the-scenes content", "Premium case studies", "Executive briefings"],
-                    "frequency": "Monthly premium content, exclusive early access"
-                },
-                "confidence_score": 0.91,
-                "market_size": "25%",
-                "business_value": "Very High"
-            },
-            {
-                "name": "Casey the Innovation Adopter",
-                "tagline": "First to try, first to succeed",
-                "demographics": {
-                    "age_range": "25-35",
-                    "income_range": "$55k-$95k",
-                    "education": "Bachelor's+",
-                    "location": "Urban/Tech Hubs",
-                    "occupation": "Marketing/Tech Professional"
-                },
-                "psychographics": {
-                    "values": ["innovation", "trendsetting", "social influence"],
-                    "personality_traits": ["curious", "social", "risk-tolerant"],
-                    "lifestyle": "Tech-forward, socially connected, early adopter",
-                    "interests": ["new technology", "social media trends", "startup culture"]
-                },
-                "behavior_patterns": {
-                    "decision_making": "Impulse-driven, influenced by social proof",
-                    "brand_loyalty": "Low - always seeking the next big thing",
-                    "price_sensitivity": "Medium - willing to pay for innovation",
-                    "content_consumption": "Social media, tech blogs, influencer content"
-                },
-                "pain_points": [
-                    "Missing out on latest trends",
-                    "Limited social proof for new products",
-                    "Overwhelming choice of new options",
-                    "Fear of backing the wrong innovation"
-                ],
-                "goals": [
-                    "Stay ahead of the curve",
-                    "Build social influence and credibility",
-                    "Find innovative solutions to everyday problems",
-                    "Be recognized as a thought leader"
-                ],
-                "preferred_channels": ["Instagram", "TikTok", "Tech blogs", "Twitter", "LinkedIn"],
-                "messaging_preferences": {
-                    "tone": "Exciting, innovative, cutting-edge",
-                    "content_types": ["Product launches", "Beta features", "Influencer content", "Trend reports"],
-                    "frequency": "Daily updates, real-time notifications"
-                },
-                "confidence_score": 0.86,
-                "market_size": "22%",
-                "business_value": "High"
-            },
-            {
-                "name": "Riley the Relationship Builder",
-                "tagline": "Connection and community first",
-                "demographics": {
-                    "age_range": "30-55",
-                    "income_range": "$40k-$75k",
-                    "education": "High School - Bachelor's",
-                    "location": "Suburban/Rural",
-                    "occupation": "Teacher/Non-profit/Small Business"
-                },
-                "psychographics": {
-                    "values": ["community", "relationships", "authenticity"],
-                    "personality_traits": ["empathetic", "loyal", "collaborative"],
-                    "lifestyle": "Community-focused, relationship-driven, authentic",
-                    "interests": ["local community", "volunteering", "personal connections"]
-                },
-                "behavior_patterns": {
-                    "decision_making": "Relationship-based, seeks personal recommendations",
-                    "brand_loyalty": "Very high - supports brands that align with values",
-                    "price_sensitivity": "Medium - values relationship over price",
-                    "content_consumption": "Word-of-mouth, community forums, personal stories"
-                },
-                "pain_points": [
-                    "Impersonal service experiences",
-                    "Lack of genuine connection with brands",
-                    "Difficulty finding trustworthy recommendations",
-                    "Corporate messaging that feels inauthentic"
-                ],
-                "goals": [
-                    "Build meaningful connections",
-                    "Support businesses that share values",
-                    "Create positive community impact",
-                    "Foster authentic relationships"
-                ],
-                "preferred_channels": ["Community events", "Word-of-mouth", "Local social media", "Email"],
-                "messaging_preferences": {
-                    "tone": "Personal, authentic, community-focused",
-                    "content_types": ["Stories", "Community spotlights", "Personal testimonials", "Behind-the-scenes"],
-                    "frequency": "Weekly community updates, event notifications"
-                },
-                "confidence_score": 0.87,
-                "market_size": "18%",
-                "business_value": "Medium"
-            }
-        ]
-        
-        # Return the requested number of personas
-        selected_personas = all_personas[:num_personas]
-        return {"personas": selected_personas}
-    
-    def _get_fallback_campaigns(self):
-        """Enhanced fallback campaigns data"""
-        return {
-            "campaigns": [
-                {
-                    "title": "Efficiency Accelerator Campaign",
-                    "persona_target": "Alex the Efficiency Expert",
-                    "theme": "Time is Your Most Valuable Asset",
-                    "key_message": "Transform your productivity with intelligent automation that saves hours every day",
-                    "value_propositions": [
-                        "Save 3+ hours daily with smart automation",
-                        "Seamless integration with existing tools", 
-                        "Real-time analytics and insights",
-                        "Enterprise-grade security and reliability"
-                    ],
-                    "channels": ["LinkedIn Ads", "Google Search", "Email Marketing", "Webinars"],
-                    "content_strategy": [
-                        "Productivity Tips & Hacks",
-                        "Industry Efficiency Trends",
-                        "Customer Success Stories", 
-                        "Integration Tutorials"
-                    ],
-                    "predicted_roi": "3.4x",
-                    "conversion_rate": "8.5%",
-                    "confidence_interval": "85-95%"
-                },
-                {
-                    "title": "Smart Family Value Campaign", 
-                    "persona_target": "Jordan the Value Optimizer",
-                    "theme": "Smart Choices for Smart Families",
-                    "key_message": "The smart choice families trust for unbeatable value and peace of mind",
-                    "value_propositions": [
-                        "Best value guarantee with transparent pricing",
-                        "Family-friendly features and safety",
-                        "24/7 customer support when you need it",
-                        "Money-back satisfaction guarantee"
-                    ],
-                    "channels": ["Facebook", "Instagram", "Community Partnerships", "Local Radio"],
-                    "content_strategy": [
-                        "Family Success Stories",
-                        "Money-Saving Tips",
-                        "Community Spotlights",
-                        "Value Comparison Charts"
-                    ],
-                    "predicted_roi": "2.8x",
-                    "conversion_rate": "6.2%", 
-                    "confidence_interval": "75-85%"
-                }
-            ]
-        }
+MAX_CHAT_HISTORY = 50
+REPORT_FORMAT_LABELS = {'markdown': "Markdown", 'html': "HTML", 'print_html': "Print-ready HTML (save as PDF)"}
+EXPORT_FORMAT_LABELS = {'json': "JSON", 'compact_json': "Compact JSON", 'ndjson': "NDJSON, one record per line"}
+
+# Session-scoped Artifact Prefetching
+def get_artifact(ai_engine, kind: str, payload: Dict) -> Dict:
+    """Serve an Advanced Features artifact from the session prefetch cache, generating it on a miss"""
+    prefetcher = st.session_state.get('artifact_prefetcher')
+    if prefetcher is not None:
+        return prefetcher.fetch(kind, payload)
+    return st.session_state['artifact_store'].get_or_generate(kind, payload, ai_engine)
+
+def start_artifact_prefetch(ai_engine, personas_data: Dict, campaigns_data: Dict, max_calls: int = 8):
+    """Cancel any running prefetch for this session and start one for the latest results"""
+    previous = st.session_state.get('artifact_prefetcher')
+    if previous is not None:
+        previous.cancel()
+    prefetcher = ArtifactPrefetcher(ai_engine, st.session_state['artifact_store'], max_calls=max_calls)
+    prefetcher.start(personas_data, campaigns_data)
+    st.session_state['artifact_prefetcher'] = prefetcher
 
 # Initialize AI Engine with Enhanced Error Handling
 @st.cache_resource
 def initialize_ai_engine():
     """Initialize AI Analysis Engine with embedded API key and fallback options"""
+    if os.getenv("PERSONA_DESIGNER_BACKEND", "gemini") == "fake":
+        st.info("🧪 Running on the local fake model backend (PERSONA_DESIGNER_BACKEND=fake)")
+        return EnhancedAIAnalysisEngine(backend=make_backend('fake'))
+    
     api_key = os.getenv("GEMINI_API_KEY")
     
     if not api_key:
@@ -1019,243 +243,158 @@ def initialize_ai_engine():
         st.error("❌ Could not connect to any Gemini model. Using fallback mode.")
         return None
 
-# Enhanced Visualization Functions
-def create_confidence_chart(personas_data):
-    """Create enhanced confidence score visualization"""
-    if not personas_data or 'personas' not in personas_data:
-        return None
-        
-    personas = personas_data['personas']
-    names = []
-    scores = []
-    refined_status = []
-    
-    for p in personas:
-        names.append(p.get('name', 'Unknown Persona'))
-        
-        confidence = p.get('confidence_score', 0.85)
-        if isinstance(confidence, dict):
-            confidence = confidence.get('overall_confidence', confidence.get('confidence_metrics', {}).get('overall_confidence', 0.85))
-        elif isinstance(confidence, str):
-            try:
-                if '%' in confidence:
-                    confidence = float(confidence.replace('%', '')) / 100
-                else:
-                    confidence = float(confidence)
-                    if confidence > 1:  # Handle cases where it's 85 instead of 0.85
-                        confidence = confidence / 100
-            except (ValueError, TypeError):
-                confidence = 0.85
-        elif not isinstance(confidence, (int, float)):
-            confidence = 0.85
-        elif isinstance(confidence, (int, float)) and confidence > 1:
-            confidence = confidence / 100  # Convert 85 to 0.85
-
-# Ensure confidence is within valid range
-        confidence = max(0, min(1, confidence))
-        
-        scores.append(confidence * 100)
-        refined_status.append('Refined' if p.get('is_refined', False) else 'Original')
-    
-    if not names or not scores:
-        return None
-    
-    fig = px.bar(
-        x=names,
-        y=scores,
-        title="🎯 Persona Confidence Scores",
-        labels={'x': 'Personas', 'y': 'Confidence Score (%)'},
-        color=scores,
-        color_continuous_scale='RdYlGn',
-        text=refined_status
-    )
-    
-    fig.update_traces(textposition='outside')
-    fig.update_layout(
-        showlegend=False,
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)',
-        font=dict(color='#333'),
-        title_font_size=20
-    )
-    
-    return fig
-
-def create_market_size_chart(personas_data):
-    """Create enhanced market size distribution chart"""
-    if not personas_data or 'personas' not in personas_data:
-        return None
-        
-    personas = personas_data['personas']
-    names = []
-    sizes = []
-    colors = []
-    
-    for p in personas:
-        name = p.get('name', 'Unknown Persona')
-        if p.get('is_refined', False):
-            name += " ⭐"
-        names.append(name)
-        
-        market_size = p.get('market_size', '25%')
-        if isinstance(market_size, dict):
-            market_size = market_size.get('market_segment_size', '25%')
-        
-        try:
-            if isinstance(market_size, str):
-                size_val = float(market_size.replace('%', ''))
-            else:
-                size_val = float(market_size)
-        except:
-            size_val = 25.0
-        
-        sizes.append(size_val)
-        colors.append('#ff6b6b' if p.get('is_refined', False) else '#4ecdc4')
-    
-    if not names or not sizes or sum(sizes) == 0:
-        return None
-    
-    fig = px.pie(
-        names=names,
-        values=sizes,
-        title="📊 Market Segment Distribution",
-        color_discrete_sequence=colors
-    )
-    
-    fig.update_traces(
-        textposition='inside', 
-        textinfo='percent+label',
-        textfont_size=12
-    )
-    fig.update_layout(
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)',
-        font=dict(color='#333'),
-        title_font_size=20
-    )
-    
-    return fig
+# Persistent Run History
+@st.cache_resource
+def get_run_store() -> RunStore:
+    """Process-wide run store at PERSONA_DESIGNER_RUN_STORE (default .persona_designer/runs.sqlite3)"""
+    return RunStore(os.getenv("PERSONA_DESIGNER_RUN_STORE", os.path.join(".persona_designer", "runs.sqlite3")))
 
-def create_roi_comparison_chart(campaigns_data):
-    """Create enhanced ROI comparison chart"""
-    if not campaigns_data or 'campaigns' not in campaigns_data:
-        return None
-        
-    campaigns = campaigns_data['campaigns']
-    titles = []
-    roi_values = []
-    confidence_intervals = []
-    
-    for c in campaigns:
-        titles.append(c.get('title', 'Campaign'))
-        
-        roi = c.get('predicted_roi', '2.5x')
-        if isinstance(roi, dict):
-            roi = roi.get('projected_roi', '2.5x')
-        
+def current_user_id() -> str:
+    """Signed-in user's email when Streamlit auth is configured, else PERSONA_DESIGNER_USER or 'local'"""
+    try:
+        if st.user.is_logged_in and st.user.get('email'):
+            return st.user['email']
+    except Exception:
+        pass
+    return os.getenv("PERSONA_DESIGNER_USER", "local")
+
+def apply_run_results(results: Dict):
+    """Make a pipeline result (fresh or loaded from the run store) the session's current analysis"""
+    st.session_state['analysis_complete'] = True
+    st.session_state['analysis_timestamp'] = datetime.now()
+    st.session_state['personas_data'] = results['personas']
+    st.session_state['campaigns_data'] = results['campaigns']
+    st.session_state['analysis_data'] = results['analysis']
+    st.session_state['additional_results'] = results['additional_results'] or {}
+    # Counted after merging, so it can be lower than the number requested
+    st.session_state['num_personas_generated'] = len((results['personas'] or {}).get('personas', []))
+    st.session_state['persona_merges'] = results['persona_merges'] or []
+    st.session_state['advanced_features'] = results['configuration']
+    st.session_state['stored_run_id'] = results.get('stored_run_id')
+    track_persona_versions()
+    mark_results_changed()
+
+def mark_results_changed():
+    """Invalidate per-session exports after the analysis, personas or campaigns change"""
+    for path in st.session_state['export_files'].values():
         try:
-            roi_val = float(str(roi).replace('x', ''))
-        except:
-            roi_val = 2.5
-        
-        roi_values.append(roi_val)
-        confidence_intervals.append(c.get('confidence_interval', '80-90%'))
-    
-    if not titles or not roi_values:
-        return None
-    
-    fig = px.bar(
-        x=titles,
-        y=roi_values,
-        title="🚀 Predicted Campaign ROI",
-        labels={'x': 'Campaigns', 'y': 'ROI Multiplier'},
-        color=roi_values,
-        color_continuous_scale='RdYlGn',
-        text=confidence_intervals
-    )
-    
-    fig.update_traces(textposition='outside')
-    fig.update_layout(
-        showlegend=False,
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)',
-        font=dict(color='#333'),
-        xaxis_tickangle=-45,
-        title_font_size=20
-    )
-    
-    return fig
-
-def create_journey_map_chart(journey_data: Dict):
-    """Create enhanced interactive journey map visualization"""
-    if not journey_data or 'journey_map' not in journey_data:
-        return None
-        
-    stages = journey_data['journey_map']
-    x = [s.get('stage', 'Stage') for s in stages]
-    
-    # Create emotion scores (positive/negative scale)
-    emotion_scores = []
-    for s in stages:
-        emotions = s.get('emotions', [])
-        # Simple scoring based on common emotion words
-        positive_emotions = ['excited', 'satisfied', 'happy', 'confident', 'proud', 'hopeful']
-        negative_emotions = ['anxious', 'frustrated', 'overwhelmed', 'confused', 'skeptical']
-        
-        score = 0
-        for emotion in emotions:
-            if any(pos in emotion.lower() for pos in positive_emotions):
-                score += 1
-            elif any(neg in emotion.lower() for neg in negative_emotions):
-                score -= 1
-        
-        emotion_scores.append(score)
-    
-    fig = go.Figure()
-    
-    # Add emotion journey line
-    fig.add_trace(go.Scatter(
-        x=x,
-        y=emotion_scores,
-        mode='lines+markers+text',
-        name='Customer Emotion Journey',
-        text=[', '.join(s.get('emotions', [])) for s in stages],
-        textposition="top center",
-        marker=dict(size=12, color='blue'),
-        line=dict(width=3)
-    ))
-    
-    # Add opportunity markers
-    fig.add_trace(go.Scatter(
-        x=x,
-        y=[max(emotion_scores) + 1] * len(x),
-        mode='markers+text',
-        name='Key Opportunities',
-        text=[', '.join(s.get('opportunities', [])[:2]) for s in stages],
-        textposition="top center",
-        marker=dict(size=10, color='green', symbol='star'),
-        showlegend=False
-    ))
-    
-    fig.update_layout(
-        title="🗺️ Customer Journey Map",
-        xaxis_title="Journey Stages",
-        yaxis_title="Emotional Experience",
-        yaxis=dict(
-            tickmode='array',
-            tickvals=[-2, -1, 0, 1, 2],
-            ticktext=['Very Negative', 'Negative', 'Neutral', 'Positive', 'Very Positive']
-        ),
-        showlegend=True,
-        height=500,
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)',
-        title_font_size=20
-    )
-    
-    return fig
+            os.remove(path)
+        except OSError:
+            pass
+    st.session_state['export_files'] = {}
+    st.session_state['simulations'] = {}
+    st.session_state['results_revision'] += 1
+
+def session_export_file(fmt: str) -> str:
+    """Path of a temp file holding the current results in `fmt`, written once per results revision"""
+    key = (st.session_state['results_revision'], fmt)
+    path = st.session_state['export_files'].get(key)
+    if path is None or not os.path.exists(path):
+        payload = build_export_payload(
+            st.session_state.get('analysis_data', {}),
+            st.session_state.get('personas_data', {}),
+            st.session_state.get('campaigns_data', {}),
+            st.session_state.get('additional_results', {}),
+            st.session_state.get('advanced_features', {})
+        )
+        path = st.session_state['export_files'][key] = export_to_tempfile(payload, fmt)
+    return path
+
+def session_tables_file() -> str:
+    """Path of a temp zip with the current results as Parquet/CSV tables, rewritten when the results,
+    the optimizer settings or the stored simulations change"""
+    total_budget = st.session_state.get('optimizer_total_budget', 50000)
+    hold_back = st.session_state.get('optimizer_hold_back', False)
+    simulations = st.session_state['simulations']
+    key = (st.session_state['results_revision'], 'tables', total_budget, hold_back, tuple(sorted(simulations)))
+    path = st.session_state['export_files'].get(key)
+    if path is None or not os.path.exists(path):
+        campaigns_data = st.session_state.get('campaigns_data', {})
+        tables = build_result_tables([{
+            'run_id': st.session_state.get('stored_run_id') or 'session',
+            'personas': st.session_state.get('personas_data', {}),
+            'campaigns': campaigns_data,
+            'allocation': optimize_budget_allocation(campaigns_data, total_budget, hold_back),
+            'simulations': simulations
+        }])
+        path = st.session_state['export_files'][key] = export_tables_zip(tables)
+    return path
+
+# Persona Version History
+def track_persona_versions():
+    """Start a fresh version lineage for every persona of the current analysis"""
+    store = st.session_state['persona_versions']
+    store.clear()
+    personas_data = st.session_state.get('personas_data') or {}
+    lineages = [store.track(persona) for persona in personas_data.get('personas', [])]
+    if lineages:
+        personas_data['personas'] = [store.get(lineage) for lineage in lineages]
+    st.session_state['persona_lineages'] = lineages
+    st.session_state['campaigns_by_heads'] = {store.heads(): st.session_state.get('campaigns_data')}
+    st.session_state['campaigns_stale'] = False
+
+def persona_lineage(persona_idx: int):
+    lineages = st.session_state.get('persona_lineages') or []
+    return lineages[persona_idx] if persona_idx < len(lineages) else None
+
+def commit_persona_refinement(persona_idx: int, refined_persona: Dict, feedback: str, campaigns_data: Dict):
+    """Record a refinement as a new version and remember the campaigns built from the new persona set"""
+    store = st.session_state['persona_versions']
+    lineage = persona_lineage(persona_idx)
+    if lineage is not None:
+        store.commit(lineage, refined_persona, feedback)
+        refined_persona = store.get(lineage)
+        st.session_state['campaigns_by_heads'][store.heads()] = campaigns_data
+    st.session_state['personas_data']['personas'][persona_idx] = refined_persona
+    st.session_state['campaigns_data'] = campaigns_data
+    st.session_state['campaigns_stale'] = False
+    mark_results_changed()
+
+def rollback_persona(persona_idx: int, version: int):
+    """Check out an earlier version without calling the model; campaigns are restored if this
+    combination of persona versions had them, otherwise they are flagged as stale"""
+    store = st.session_state['persona_versions']
+    lineage = persona_lineage(persona_idx)
+    st.session_state['personas_data']['personas'][persona_idx] = store.checkout(lineage, version)
+    campaigns_data = st.session_state['campaigns_by_heads'].get(store.heads())
+    if campaigns_data is not None:
+        st.session_state['campaigns_data'] = campaigns_data
+    st.session_state['campaigns_stale'] = campaigns_data is None
+    mark_results_changed()
+
+def persona_version_history(persona_idx: int) -> list:
+    """Refinements of one persona, oldest first (empty when it has none)"""
+    lineage = persona_lineage(persona_idx)
+    if lineage is None:
+        return []
+    history = st.session_state['persona_versions'].history(lineage)
+    return history if len(history) > 1 else []
 
 # Enhanced Display Functions
+FALLBACK_REASON_LABELS = {
+    'parse_error': 'unreadable model response',
+    'quota': 'API quota exceeded',
+    'timeout': 'model timed out',
+    'safety_block': 'blocked by safety filters',
+    'backend_error': 'model unavailable'
+}
+
+def provenance_badge(data) -> str:
+    """HTML badge telling whether a result came from the model or from built-in fallback data"""
+    record = provenance(data)
+    if not record:
+        return ""
+    if record.get('source') == 'fallback':
+        reason = FALLBACK_REASON_LABELS.get(record.get('reason'), record.get('reason') or 'unknown')
+        return f'<span class="provenance-badge provenance-fallback">⚠️ Fallback data · {reason}</span>'
+    return f'<span class="provenance-badge provenance-model">🤖 AI generated · {record.get("model", "model")}</span>'
+
+def display_provenance_badge(data):
+    badge = provenance_badge(data)
+    if badge:
+        st.markdown(badge, unsafe_allow_html=True)
+
+@traced('render.display_personas')
 def display_personas(personas_data):
     """FIXED: Display personas with enhanced information and refinement indicators"""
     if not personas_data or 'personas' not in personas_data:
@@ -1263,6 +402,7 @@ def display_personas(personas_data):
         return
     
     personas = personas_data['personas']
+    display_provenance_badge(personas_data)
     
     for i, persona in enumerate(personas):
         name = persona.get('name', 'Unknown Persona')
@@ -1351,10 +491,11 @@ def display_personas(personas_data):
             st.write(", ".join(channels[:4]))
             
             # Refinement history if available
-            if is_refined and persona.get('refinement_history'):
+            history = persona_version_history(i)
+            if is_refined and history:
                 with st.expander("🔍 Refinement History"):
-                    for entry in persona.get('refinement_history', []):
-                        st.write(f"**{entry.get('timestamp', 'Unknown date')}:** {entry.get('feedback', 'No feedback recorded')}")
+                    for entry in history[1:]:
+                        st.write(f"**{entry['created_at']}:** {entry['feedback'] or 'No feedback recorded'}")
         
         with col2:
             # Safely get metrics
@@ -1420,6 +561,7 @@ def display_personas(personas_data):
         
         st.markdown("---")
 
+@traced('render.display_campaigns')
 def display_campaigns(campaigns_data):
     """FIXED: Display campaigns with enhanced metrics"""
     if not campaigns_data or 'campaigns' not in campaigns_data:
@@ -1427,6 +569,7 @@ def display_campaigns(campaigns_data):
         return
     
     campaigns = campaigns_data['campaigns']
+    display_provenance_badge(campaigns_data)
     
     for campaign in campaigns:
         title = campaign.get('title', 'Marketing Campaign')
@@ -1538,9 +681,11 @@ def display_campaigns(campaigns_data):
         st.markdown("---")
 
 # Enhanced Content Display Functions
+@traced('render.display_content_samples')
 def display_content_samples(content_data: Dict):
     """Display generated content samples with copy buttons"""
     st.markdown("### 📝 AI-Generated Content Samples")
+    display_provenance_badge(content_data)
     
     # Email Campaign
     email = content_data.get('email', {})
@@ -1576,6 +721,7 @@ def display_content_samples(content_data: Dict):
             st.text_input("Landing Page Headline", value=landing.get('headline', 'Sample headline'), key=f"landing_headline_{id(content_data)}")
             st.text_area("Value Proposition", value=landing.get('value_prop', 'Sample value prop...'), height=100, key=f"landing_value_{id(content_data)}")
 
+@traced('render.display_performance_simulation')
 def display_performance_simulation(sim_data: Dict):
     """Display enhanced campaign performance simulation"""
     st.markdown("### 📈 Advanced Performance Simulation")
@@ -1648,6 +794,37 @@ def display_performance_simulation(sim_data: Dict):
                 st.metric(stage, value)
                 st.progress(progress_val)
     
+    # Monte Carlo distributions
+    distributions = sim_data.get('distributions', {})
+    if distributions.get('roi_histogram'):
+        st.markdown("#### 🎲 Outcome Distributions")
+        histogram = distributions['roi_histogram']
+        edges = histogram['edges']
+        fig = go.Figure(go.Bar(
+            x=[(low + high) / 2 for low, high in zip(edges[:-1], edges[1:])],
+            y=histogram['counts'],
+            marker_color='#4ecdc4'
+        ))
+        fig.update_layout(
+            title="ROI Distribution Across Trials",
+            xaxis_title="ROI Multiplier",
+            yaxis_title="Trials",
+            bargap=0.05,
+            height=300,
+            plot_bgcolor='rgba(0,0,0,0)',
+            paper_bgcolor='rgba(0,0,0,0)'
+        )
+        st.plotly_chart(fig, use_container_width=True, key=f"roi_distribution_{id(sim_data)}")
+        
+        stage_labels = ['impressions', 'clicks', 'leads', 'qualified_leads', 'sales', 'roi']
+        st.dataframe(pd.DataFrame(
+            {
+                stage.replace('_', ' ').title(): [distributions[stage][p] for p in ('p10', 'p50', 'p90', 'mean')]
+                for stage in stage_labels if stage in distributions
+            },
+            index=['P10', 'Median', 'P90', 'Mean']
+        ).round(2))
+    
     # Timeline and Budget Efficiency
     timeline_data = sim_data.get('timeline', {})
     budget_data = sim_data.get('budget_efficiency', {})
@@ -1668,11 +845,15 @@ def display_performance_simulation(sim_data: Dict):
                     formatted_metric = metric.replace('_', ' ').title()
                     st.write(f"**{formatted_metric}:** {value}")
 
+@traced('render.display_ab_test_ideas')
 def display_ab_test_ideas(ab_data: Dict):
     """Display A/B testing recommendations"""
     st.markdown("### 🧪 A/B Testing Recommendations")
+    display_provenance_badge(ab_data)
     
     tests = ab_data.get('ab_tests', [])
+    plan = ab_data.get('test_plan', {})
+    plan_tests = plan.get('tests', [])
     
     for i, test in enumerate(tests):
         with st.expander(f"Test {i+1}: {test.get('test_name', 'A/B Test')}"):
@@ -1687,232 +868,26 @@ def display_ab_test_ideas(ab_data: Dict):
                 st.write(f"**Expected Impact:** {test.get('expected_impact', 'N/A')}")
                 st.write(f"**Test Duration:** {test.get('test_duration', 'N/A')}")
                 st.write(f"**Priority:** {'High' if i < 2 else 'Medium' if i < 4 else 'Low'}")
-
-# Export Functions (Enhanced)
-def generate_comprehensive_report(personas_data, campaigns_data, analysis_data=None):
-    """Generate comprehensive markdown report"""
-    content = "# 🎯 AI Marketing Persona & Campaign Analysis Report\n\n"
-    content += f"**Generated:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
-    content += f"**AI Engine:** Google Gemini Pro\n"
-    content += f"**Analysis Type:** Comprehensive Customer Intelligence\n\n"
-    
-    # Executive Summary
-    content += "## 📊 Executive Summary\n\n"
-    personas_count = len(personas_data.get('personas', [])) if personas_data else 0
-    campaigns_count = len(campaigns_data.get('campaigns', [])) if campaigns_data else 0
-    
-    content += f"This report presents {personas_count} detailed customer personas and {campaigns_count} "
-    content += "strategic marketing campaigns generated through AI analysis of customer research data.\n\n"
-    
-    # Personas Section
-    content += "## 👥 Customer Personas\n\n"
-    if personas_data and 'personas' in personas_data:
-        for i, persona in enumerate(personas_data['personas']):
-            name = persona.get('name', f'Persona {i+1}')
-            tagline = persona.get('tagline', 'Marketing persona')
-            is_refined = persona.get('is_refined', False)
-            
-            content += f"### {name} {'✨ (Refined)' if is_refined else ''}\n"
-            content += f"*{tagline}*\n\n"
-            
-            # Demographics
-            demographics = persona.get('demographics', {})
-            content += "**Demographics:**\n"
-            content += f"- Age: {demographics.get('age_range', 'N/A')}\n"
-            content += f"- Income: {demographics.get('income_range', 'N/A')}\n"
-            content += f"- Education: {demographics.get('education', 'N/A')}\n"
-            content += f"- Location: {demographics.get('location', 'N/A')}\n\n"
-            
-            # Key insights
-            pain_points = persona.get('pain_points', [])
-            if pain_points:
-                content += "**Key Pain Points:**\n"
-                for pain in pain_points[:3]:
-                    content += f"- {pain}\n"
-                content += "\n"
-            
-            goals = persona.get('goals', [])
-            if goals:
-                content += "**Primary Goals:**\n"
-                for goal in goals[:3]:
-                    content += f"- {goal}\n"
-                content += "\n"
-            
-            # Business metrics
-            confidence = persona.get('confidence_score', 0.85)
-            market_size = persona.get('market_size', '25%')
-            content += f"**Business Metrics:** Confidence: {confidence:.0%}, Market Size: {market_size}\n\n"
-            
-            content += "---\n\n"
-    
-    # Campaigns Section
-    content += "## 🚀 Campaign Strategies\n\n"
-    if campaigns_data and 'campaigns' in campaigns_data:
-        for i, campaign in enumerate(campaigns_data['campaigns']):
-            title = campaign.get('title', f'Campaign {i+1}')
-            target = campaign.get('persona_target', 'Target Audience')
-            theme = campaign.get('theme', 'Campaign Theme')
-            roi = campaign.get('predicted_roi', 'N/A')
-            
-            content += f"### {title}\n"
-            content += f"**Target Persona:** {target}\n"
-            content += f"**Campaign Theme:** {theme}\n"
-            content += f"**Expected ROI:** {roi}\n\n"
-            
-            key_message = campaign.get('key_message', '')
-            if key_message:
-                content += f"**Key Message:** {key_message}\n\n"
-            
-            channels = campaign.get('channels', [])
-            if channels:
-                content += f"**Primary Channels:** {', '.join(channels[:4])}\n\n"
             
-            content += "---\n\n"
-    
-    # Recommendations
-    content += "## 💡 Strategic Recommendations\n\n"
-    content += "1. **Persona Refinement:** Continuously gather customer feedback to refine personas\n"
-    content += "2. **A/B Testing:** Test campaign variations to optimize performance\n"
-    content += "3. **Cross-Channel Integration:** Ensure consistent messaging across all channels\n"
-    content += "4. **Performance Monitoring:** Track key metrics and adjust strategies accordingly\n"
-    content += "5. **Personalization:** Use persona insights to create highly targeted content\n\n"
-    
-    content += "---\n"
-    content += "*Report generated by AI Marketing Persona Designer*\n"
-    content += "*Powered by Google Gemini Pro for advanced customer intelligence*"
-    
-    return content
-def generate_persona_insights(personas_data):
-    """Generate smart insights about persona distribution and opportunities"""
-    if not personas_data or 'personas' not in personas_data:
-        return {}
-    
-    insights = {
-        'market_distribution': {},
-        'confidence_analysis': {},
-        'targeting_recommendations': [],
-        'revenue_potential': {}
-    }
-    
-    personas = personas_data['personas']
-    
-    # Market size analysis
-    total_market = 0
-    market_segments = []
-    
-    for persona in personas:
-        market_size = persona.get('market_size', '25%')
-        try:
-            if isinstance(market_size, str):
-                size = float(market_size.replace('%', ''))
-            else:
-                size = float(market_size)
-            market_segments.append(size)
-            total_market += size
-        except:
-            market_segments.append(25.0)
-    
-    insights['market_distribution'] = {
-        'total_addressable': f"{total_market:.1f}%",
-        'largest_segment': max(market_segments),
-        'segment_balance': 'Balanced' if max(market_segments) - min(market_segments) < 20 else 'Unbalanced'
-    }
-    
-    # Confidence analysis
-    confidences = []
-    for persona in personas:
-        conf = persona.get('confidence_score', 0.85)
-        if isinstance(conf, str):
-            try:
-                conf = float(conf.replace('%', '')) / 100
-            except:
-                conf = 0.85
-        confidences.append(conf)
-    
-    insights['confidence_analysis'] = {
-        'average_confidence': sum(confidences) / len(confidences),
-        'highest_confidence': max(confidences),
-        'reliability_score': 'High' if min(confidences) > 0.8 else 'Medium' if min(confidences) > 0.6 else 'Low'
-    }
-    
-    # Targeting recommendations
-    if insights['confidence_analysis']['average_confidence'] > 0.85:
-        insights['targeting_recommendations'].append("🎯 High-confidence personas - ready for immediate campaign launch")
-    
-    if insights['market_distribution']['segment_balance'] == 'Unbalanced':
-        insights['targeting_recommendations'].append("⚖️ Consider focusing on largest segment first for maximum impact")
-    
-    # Revenue potential (simplified estimation)
-    high_value_personas = sum(1 for p in personas if p.get('business_value', '').lower() in ['high', 'very high'])
-    insights['revenue_potential'] = {
-        'high_value_segments': high_value_personas,
-        'revenue_tier': 'Premium' if high_value_personas >= len(personas) / 2 else 'Standard'
-    }
-    
-    return insights
-def validate_and_score_data(customer_data, product_info):
-    """Enhanced data validation with detailed scoring"""
-    if not customer_data and not product_info:
-        return {'customer_data_quality': 0, 'product_detail_quality': 0, 'overall_readiness': 0, 'recommendations': []}
-    scores = {
-        'customer_data_quality': 0,
-        'product_detail_quality': 0,
-        'overall_readiness': 0,
-        'recommendations': []
-    }
-    
-    # Customer data analysis
-    if customer_data:
-        word_count = len(customer_data.split())
-        line_count = len(customer_data.split('\n'))
-        
-        # Check for key indicators
-        has_demographics = any(word in customer_data.lower() for word in ['age', 'income', 'salary', 'years old'])
-        has_pain_points = any(word in customer_data.lower() for word in ['problem', 'issue', 'difficult', 'frustrated', 'need'])
-        has_behaviors = any(word in customer_data.lower() for word in ['use', 'buy', 'prefer', 'like', 'want'])
-        
-        # Scoring
-        scores['customer_data_quality'] = min(100, (
-            (word_count * 0.5) +
-            (line_count * 2) +
-            (has_demographics * 20) +
-            (has_pain_points * 15) +
-            (has_behaviors * 15)
-        ))
-        
-        # Recommendations
-        if word_count < 100:
-            scores['recommendations'].append("Add more detailed customer feedback or interview data")
-        if not has_demographics:
-            scores['recommendations'].append("Include age, income, or occupation information")
-        if not has_pain_points:
-            scores['recommendations'].append("Add customer problems or pain points")
-    
-    # Product info analysis
-    if product_info:
-        word_count = len(product_info.split())
-        has_pricing = any(word in product_info.lower() for word in ['$', 'price', 'cost', 'free', 'premium'])
-        has_features = any(word in product_info.lower() for word in ['feature', 'benefit', 'capability'])
-        has_target = any(word in product_info.lower() for word in ['target', 'customer', 'market'])
-        
-        scores['product_detail_quality'] = min(100, (
-            (word_count * 2) +
-            (has_pricing * 25) +
-            (has_features * 20) +
-            (has_target * 15)
-        ))
-        
-        if word_count < 20:
-            scores['recommendations'].append("Provide more detailed product information")
-        if not has_pricing:
-            scores['recommendations'].append("Include pricing information")
-    
-    scores['overall_readiness'] = (scores['customer_data_quality'] + scores['product_detail_quality']) / 2
+            planned = plan_tests[i] if i < len(plan_tests) else None
+            if planned:
+                st.caption(
+                    f"📐 {planned['sample_size_per_variant']:,} users per variant to detect "
+                    f"{planned['expected_lift']:.0%} lift on a {planned['baseline_rate']:.2%} {planned['metric']} "
+                    f"at ~{planned['daily_traffic']:,.0f}/day | Bayesian power {planned['bayesian_power']:.0%}"
+                )
+                if not planned['fits_campaign']:
+                    st.warning(f"⚠️ Needs {planned['duration_days']} days, longer than the {CAMPAIGN_HORIZON_DAYS}-day campaign")
     
-    return scores
+    power_chart = create_power_curve_chart(plan)
+    if power_chart:
+        st.plotly_chart(power_chart, use_container_width=True, key=f"ab_power_curves_{id(ab_data)}")
+
+@traced('render.display_competitive_analysis')
 def display_competitive_analysis(comp_data):
     """Enhanced competitive analysis display"""
     st.markdown("### 🏢 Competitive Intelligence")
+    display_provenance_badge(comp_data)
     
     landscape = comp_data.get('competitor_landscape', {})
     
@@ -1940,6 +915,114 @@ def display_competitive_analysis(comp_data):
         # Simple scoring based on opportunities
         advantage_score = min(100, len(opportunities) * 20 + len(gaps) * 15)
         st.progress(advantage_score / 100, f"Competitive Advantage: {advantage_score}%")
+
+def diagnostics_enabled() -> bool:
+    """The diagnostics panel is hidden unless ?diagnostics=1 or PERSONA_DESIGNER_DIAGNOSTICS=1"""
+    if os.getenv("PERSONA_DESIGNER_DIAGNOSTICS", "").lower() in ("1", "true", "yes"):
+        return True
+    return st.query_params.get("diagnostics", "").lower() in ("1", "true", "yes")
+
+def display_diagnostics():
+    """Latency percentiles, counters and span export for the current process"""
+    tracer = get_tracer()
+    st.markdown("---")
+    with st.expander("🩺 Diagnostics", expanded=True):
+        summary = tracer.summary()
+        if not summary:
+            st.info("No spans recorded yet.")
+            return
+        
+        counters = dict(tracer.counters)
+        metric_cols = st.columns(4)
+        metric_cols[0].metric("Prompt Tokens", f"{counters.get('tokens.prompt', 0):,.0f}")
+        metric_cols[1].metric("Response Tokens", f"{counters.get('tokens.response', 0):,.0f}")
+        cache_hits, cache_misses = counters.get('artifact_cache.hit', 0), counters.get('artifact_cache.miss', 0)
+        metric_cols[2].metric("Artifact Cache Hit Rate", f"{cache_hits / max(1, cache_hits + cache_misses):.0%}")
+        fallback_status = get_fallback_registry().status()
+        metric_cols[3].metric("Fallbacks", f"{fallback_status['fallbacks']:,}",
+                              f"{fallback_status['fallback_rate']:.0%} of calls", delta_color="inverse")
+        
+        st.markdown("**Latency by span**")
+        st.dataframe(pd.DataFrame(summary), use_container_width=True, hide_index=True)
+        
+        if fallback_status['fallbacks']:
+            st.markdown("**Fallbacks by method and reason**")
+            st.dataframe(pd.DataFrame([
+                {'method': method, 'model': counts['model'],
+                 **{reason: counts['fallback'].get(reason, 0) for reason in FALLBACK_REASONS}}
+                for method, counts in sorted(fallback_status['methods'].items())
+            ]), use_container_width=True, hide_index=True)
+            with st.expander("Last fallback errors"):
+                st.json(fallback_status['last_errors'])
+        
+        with st.expander("Counters"):
+            st.json(counters)
+        
+        recent = list(tracer.spans)[-50:][::-1]
+        with st.expander("Recent spans"):
+            st.dataframe(pd.DataFrame([{
+                'span': span['name'],
+                'duration_ms': span['duration_ms'],
+                'status': span['status'],
+                'attributes': json.dumps(span['attributes'], default=str)
+            } for span in recent]), use_container_width=True, hide_index=True)
+        
+        export_col1, export_col2, export_col3 = st.columns(3)
+        with export_col1:
+            st.download_button(
+                "📥 Spans (JSON Lines)",
+                data=tracer.to_jsonl(),
+                file_name=f"spans_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl",
+                mime="application/x-ndjson"
+            )
+        with export_col2:
+            endpoint = os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT", "http://localhost:4318")
+            if st.button(f"📡 Send to collector ({endpoint})"):
+                try:
+                    st.success(f"Exported {tracer.export_otlp(endpoint)} spans")
+                except Exception as e:
+                    st.error(f"OTLP export failed: {str(e)}")
+        with export_col3:
+            if st.button("🧹 Reset diagnostics"):
+                tracer.reset()
+                get_fallback_registry().reset()
+                st.rerun()
+
+def display_run_history(run_store: RunStore, user_id: str):
+    """Sidebar list of this user's past runs with load and compare"""
+    with st.sidebar.expander("🗂️ Run History"):
+        runs = run_store.list_runs(user_id, limit=25)
+        if not runs:
+            st.caption("Completed analyses are saved here.")
+            return
+        
+        labels = {
+            run['run_id']: (f"{datetime.fromtimestamp(run['created_at']).strftime('%b %d %H:%M')} · "
+                            f"{run['personas_count']} personas · {run['campaigns_count']} campaigns"
+                            f"{' · ⚠️ fallback' if run['has_fallback'] else ''}")
+            for run in runs
+        }
+        run_ids = list(labels)
+        selected = st.selectbox("Run", run_ids, format_func=labels.get, key="history_run")
+        if st.button("📂 Load run", key="history_load"):
+            run = run_store.load(selected)
+            if run is None:
+                st.error("This run no longer exists.")
+            else:
+                apply_run_results({**run, 'stored_run_id': selected})
+                st.rerun()
+        
+        if len(run_ids) > 1:
+            compare_to = st.selectbox("Compare with", [run_id for run_id in run_ids if run_id != selected],
+                                      format_func=labels.get, key="history_compare")
+            if st.button("🔀 Diff runs", key="history_diff"):
+                diff = run_store.diff(compare_to, selected)
+                for section in ('personas', 'campaigns'):
+                    changes = diff[section]
+                    st.markdown(f"**{section.title()}**: {len(changes['added'])} added, "
+                                f"{len(changes['removed'])} removed, {len(changes['changed'])} changed")
+                st.json(diff, expanded=False)
+
 def initialize_session_state():
     session_vars = {
         'analysis_complete': False,
@@ -1950,12 +1033,27 @@ def initialize_session_state():
         'additional_results': {},
         'num_personas_generated': 3,
         'advanced_features': {},
+        'stored_run_id': None,
+        'persona_lineages': [],
+        'campaigns_by_heads': {},
+        'campaigns_stale': False,
+        'results_revision': 0,
+        'export_files': {},
+        'simulations': {},
         'chat_history': []
     }
     
     for var, default_value in session_vars.items():
         if var not in st.session_state:
-            st.session_state[var] = default_value        
+            st.session_state[var] = default_value
+    
+    if st.session_state.get('conversation_memory') is None:
+        st.session_state['conversation_memory'] = ConversationMemory()
+    if st.session_state.get('artifact_store') is None:
+        st.session_state['artifact_store'] = ArtifactStore()
+    if st.session_state.get('persona_versions') is None:
+        st.session_state['persona_versions'] = PersonaVersionStore()
+
 # Main Application (Enhanced)
 def main():
     initialize_session_state()
@@ -1977,6 +1075,11 @@ def main():
         st.error("🚨 AI system initialization failed. Please refresh the page.")
         st.stop()
     
+    fallback_status = get_fallback_registry().status()
+    if fallback_status['alarm_active']:
+        st.error(f"🚨 {fallback_status['recent_fallback_rate']:.0%} of recent AI calls returned fallback data "
+                 f"instead of model output. Results marked ⚠️ are generic defaults, not analysis of your data.")
+    
     # AI Status Display (Enhanced)
     st.sidebar.markdown("### 🤖 AI System Status")
     if ai_engine:
@@ -2010,6 +1113,31 @@ def main():
         enable_competitor_analysis = st.checkbox("Include Competitor Analysis", value=True)
         enable_ab_testing = st.checkbox("Generate A/B Test Ideas", value=True)
         enable_journey_maps = st.checkbox("Create Journey Maps", value=True)
+        enable_prefetch = st.checkbox(
+            "Prefetch Advanced Features",
+            value=True,
+            help="Generate content samples and A/B test ideas for the top campaigns and journey maps for the top personas in the background"
+        )
+        prefetch_budget = st.slider("Prefetch budget (model calls)", min_value=0, max_value=20, value=8, disabled=not enable_prefetch)
+        enable_persona_merge = st.checkbox(
+            "Merge Overlapping Personas",
+            value=True,
+            help="Fold near-duplicate personas together before building campaigns"
+        )
+        merge_threshold = st.slider(
+            "Merge similarity threshold",
+            min_value=0.5, max_value=0.99, value=0.8, step=0.01,
+            disabled=not enable_persona_merge
+        )
+        reuse_stored_runs = st.checkbox(
+            "Reuse Saved Results",
+            value=True,
+            help="Serve identical inputs from your run history instead of calling the model again"
+        )
+    
+    run_store = get_run_store()
+    user_id = current_user_id()
+    display_run_history(run_store, user_id)
     
     # Input Configuration
     st.sidebar.markdown("---")
@@ -2039,7 +1167,7 @@ def main():
             with st.sidebar.expander("📊 Data Preview"):
                 st.dataframe(df.head(3))
         
-            customer_data = df.to_string(max_rows=100)  # Increased limit
+            customer_data = customer_data_from_frame(df)
         
     elif input_method == "📝 Paste Research Data":
         customer_data = st.sidebar.text_area(
@@ -2053,31 +1181,7 @@ def main():
         
         
     else:  # Demo data
-        customer_data = """
-Age 34, Software Engineer, $85k income: "I need tools that save time and integrate well with my existing workflow. Customer service response time is crucial - I can't wait days for support."
-
-Age 42, Teacher, $55k income: "Budget is always a concern with two kids in college. I research thoroughly before buying anything for the family. Value for money is everything."
-
-Age 29, Marketing Manager, $70k income: "I love trying new products, especially if they're innovative and trending. Social proof is important - I check reviews and what influencers are saying."
-
-Age 51, Business Owner, $120k income: "Quality is non-negotiable for my business. I'm willing to pay premium for excellent products and white-glove service."
-
-Review: "Great product quality but wish the onboarding was simpler. Support team was helpful though - they walked me through everything."
-
-Survey Response: "Price is reasonable for the value provided. My family uses this daily now. Kids love the user interface."
-
-Interview: "As a busy professional, I appreciate products that respect my time. The interface is intuitive and I was productive immediately."
-
-Feedback: "Love the premium features, but would like more customization options for power users like myself."
-
-Age 38, Nurse, $65k income: "Healthcare worker here - I need reliable, professional-grade solutions I can trust during critical moments."
-
-Review: "Excellent ROI and my team's productivity improved significantly. The analytics dashboard is incredibly helpful for tracking performance."
-
-Age 26, Freelancer, $45k income: "As a freelancer, I need affordable solutions that help me compete with bigger agencies. Automation features are game-changers."
-
-Survey: "The mobile app is fantastic - I can manage everything on the go between client meetings."
-        """
+        customer_data = DEMO_CUSTOMER_DATA
         st.sidebar.info("🎯 Using comprehensive demo dataset")
     
     # Product information
@@ -2086,7 +1190,7 @@ Survey: "The mobile app is fantastic - I can manage everything on the go between
         height=120,
         placeholder="Describe your product, target market, unique value proposition, pricing, key features...",
         help="Provide context about what you're marketing",
-        value="AI-powered productivity platform that helps businesses automate workflows, integrate tools, and boost team efficiency. Starting at $29/month with premium tiers up to $299/month. Key features include smart automation, analytics dashboard, mobile app, and 24/7 support."
+        value=DEMO_PRODUCT_INFO
     )
     if customer_data and product_info:
         validation = validate_and_score_data(customer_data, product_info)
@@ -2099,6 +1203,13 @@ Survey: "The mobile app is fantastic - I can manage everything on the go between
         else:
             st.sidebar.error(f"❌ More data needed ({score:.0f}%)")
         
+        sentiment = score_review_sentiment(customer_data)
+        if sentiment['reviews']:
+            st.sidebar.caption(
+                f"💬 Feedback sentiment across {sentiment['reviews']} lines: "
+                f"{sentiment['positive_share']:.0%} positive · {sentiment['negative_share']:.0%} negative"
+            )
+        
         if validation['recommendations']:
             with st.sidebar.expander("💡 Data Improvement Tips"):
                 for rec in validation['recommendations'][:3]:
@@ -2178,74 +1289,67 @@ Survey: "The mobile app is fantastic - I can manage everything on the go between
             ):
                 
                 # Enhanced progress tracking
-                progress_steps = [
-                    ("🔍 Analyzing customer data patterns...", 15),
-                    ("🧠 Extracting behavioral insights...", 25),
-                    ("🎭 Creating detailed personas...", 40),
-                    ("🚀 Building campaign strategies...", 55),
-                    ("📊 Calculating performance metrics...", 70),
-                    ("🔬 Generating advanced insights...", 85),
-                    ("✅ Finalizing comprehensive analysis...", 100)
-                ]
+                stage_progress = {
+                    'analysis': ("🎭 Creating detailed personas...", 25),
+                    'personas': ("🚀 Building campaign strategies...", 40),
+                    'campaigns': ("🔬 Generating advanced insights...", 55),
+                    'competitor_analysis': ("🔬 Generating advanced insights...", 70),
+                    'ab_tests': ("✅ Finalizing comprehensive analysis...", 85)
+                }
 
                 progress_container = st.container()
                 with progress_container:
                     progress_bar = st.progress(0)
                     status_text = st.empty()
-    
-                    for step_text, step_progress in progress_steps:
+                    status_text.markdown("**🔍 Analyzing customer data patterns...**")
+                    progress_bar.progress(15)
+                    
+                    def on_stage(stage, error):
+                        if error is not None:
+                            st.error(f"🚨 Analysis failed at the {stage.replace('_', ' ')} stage: {str(error)}")
+                            st.info("💡 Using fallback data to continue...")
+                        step_text, step_progress = stage_progress[stage]
                         status_text.markdown(f"**{step_text}**")
                         progress_bar.progress(step_progress)
-                        time.sleep(0.1)  # Realistic timing
-        
-        # Execute actual AI operations at specific steps
-                        try:
-                            if step_progress == 25:
-                                with st.spinner("🔍 Analyzing customer patterns..."):
-                                    analysis_results = ai_engine.analyze_customer_data(customer_data, product_info)
-                            elif step_progress == 40:
-                                with st.spinner("🎭 Creating personas..."):
-                                    personas_results = ai_engine.create_personas(analysis_results, num_personas)
-                            elif step_progress == 55:
-                                with st.spinner("🚀 Building campaigns..."):
-                                    campaigns_results = ai_engine.create_campaigns(personas_results)
-                            elif step_progress == 85:
-                                with st.spinner("🔬 Advanced insights..."):
-                                    additional_results = {}
-                                    if enable_competitor_analysis:
-                                        additional_results['competitor_analysis'] = ai_engine.generate_competitor_analysis(personas_results)
-                                    if enable_ab_testing and campaigns_results:
-                                        additional_results['ab_tests'] = ai_engine.generate_ab_test_ideas(campaigns_results['campaigns'][0])
-                        except Exception as e:
-                            st.error(f"🚨 Analysis failed at step {step_progress}%: {str(e)}")
-                            st.info("💡 Using fallback data to continue...")
-                            # Provide fallback data
-                            if step_progress == 25:
-                                analysis_results = ai_engine._get_fallback_analysis()
-                            elif step_progress == 40:
-                                personas_results = ai_engine._get_fallback_personas(num_personas)
-                            elif step_progress == 55:
-                                campaigns_results = ai_engine._get_fallback_campaigns()
-                            elif step_progress == 85:
-                                additional_results = {}
+                    
+                    pipeline_results = run_pipeline(
+                        ai_engine,
+                        customer_data,
+                        product_info,
+                        num_personas,
+                        options={
+                            'competitor_analysis': enable_competitor_analysis,
+                            'ab_testing': enable_ab_testing,
+                            'journey_maps': enable_journey_maps,
+                            'merge_personas': enable_persona_merge,
+                            'merge_threshold': merge_threshold
+                        },
+                        on_stage=on_stage,
+                        run_store=run_store,
+                        user_id=user_id,
+                        reuse_stored=reuse_stored_runs
+                    )
+                    personas_results = pipeline_results['personas']
+                    campaigns_results = pipeline_results['campaigns']
+                    persona_merges = pipeline_results['persona_merges']
+                    status_text.markdown("**✅ Finalizing comprehensive analysis...**")
+                    progress_bar.progress(100)
                     
                     # Store results in session state
-                    st.session_state['analysis_complete'] = True
-                    st.session_state['analysis_timestamp'] = datetime.now()
-                    st.session_state['personas_data'] = personas_results
-                    st.session_state['campaigns_data'] = campaigns_results
-                    st.session_state['analysis_data'] = analysis_results
-                    st.session_state['additional_results'] = additional_results
-                    st.session_state['num_personas_generated'] = num_personas
-                    st.session_state['advanced_features'] = {
-                        'competitor_analysis': enable_competitor_analysis,
-                        'ab_testing': enable_ab_testing,
-                        'journey_maps': enable_journey_maps
-                    }
+                    apply_run_results(pipeline_results)
+                    if pipeline_results['served_from_store']:
+                        st.info("🗂️ Loaded saved results for identical inputs from your run history. "
+                                "Untick \"Reuse Saved Results\" to regenerate.")
+                    
+                    # Warm the Advanced Features cache while the user reviews results
+                    if enable_prefetch and prefetch_budget > 0:
+                        start_artifact_prefetch(ai_engine, personas_results, campaigns_results, prefetch_budget)
                     
                     # Success notification
                     st.balloons()
-                    st.success(f"🎉 AI has successfully generated {num_personas} personas with advanced insights!")
+                    st.success(f"🎉 AI has successfully generated {st.session_state['num_personas_generated']} personas with advanced insights!")
+                    for group in persona_merges:
+                        st.info(f"🧬 Merged overlapping personas: {' + '.join(group)}")
                     
     
     # Results Display Section (Enhanced)
@@ -2290,6 +1394,49 @@ Survey: "The mobile app is fantastic - I can manage everything on the go between
             roi_chart = create_roi_comparison_chart(campaigns_data)
             if roi_chart:
                 st.plotly_chart(roi_chart, use_container_width=True, key="campaigns_roi_chart")
+            
+            # Budget optimizer: re-solves on every slider move
+            if campaigns_data and campaigns_data.get('campaigns'):
+                st.markdown("### 💰 Budget Optimizer")
+                budget_col1, budget_col2 = st.columns([3, 1])
+                with budget_col1:
+                    total_budget = st.slider(
+                        "Total marketing budget ($)",
+                        min_value=5000,
+                        max_value=500000,
+                        value=50000,
+                        step=5000,
+                        key="optimizer_total_budget"
+                    )
+                with budget_col2:
+                    hold_back = st.checkbox(
+                        "Hold back unprofitable spend",
+                        value=False,
+                        help="Stop allocating once the next dollar returns less than a dollar",
+                        key="optimizer_hold_back"
+                    )
+                
+                budget_problem = build_budget_problem(campaigns_data)
+                allocation = optimize_budget_allocation(campaigns_data, total_budget, hold_back, problem=budget_problem)
+                
+                if allocation:
+                    metric_col1, metric_col2, metric_col3, metric_col4 = st.columns(4)
+                    metric_col1.metric("Expected Revenue", f"${allocation['expected_revenue']:,.0f}")
+                    metric_col2.metric("Blended ROI", f"{allocation['expected_roi']:.2f}x")
+                    metric_col3.metric("Marginal ROI", f"{allocation['marginal_roi']:.2f}x")
+                    metric_col4.metric("Unallocated", f"${allocation['unallocated']:,.0f}")
+                    st.caption(f"⚡ Solved in {allocation['solve_ms']:.1f} ms")
+                    
+                    chart_col1, chart_col2 = st.columns(2)
+                    with chart_col1:
+                        allocation_chart = create_budget_allocation_chart(allocation)
+                        if allocation_chart:
+                            st.plotly_chart(allocation_chart, use_container_width=True, key="budget_allocation_chart")
+                    with chart_col2:
+                        frontier = budget_frontier(campaigns_data, list(range(5000, 500001, 5000)), problem=budget_problem)
+                        frontier_chart = create_budget_frontier_chart(frontier, total_budget)
+                        if frontier_chart:
+                            st.plotly_chart(frontier_chart, use_container_width=True, key="budget_frontier_chart")
         
         # Tab 3: Analytics Dashboard
         # Tab 3: Enhanced Analytics Dashboard
@@ -2347,6 +1494,13 @@ Survey: "The mobile app is fantastic - I can manage everything on the go between
                     for rec in smart_insights['targeting_recommendations']:
                         st.success(rec)
     
+            # Persona overlap
+            similarity_chart = create_persona_similarity_heatmap(personas_data)
+            if similarity_chart:
+                st.plotly_chart(similarity_chart, use_container_width=True, key="analytics_similarity_chart")
+            for group in st.session_state.get('persona_merges', []):
+                st.caption(f"🧬 Merged before campaign generation: {' + '.join(group)}")
+    
     # Rest of existing analytics code...
             
             # Additional Analytics
@@ -2426,9 +1580,9 @@ Survey: "The mobile app is fantastic - I can manage everything on the go between
                     st.metric("Confidence Score", f"{confidence:.0%}")
                     st.metric("Market Size", selected_persona.get('market_size', 'N/A'))
                     
-                    if is_refined:
-                        refinement_count = len(selected_persona.get('refinement_history', []))
-                        st.metric("Refinements", refinement_count)
+                    lineage = persona_lineage(selected_persona_idx)
+                    if is_refined and lineage is not None:
+                        st.metric("Refinements", st.session_state['persona_versions'].refinement_count(lineage))
                 
                 # Refinement interface
                 st.markdown("### 🎯 Provide Refinement Feedback")
@@ -2481,12 +1635,21 @@ Survey: "The mobile app is fantastic - I can manage everything on the go between
                                     if ai_engine:
                                         # Perform refinement
                                         refined_persona = ai_engine.refine_persona(selected_persona, feedback_text)
+                                        if is_fallback(refined_persona):
+                                            # The engine hands back a copy of the original persona when the model call fails
+                                            st.error("Refinement failed: the AI model did not return an updated persona. The original persona was kept.")
+                                            st.stop()
                                         
-                                        # Update the persona in session state
-                                        st.session_state['personas_data']['personas'][selected_persona_idx] = refined_persona
+                                        # Regenerate campaigns with refined personas, then record the new version
+                                        refined_personas_data = {**st.session_state['personas_data'],
+                                                                 'personas': list(st.session_state['personas_data']['personas'])}
+                                        refined_personas_data['personas'][selected_persona_idx] = refined_persona
+                                        commit_persona_refinement(selected_persona_idx, refined_persona, feedback_text,
+                                                                  ai_engine.create_campaigns(refined_personas_data))
                                         
-                                        # Regenerate campaigns with refined personas
-                                        st.session_state['campaigns_data'] = ai_engine.create_campaigns(st.session_state['personas_data'])
+                                        # Cached artifacts for unchanged inputs stay valid; prefetch the new ones
+                                        if st.session_state.get('artifact_prefetcher') is not None:
+                                            start_artifact_prefetch(ai_engine, st.session_state['personas_data'], st.session_state['campaigns_data'], st.session_state['artifact_prefetcher'].max_calls)
                                         
                                         # Success notification
                                         st.success("✅ Persona successfully refined!")
@@ -2509,21 +1672,45 @@ Survey: "The mobile app is fantastic - I can manage everything on the go between
                             st.warning("Please provide feedback before refining.")
                 
                 # Refinement history
-                if selected_persona.get('refinement_history'):
+                if st.session_state.get('campaigns_stale'):
+                    st.warning("⚠️ Campaigns were built from a different version of your personas.")
+                    if st.button("🚀 Rebuild Campaigns", key="rebuild_campaigns"):
+                        ai_engine = initialize_ai_engine()
+                        if ai_engine:
+                            with st.spinner("🤖 Rebuilding campaigns for the current personas..."):
+                                campaigns_data = ai_engine.create_campaigns(st.session_state['personas_data'])
+                            st.session_state['campaigns_by_heads'][st.session_state['persona_versions'].heads()] = campaigns_data
+                            st.session_state['campaigns_data'] = campaigns_data
+                            st.session_state['campaigns_stale'] = False
+                            mark_results_changed()
+                            st.rerun()
+                
+                history = persona_version_history(selected_persona_idx)
+                if history:
                     st.markdown("### 📚 Refinement History")
                     
-                    with st.expander("View Previous Refinements"):
-                        for i, entry in enumerate(selected_persona['refinement_history']):
-                            timestamp = entry.get('timestamp', 'Unknown time')
-                            if 'T' in timestamp:
-                                try:
-                                    dt = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
-                                    timestamp = dt.strftime('%m/%d/%Y %H:%M')
-                                except:
-                                    pass
+                    with st.expander("View Versions", expanded=True):
+                        for entry in reversed(history):
+                            timestamp = entry['created_at']
+                            try:
+                                timestamp = datetime.fromisoformat(timestamp).strftime('%m/%d/%Y %H:%M')
+                            except ValueError:
+                                pass
                             
-                            st.markdown(f"**Refinement #{i+1}** - {timestamp}")
-                            st.write(f"*Feedback:* {entry.get('feedback', 'No feedback recorded')}")
+                            version_col, action_col = st.columns([4, 1])
+                            with version_col:
+                                label = "Original" if entry['parent'] is None else f"Refinement #{entry['version']}"
+                                current = " · **current**" if entry['is_head'] else ""
+                                st.markdown(f"**{label}** - {timestamp}{current}")
+                                if entry['feedback']:
+                                    st.write(f"*Feedback:* {entry['feedback']}")
+                                if entry['changed_fields']:
+                                    st.caption(f"Changed: {', '.join(entry['changed_fields'])}")
+                            with action_col:
+                                if not entry['is_head'] and st.button("↩️ Restore", key=f"restore_{selected_persona_idx}_{entry['version']}",
+                                                                      help="Switch back to this version without calling the AI model"):
+                                    rollback_persona(selected_persona_idx, entry['version'])
+                                    st.rerun()
                             st.markdown("---")
             
             else:
@@ -2578,11 +1765,18 @@ Survey: "The mobile app is fantastic - I can manage everything on the go between
                                     'analysis_data': st.session_state.get('analysis_data')
                                 }
                                 
-                                answer = ai_engine.answer_query(user_query, context)
+                                memory = st.session_state['conversation_memory']
+                                answer = ai_engine.answer_query(user_query, context, memory)
                                 
                                 st.markdown("### 💡 AI Assistant Response:")
                                 st.markdown(answer)
                                 
+                                # Remember the exchange and compress older turns in the background
+                                memory.add_turn(user_query, answer)
+                                memory.summarize_async(ai_engine)
+                                st.session_state['chat_history'].append((user_query, answer))
+                                del st.session_state['chat_history'][:-MAX_CHAT_HISTORY]
+                                
                             else:
                                 st.error("AI Assistant temporarily unavailable.")
                         
@@ -2602,6 +1796,15 @@ Survey: "The mobile app is fantastic - I can manage everything on the go between
                     with st.expander(f"Q: {q[:50]}..."):
                         st.markdown(f"**Q:** {q}")
                         st.markdown(f"**A:** {a[:200]}...")
+                
+                memory = st.session_state['conversation_memory']
+                with st.expander("🧠 Conversation Memory"):
+                    st.caption(f"Context sent with follow-ups (~{_estimate_tokens(memory.build_context())} of {memory.token_budget} tokens)")
+                    st.write(memory.summary or "No older turns summarized yet.")
+                    if st.button("🧹 Clear Conversation", key="clear_conversation"):
+                        memory.clear()
+                        st.session_state['chat_history'] = []
+                        st.rerun()
         
         # Tab 6: Content Generator
         with tabs[5]:
@@ -2642,68 +1845,116 @@ Survey: "The mobile app is fantastic - I can manage everything on the go between
                         key="content_type_selector"
                     )
                 
+                artifact_store = st.session_state['artifact_store']
+                
                 with col2:
                     if st.button("🎨 Generate Content", type="primary"):
                         with st.spinner("🤖 Creating engaging content..."):
                             try:
                                 ai_engine = initialize_ai_engine()
                                 if ai_engine:
-                                    content_samples = ai_engine.generate_content_sample(selected_campaign)
-                                    
+                                    get_artifact(ai_engine, 'content_sample', selected_campaign)
                                     st.success("✅ Content generated successfully!")
-                                    display_content_samples(content_samples)
                                     
                                 else:
                                     st.error("Content generator temporarily unavailable.")
                             
                             except Exception as e:
                                 st.error(f"Content generation failed: {str(e)}")
+                    
+                    if st.button("⚡ Generate for All Campaigns", help="Generate content for every campaign concurrently"):
+                        ai_engine = initialize_ai_engine()
+                        if ai_engine:
+                            campaigns = campaigns_data['campaigns']
+                            status_lines = [st.empty() for _ in campaigns]
+                            for i, title in enumerate(campaign_titles):
+                                status_lines[i].write(f"⏳ {title}")
+                            
+                            status_icons = {'cached': '♻️', 'done': '✅', 'fallback': '⚠️', 'failed': '❌'}
+                            for i, status, _ in generate_artifacts_batch(ai_engine, artifact_store, 'content_sample', campaigns):
+                                status_lines[i].write(f"{status_icons[status]} {campaign_titles[i]} ({status})")
+                        else:
+                            st.error("Content generator temporarily unavailable.")
+                
+                # Show stored content for the selected campaign; switching campaigns is instant once generated
+                content_samples = artifact_store.peek('content_sample', selected_campaign)
+                if content_samples:
+                    display_content_samples(content_samples)
+                
+                content_bundle = {
+                    title: artifact_store.peek('content_sample', campaign)
+                    for title, campaign in zip(campaign_titles, campaigns_data['campaigns'])
+                }
+                content_bundle = {title: sample for title, sample in content_bundle.items() if sample}
+                if content_bundle:
+                    st.download_button(
+                        label=f"📦 Download Content Bundle ({len(content_bundle)}/{len(campaign_titles)} campaigns)",
+                        data=json.dumps(content_bundle, indent=2, default=str),
+                        file_name=f"content_bundle_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
+                        mime="application/json",
+                        key="content_bundle_download"
+                    )
                 
                 # Advanced content features
                 st.markdown("---")
                 st.markdown("### 🚀 Advanced Content Features")
                 
+                prefetcher = st.session_state.get('artifact_prefetcher')
+                if prefetcher is not None and prefetcher.planned:
+                    state = "running" if prefetcher.is_running else "idle"
+                    st.caption(f"⚡ Prefetch {state}: {prefetcher.completed}/{prefetcher.planned} artifacts ready ({prefetcher.calls_made}/{prefetcher.max_calls} model calls used)")
+                
                 col1, col2, col3 = st.columns(3)
                 
                 with col1:
-                    if st.button("🗺️ Generate Journey Map"):
-                        with st.spinner("Creating customer journey map..."):
+                    if st.button("🗺️ Generate Journey Maps"):
+                        with st.spinner("Creating customer journey maps for every persona..."):
                             try:
                                 ai_engine = initialize_ai_engine()
                                 if ai_engine and st.session_state.get('personas_data'):
-                                    # Use first persona for journey map
-                                    persona_for_map = st.session_state['personas_data']['personas'][0]
-                                    journey_data = ai_engine.generate_journey_map(persona_for_map)
-                                    
-                                    st.success("✅ Journey map created!")
-                                    
-                                    journey_chart = create_journey_map_chart(journey_data)
-                                    if journey_chart:
-                                        st.plotly_chart(journey_chart, use_container_width=True, key="content_journey_chart")
-                                    
-                                    # Display journey stages
-                                    st.markdown("#### 🗺️ Customer Journey Stages")
-                                    stages = journey_data.get('journey_map', [])
-                                    
-                                    for stage in stages:
-                                        with st.expander(f"{stage.get('stage', 'Stage')} - {', '.join(stage.get('emotions', []))}"):
-                                            st.write(f"**Touchpoints:** {', '.join(stage.get('touchpoints', []))}")
-                                            st.write(f"**Pain Points:** {', '.join(stage.get('pain_points', []))}")
-                                            st.write(f"**Opportunities:** {', '.join(stage.get('opportunities', []))}")
-                                            st.write(f"**Recommended Actions:** {', '.join(stage.get('actions', []))}")
+                                    # Pause background prefetching while the user waits on these maps
+                                    prefetcher = st.session_state.get('artifact_prefetcher')
+                                    with prefetcher.foreground() if prefetcher is not None else nullcontext():
+                                        ai_engine.generate_journey_map(
+                                            st.session_state['personas_data'],
+                                            store=st.session_state['artifact_store']
+                                        )
+                                    st.session_state['show_journey_maps'] = True
+                                    st.success("✅ Journey maps created!")
                                 
                             except Exception as e:
                                 st.error(f"Journey map generation failed: {str(e)}")
                 
                 with col2:
+                    simulation_budget = st.number_input(
+                        "Simulation budget ($)",
+                        min_value=1000,
+                        max_value=5000000,
+                        value=int(SIMULATION_DEFAULTS['total_budget']),
+                        step=1000,
+                        key="simulation_budget"
+                    )
+                    use_model_priors = st.checkbox(
+                        "Use AI-proposed funnel priors",
+                        value=False,
+                        help="Ask the model for channel CPM and conversion-rate priors (one extra model call)",
+                        key="simulation_model_priors"
+                    )
                     if st.button("📊 Simulate Performance"):
                         with st.spinner("Running performance simulation..."):
                             try:
                                 ai_engine = initialize_ai_engine()
                                 if ai_engine:
-                                    sim_data = ai_engine.simulate_performance(selected_campaign)
+                                    sim_data = ai_engine.simulate_performance(
+                                        selected_campaign,
+                                        use_model_priors=use_model_priors,
+                                        total_budget=float(simulation_budget)
+                                    )
                                     
-                                    st.success("✅ Performance simulation complete!")
+                                    # Kept per campaign for the table export
+                                    st.session_state['simulations'][selected_campaign_title] = sim_data
+                                    simulation_info = sim_data.get('simulation', {})
+                                    st.success(f"✅ {simulation_info.get('trials', 0):,} trials simulated in {simulation_info.get('runtime_ms', 0):.0f} ms")
                                     display_performance_simulation(sim_data)
                                 
                             except Exception as e:
@@ -2715,7 +1966,7 @@ Survey: "The mobile app is fantastic - I can manage everything on the go between
                             try:
                                 ai_engine = initialize_ai_engine()
                                 if ai_engine:
-                                    ab_data = ai_engine.generate_ab_test_ideas(selected_campaign)
+                                    ab_data = get_artifact(ai_engine, 'ab_tests', selected_campaign)
                                     
                                     st.success("✅ A/B test ideas generated!")
                                     display_ab_test_ideas(ab_data)
@@ -2723,6 +1974,38 @@ Survey: "The mobile app is fantastic - I can manage everything on the go between
                             except Exception as e:
                                 st.error(f"A/B test generation failed: {str(e)}")
                 
+                # Journey maps are rendered full-width, straight from the per-persona cache
+                personas = (st.session_state.get('personas_data') or {}).get('personas', [])
+                if st.session_state.get('show_journey_maps') and personas:
+                    artifact_store = st.session_state['artifact_store']
+                    journey_artifacts = [artifact_store.peek('journey_map', persona) or {} for persona in personas]
+                    journey_maps = [
+                        {
+                            'persona': persona.get('name', f'Persona {i+1}'),
+                            'journey_map': journey.get('journey_map', [])
+                        }
+                        for i, (persona, journey) in enumerate(zip(personas, journey_artifacts))
+                    ]
+                    
+                    journey_chart = create_journey_map_chart({'journey_maps': journey_maps})
+                    if journey_chart:
+                        st.plotly_chart(journey_chart, use_container_width=True, key="content_journey_chart")
+                    
+                    # Display journey stages
+                    st.markdown("#### 🗺️ Customer Journey Stages")
+                    journey_tabs = st.tabs([j['persona'] for j in journey_maps])
+                    for journey_tab, journey, artifact in zip(journey_tabs, journey_maps, journey_artifacts):
+                        with journey_tab:
+                            display_provenance_badge(artifact)
+                            if not journey['journey_map']:
+                                st.info("Journey map not generated yet for this persona.")
+                            for stage in journey['journey_map']:
+                                with st.expander(f"{stage.get('stage', 'Stage')} - {', '.join(stage.get('emotions', []))}"):
+                                    st.write(f"**Touchpoints:** {', '.join(stage.get('touchpoints', []))}")
+                                    st.write(f"**Pain Points:** {', '.join(stage.get('pain_points', []))}")
+                                    st.write(f"**Opportunities:** {', '.join(stage.get('opportunities', []))}")
+                                    st.write(f"**Recommended Actions:** {', '.join(stage.get('actions', []))}")
+                
             else:
                 st.info("👆 Generate campaigns first to enable content generation.")
         
@@ -2735,51 +2018,66 @@ Survey: "The mobile app is fantastic - I can manage everything on the go between
             
             with export_col1:
                 st.markdown("#### 📄 Comprehensive Report")
+                report_format = st.selectbox(
+                    "Report format:",
+                    list(REPORT_FORMAT_LABELS),
+                    format_func=REPORT_FORMAT_LABELS.get,
+                    key="report_format"
+                )
                 if st.button("📋 Generate Report", use_container_width=True):
                     personas_data = st.session_state.get('personas_data', {})
                     campaigns_data = st.session_state.get('campaigns_data', {})
                     analysis_data = st.session_state.get('analysis_data', {})
                     
-                    report_content = generate_comprehensive_report(personas_data, campaigns_data, analysis_data)
+                    # Unchanged results are served from the report cache instead of being re-rendered
+                    report_content = render_report(personas_data, campaigns_data, analysis_data, report_format)
+                    renderer = REPORT_FORMATS[report_format]()
                     
                     st.download_button(
                         label="📥 Download Comprehensive Report",
                         data=report_content.encode('utf-8'),
-                        file_name=f"ai_marketing_analysis_{datetime.now().strftime('%Y%m%d_%H%M%S')}.md",
-                        mime="text/markdown",
-                        help="Download detailed analysis report in Markdown format"
+                        file_name=f"ai_marketing_analysis_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{renderer.extension}",
+                        mime=renderer.mime,
+                        help=f"Download detailed analysis report as {REPORT_FORMAT_LABELS[report_format]}"
                     )
+                    if report_format == 'print_html':
+                        st.caption("Open the file in a browser and use Print → Save as PDF.")
                     st.success("📊 Comprehensive report ready for download!")
             
             with export_col2:
                 st.markdown("#### 📊 Data Export")
+                export_format = st.selectbox(
+                    "Data format:",
+                    list(EXPORT_FORMAT_LABELS),
+                    format_func=EXPORT_FORMAT_LABELS.get,
+                    key="export_format"
+                )
                 if st.button("💾 Export Data", use_container_width=True):
-                    # Create comprehensive JSON export
-                    export_data = {
-                        "metadata": {
-                            "generated_at": datetime.now().isoformat(),
-                            "ai_engine": "Google Gemini Pro",
-                            "version": "2.0",
-                            "personas_count": len(st.session_state.get('personas_data', {}).get('personas', [])),
-                            "campaigns_count": len(st.session_state.get('campaigns_data', {}).get('campaigns', []))
-                        },
-                        "analysis": st.session_state.get('analysis_data', {}),
-                        "personas": st.session_state.get('personas_data', {}),
-                        "campaigns": st.session_state.get('campaigns_data', {}),
-                        "additional_insights": st.session_state.get('additional_results', {}),
-                        "configuration": st.session_state.get('advanced_features', {})
-                    }
-                    
-                    json_str = json.dumps(export_data, indent=2, default=str)
-                    
-                    st.download_button(
-                        label="📥 Download Full Data (JSON)",
-                        data=json_str,
-                        file_name=f"marketing_intelligence_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
-                        mime="application/json",
-                        help="Download complete analysis data in JSON format"
-                    )
+                    # Written to a temp file once per version of the results, then served from disk
+                    extension, mime = JSON_EXPORT_FORMATS[export_format]
+                    with open(session_export_file(export_format), 'rb') as export_file:
+                        st.download_button(
+                            label=f"📥 Download Full Data ({EXPORT_FORMAT_LABELS[export_format]})",
+                            data=export_file,
+                            file_name=f"marketing_intelligence_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{extension}",
+                            mime=mime,
+                            help="Download complete analysis data"
+                        )
                     st.success("💾 Complete dataset ready for download!")
+                
+                if st.button("🗃️ Export Tables", use_container_width=True,
+                             help="Personas, campaigns, channel allocations and simulations as typed tables for BI tools"):
+                    table_format = resolve_table_format()
+                    with open(session_tables_file(), 'rb') as tables_file:
+                        st.download_button(
+                            label=f"📥 Download Tables ({table_format.upper()})",
+                            data=tables_file,
+                            file_name=f"marketing_tables_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip",
+                            mime="application/zip",
+                            help=f"One {table_format} file per table: {', '.join(TABLE_NAMES)}"
+                        )
+                    if table_format == 'csv':
+                        st.caption("Install pyarrow to get Parquet files with column types preserved.")
             
             with export_col3:
                 st.markdown("#### 🔗 Share Results")
@@ -2895,6 +2193,9 @@ Survey: "The mobile app is fantastic - I can manage everything on the go between
             
             with st.expander("📋 Technical Summary (JSON)"):
                 st.json(summary_data)
+    
+    if diagnostics_enabled():
+        display_diagnostics()
 
     # Enhanced Footer
     # Enhanced Footer - COMPLETELY FIXED
@@ -2952,4 +2253,4 @@ if __name__ == "__main__":
                 st.session_state[var] = None
     
     main()
-                
\ No newline at end of file
+                
@@ -0,0 +1,143 @@
+"""Cold-start benchmark: how long a fresh interpreter takes to import the app and its entry points.
+
+    python benchmarks/bench_import.py
+    python benchmarks/bench_import.py --compare HEAD~1 --repeats 10 --output bench_import.json
+
+Each target is imported in a new `python -c` process, `--repeats` times; wall time includes
+interpreter start-up. One extra `-X importtime` run per target breaks the time down by
+top-level package and records which heavy optional modules were loaded. With `--compare REV`
+the same targets are measured on a `git archive` export of REV for a before/after table.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tarfile
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TARGETS = {
+    'persona_designer': 'import persona_designer',
+    'app': 'import app',
+    'cli': 'import cli',
+    'server': 'import server'
+}
+
+# Modules the app can defer until a code path needs them
+HEAVY_MODULES = ['pandas', 'plotly.express', 'plotly.subplots', 'google.generativeai', 'requests']
+
+
+def run_import(statement: str, cwd: str, importtime: bool = False) -> subprocess.CompletedProcess:
+    command = [sys.executable] + (['-X', 'importtime'] if importtime else []) + ['-c', statement]
+    return subprocess.run(command, cwd=cwd, capture_output=True, text=True, check=True)
+
+
+def parse_importtime(stderr: str) -> dict:
+    """Self import time in microseconds per top-level package from `-X importtime` output"""
+    packages = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        self_us, _, name = line[len('import time:'):].split('|')
+        if self_us.strip().isdigit():
+            package = name.strip().split('.')[0]
+            packages[package] = packages.get(package, 0) + int(self_us)
+    return packages
+
+
+def measure(statement: str, cwd: str, repeats: int) -> dict:
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        run_import(statement, cwd)
+        timings.append((time.perf_counter() - started) * 1000)
+
+    loaded = run_import(f"{statement}; import sys; print(' '.join(sorted(sys.modules)))", cwd).stdout.split()
+    packages = parse_importtime(run_import(statement, cwd, importtime=True).stderr)
+    top = sorted(packages.items(), key=lambda item: item[1], reverse=True)[:10]
+    return {
+        'median_ms': round(statistics.median(timings), 1),
+        'min_ms': round(min(timings), 1),
+        'heavy_modules_loaded': [name for name in HEAVY_MODULES if name in loaded],
+        'top_packages_ms': {name: round(us / 1000, 1) for name, us in top}
+    }
+
+
+def export_revision(revision: str, workdir: str) -> str:
+    """Extract the tree at `revision` into workdir and return its path"""
+    archive = subprocess.run(['git', 'archive', '--format=tar', revision], cwd=REPO_ROOT,
+                             capture_output=True, check=True).stdout
+    path = os.path.join(workdir, revision.replace('/', '_').replace('~', '-').replace('^', '-'))
+    archive_path = path + '.tar'
+    with open(archive_path, 'wb') as f:
+        f.write(archive)
+    with tarfile.open(archive_path) as tar:
+        tar.extractall(path)
+    return path
+
+
+def git_revision(revision: str = 'HEAD') -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', revision], cwd=REPO_ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Measure cold-start import time of the app and its entry points")
+    parser.add_argument('--targets', nargs='+', choices=list(TARGETS), default=list(TARGETS))
+    parser.add_argument('--repeats', type=int, default=5, help="Fresh-interpreter imports per target")
+    parser.add_argument('--compare', default=None, metavar='REV', help="Also measure this git revision (e.g. HEAD~1)")
+    parser.add_argument('--output', default='bench_import.json', help="JSON results path ('-' for stdout)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    trees = {'working_tree': REPO_ROOT}
+    with tempfile.TemporaryDirectory(prefix='persona-import-') as workdir:
+        if args.compare:
+            trees[args.compare] = export_revision(args.compare, workdir)
+
+        results = {}
+        for label, path in trees.items():
+            results[label] = {}
+            for target in args.targets:
+                results[label][target] = measure(TARGETS[target], path, args.repeats)
+                print(f"{label:>14} {target:>7}: median {results[label][target]['median_ms']:.0f} ms, "
+                      f"heavy modules: {', '.join(results[label][target]['heavy_modules_loaded']) or 'none'}",
+                      file=sys.stderr)
+
+    report = {
+        'benchmark': 'import',
+        'generated_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'git_revision': git_revision(),
+        'compare_revision': git_revision(args.compare) if args.compare else None,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'repeats': args.repeats,
+        'results': results
+    }
+    if args.compare:
+        report['speedup'] = {
+            target: round(results[args.compare][target]['median_ms'] / results['working_tree'][target]['median_ms'], 2)
+            for target in args.targets
+        }
+
+    if args.output == '-':
+        json.dump(report, sys.stdout, indent=2)
+    else:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {args.output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,266 @@
+"""End-to-end benchmark of the analysis pipeline and result rendering, run offline against FakeBackend.
+
+    python benchmarks/bench_pipeline.py
+    python benchmarks/bench_pipeline.py --sizes demo 1k 10k 100k --personas 3 5 --output bench_results.json
+
+For every (dataset size, persona count) case it records:
+  - CSV ingestion time (read_csv + prompt rendering, as in the upload sidebar)
+  - latency and prompt/response tokens of each pipeline stage, and total wall time
+  - peak Python memory (tracemalloc) over ingestion and the pipeline
+  - rerun time of each results tab's chart/display functions (median and min over --render-repeats)
+
+Results are written as JSON so runs can be compared over time.
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+import persona_designer as designer  # noqa: E402
+
+# display_* functions (from the Streamlit app) run in Streamlit's bare mode, which warns on
+# every call; parse the config first so its logger.level default doesn't override ours
+import streamlit.logger  # noqa: E402
+from streamlit import config as streamlit_config  # noqa: E402
+streamlit_config.get_config_options()
+streamlit.logger.set_log_level('error')
+
+import app  # noqa: E402
+
+DATASET_SIZES = {'demo': 0, '1k': 1_000, '10k': 10_000, '100k': 100_000}
+
+OCCUPATIONS = ['Software Engineer', 'Teacher', 'Nurse', 'Marketing Manager', 'Business Owner', 'Freelancer',
+               'Designer', 'Accountant', 'Student', 'Sales Director']
+SEGMENTS = ['Power User', 'Budget Conscious', 'Early Adopter', 'Premium Buyer', 'Casual User']
+FEEDBACK = [
+    "I need tools that save time and integrate well with my existing workflow.",
+    "Budget is always a concern, value for money is everything.",
+    "Love the premium features but the onboarding was confusing.",
+    "Support team was helpful and walked me through everything.",
+    "The mobile app is fantastic for managing things between meetings.",
+    "Pricing is reasonable but I wish there were more customization options.",
+    "Too many notifications, it gets overwhelming during busy weeks.",
+    "Excellent ROI, my team's productivity improved significantly."
+]
+
+
+def synthetic_customer_csv(rows: int, path: str, seed: int = 0):
+    """Write a research CSV in the README's upload format"""
+    rng = np.random.default_rng(seed)
+    pd.DataFrame({
+        'age': rng.integers(20, 65, rows),
+        'income': rng.integers(30, 180, rows) * 1000,
+        'occupation': rng.choice(OCCUPATIONS, rows),
+        'feedback': rng.choice(FEEDBACK, rows),
+        'rating': np.round(rng.uniform(1, 5, rows), 1),
+        'segment': rng.choice(SEGMENTS, rows)
+    }).to_csv(path, index=False)
+
+
+def load_customer_data(size: str, workdir: str) -> dict:
+    """Customer data text for a dataset size, timing ingestion the way the upload sidebar does it"""
+    if size == 'demo':
+        return {'rows': None, 'ingest_ms': 0.0, 'customer_data': designer.DEMO_CUSTOMER_DATA}
+
+    path = os.path.join(workdir, f"customers_{size}.csv")
+    if not os.path.exists(path):
+        synthetic_customer_csv(DATASET_SIZES[size], path)
+    started = time.perf_counter()
+    df = pd.read_csv(path)
+    customer_data = designer.customer_data_from_frame(df)
+    return {
+        'rows': len(df),
+        'ingest_ms': round((time.perf_counter() - started) * 1000, 2),
+        'customer_data': customer_data
+    }
+
+
+def time_call(fn, repeats: int) -> dict:
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    return {'median_ms': round(statistics.median(timings), 2), 'min_ms': round(min(timings), 2)}
+
+
+def render_benchmarks(engine, results: dict, repeats: int) -> dict:
+    """Rerun cost of each results tab's rendering functions on this case's outputs"""
+    personas = results['personas']
+    campaigns = results['campaigns']
+    additional = results['additional_results']
+    campaign = (campaigns.get('campaigns') or [{}])[0]
+    simulation = designer.simulate_campaign_performance(campaign)
+    budget_problem = designer.build_budget_problem(campaigns)
+    allocation = designer.optimize_budget_allocation(campaigns, 25000, problem=budget_problem)
+    frontier = designer.budget_frontier(campaigns, list(range(5000, 500001, 5000)), problem=budget_problem)
+    journey = engine.generate_journey_map((personas.get('personas') or [{}])[0])
+
+    tabs = {
+        'personas': {
+            'display_personas': lambda: app.display_personas(personas)
+        },
+        'campaigns': {
+            'display_campaigns': lambda: app.display_campaigns(campaigns),
+            'optimize_budget_allocation': lambda: designer.optimize_budget_allocation(campaigns, 25000, problem=budget_problem),
+            'create_budget_allocation_chart': lambda: designer.create_budget_allocation_chart(allocation),
+            'create_budget_frontier_chart': lambda: designer.create_budget_frontier_chart(frontier, 25000)
+        },
+        'analytics': {
+            'generate_persona_insights': lambda: designer.generate_persona_insights(personas),
+            'create_market_size_chart': lambda: designer.create_market_size_chart(personas),
+            'create_confidence_chart': lambda: designer.create_confidence_chart(personas),
+            'create_roi_comparison_chart': lambda: designer.create_roi_comparison_chart(campaigns),
+            'create_persona_similarity_heatmap': lambda: designer.create_persona_similarity_heatmap(personas),
+            'display_competitive_analysis': lambda: app.display_competitive_analysis(additional.get('competitor_analysis', {}))
+        },
+        'content': {
+            'create_journey_map_chart': lambda: designer.create_journey_map_chart(journey),
+            'simulate_campaign_performance': lambda: designer.simulate_campaign_performance(campaign),
+            'display_performance_simulation': lambda: app.display_performance_simulation(simulation),
+            'display_ab_test_ideas': lambda: app.display_ab_test_ideas(additional.get('ab_tests', {}))
+        },
+        'export': {
+            'generate_comprehensive_report': lambda: designer.generate_comprehensive_report(personas, campaigns, results['analysis']),
+            'write_report_html': lambda: designer.write_report(io.StringIO(), personas, campaigns, results['analysis'], 'html'),
+            'export_json': lambda: json.dumps(designer.build_export_payload(
+                results['analysis'], personas, campaigns, additional, results['configuration']), indent=2, default=str),
+            'write_export_ndjson': lambda: designer.write_export(io.BytesIO(), designer.build_export_payload(
+                results['analysis'], personas, campaigns, additional, results['configuration']), 'ndjson')
+        }
+    }
+
+    rendered = {}
+    for tab, functions in tabs.items():
+        rendered[tab] = {name: time_call(fn, repeats) for name, fn in functions.items()}
+        rendered[tab]['total_median_ms'] = round(sum(t['median_ms'] for t in rendered[tab].values()), 2)
+    return rendered
+
+
+def run_case(size: str, num_personas: int, args, workdir: str) -> dict:
+    engine = designer.EnhancedAIAnalysisEngine(backend=designer.FakeBackend(
+        latency_ms=args.latency_ms,
+        latency_sigma=args.latency_sigma,
+        error_rate=args.error_rate,
+        seed=args.seed
+    ))
+
+    tracemalloc.start()
+    data = load_customer_data(size, workdir)
+
+    stages = {}
+    last = {'time': time.perf_counter(), 'usage': dict(engine.usage)}
+
+    def on_stage(stage, error):
+        now, usage = time.perf_counter(), dict(engine.usage)
+        stages[stage] = {
+            'latency_ms': round((now - last['time']) * 1000, 2),
+            'calls': usage['calls'] - last['usage']['calls'],
+            'prompt_tokens': usage['prompt_tokens'] - last['usage']['prompt_tokens'],
+            'response_tokens': usage['response_tokens'] - last['usage']['response_tokens'],
+            'fallback': error is not None
+        }
+        last.update(time=now, usage=usage)
+
+    started = time.perf_counter()
+    results = designer.run_pipeline(engine, data['customer_data'], designer.DEMO_PRODUCT_INFO, num_personas, on_stage=on_stage)
+    pipeline_ms = (time.perf_counter() - started) * 1000
+    _, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'dataset': size,
+        'rows': data['rows'],
+        'num_personas': num_personas,
+        'customer_data_chars': len(data['customer_data']),
+        'ingest_ms': data['ingest_ms'],
+        'stages': stages,
+        'pipeline_ms': round(pipeline_ms, 2),
+        'total_ms': round(pipeline_ms + data['ingest_ms'], 2),
+        'tokens': {
+            'prompt': engine.usage['prompt_tokens'],
+            'response': engine.usage['response_tokens'],
+            'calls': engine.usage['calls'],
+            'errors': engine.usage['errors']
+        },
+        'peak_memory_mb': round(peak_bytes / 2 ** 20, 2),
+        'render': render_benchmarks(engine, results, args.render_repeats)
+    }
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the persona/campaign pipeline offline")
+    parser.add_argument('--sizes', nargs='+', choices=list(DATASET_SIZES), default=list(DATASET_SIZES))
+    parser.add_argument('--personas', nargs='+', type=int, default=[3, 5], help="Persona counts to run (2-5)")
+    parser.add_argument('--latency-ms', type=float, default=50.0, help="Median fake model latency per call")
+    parser.add_argument('--latency-sigma', type=float, default=0.3, help="Lognormal spread of fake latency")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Share of fake model calls that fail")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--render-repeats', type=int, default=5, help="Reruns per rendering function")
+    parser.add_argument('--data-dir', default=None, help="Where synthetic CSVs are cached (default: a temp dir)")
+    parser.add_argument('--output', default='bench_results.json', help="JSON results path ('-' for stdout)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    workdir = args.data_dir or tempfile.mkdtemp(prefix='persona-bench-')
+    os.makedirs(workdir, exist_ok=True)
+
+    cases = []
+    for size in args.sizes:
+        for num_personas in args.personas:
+            case = run_case(size, num_personas, args, workdir)
+            cases.append(case)
+            print(f"{size:>5} x {num_personas} personas: pipeline {case['pipeline_ms']:.0f} ms, "
+                  f"ingest {case['ingest_ms']:.0f} ms, peak {case['peak_memory_mb']:.1f} MB, "
+                  f"{case['tokens']['prompt'] + case['tokens']['response']} tokens", file=sys.stderr)
+
+    report = {
+        'benchmark': 'pipeline',
+        'generated_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'git_revision': git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'backend': {
+            'name': 'fake',
+            'latency_ms': args.latency_ms,
+            'latency_sigma': args.latency_sigma,
+            'error_rate': args.error_rate,
+            'seed': args.seed
+        },
+        'cases': cases
+    }
+
+    if args.output == '-':
+        json.dump(report, sys.stdout, indent=2)
+    else:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {args.output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,288 @@
+"""Headless batch runner for the persona/campaign pipeline.
+
+Runs analysis → personas → campaigns → optional extras for every job in a manifest
+and writes one JSON file per job in the same shape as the app's "Export Data" download.
+
+    python cli.py manifest.json --output-dir results --workers 4 --rpm 30
+
+The manifest is a JSON list (or JSON Lines file) of jobs:
+
+    [
+        {"id": "crm-suite", "customer_data": "data/crm_reviews.txt", "product_brief": "briefs/crm.md"},
+        {"customer_data": "data/hr_survey.csv", "product_info": "HR onboarding platform, $12/seat", "num_personas": 4}
+    ]
+
+`--format compact_json|ndjson` writes compact JSON or one record per line instead of
+indented JSON (using orjson when it is installed). `--report markdown|html|print_html` also streams each job's analysis report to
+`<id>.md` / `<id>.html` next to its JSON.
+
+`customer_data` and `product_brief` are file paths relative to the manifest; `product_info`
+gives the brief inline. `id` defaults to the customer data file name.
+
+With `--checkpoint-dir`, every completed stage is saved per job id; re-running the same
+manifest after a crash or failed call resumes each job from its last completed stage.
+With `--run-store`, finished runs are saved to a SQLite file (shared with the app and server)
+and jobs whose inputs match a saved run without fallback data are answered from it.
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from persona_designer import (FAKE_ERRORS, JSON_EXPORT_FORMATS, REPORT_FORMATS, TABLE_FORMATS,
+                              EnhancedAIAnalysisEngine, PipelineCheckpointStore, RateLimiter, RunStore,
+                              build_export_payload, build_result_tables, get_fallback_registry, get_tracer,
+                              make_backend, optimize_budget_allocation, resolve_table_format, run_pipeline,
+                              simulate_campaign_performance, stderr_alarm_hook, write_export, write_report,
+                              write_tables)
+
+
+def load_manifest(path: str) -> list:
+    """Read manifest jobs and resolve their inputs to text"""
+    with open(path, encoding='utf-8') as f:
+        raw = f.read()
+    if path.endswith('.jsonl'):
+        entries = [json.loads(line) for line in raw.splitlines() if line.strip()]
+    else:
+        entries = json.loads(raw)
+
+    base_dir = os.path.dirname(os.path.abspath(path))
+
+    def read(relative):
+        with open(os.path.join(base_dir, relative), encoding='utf-8') as f:
+            return f.read()
+
+    jobs, seen = [], set()
+    for i, entry in enumerate(entries):
+        if 'customer_data' not in entry or not ('product_brief' in entry or 'product_info' in entry):
+            raise ValueError(f"Manifest entry {i} needs 'customer_data' and 'product_brief' or 'product_info'")
+        job_id = entry.get('id') or os.path.splitext(os.path.basename(entry['customer_data']))[0]
+        job_id = re.sub(r'[^\w.-]+', '_', job_id)
+        if job_id in seen:
+            job_id = f"{job_id}_{i}"
+        seen.add(job_id)
+        jobs.append({
+            'id': job_id,
+            'customer_data': read(entry['customer_data']),
+            'product_info': entry['product_info'] if 'product_info' in entry else read(entry['product_brief']),
+            'num_personas': entry.get('num_personas')
+        })
+    return jobs
+
+
+def run_job(engine, job: dict, args, checkpoints=None, run_store=None, table_runs=None) -> dict:
+    """Run the pipeline for one job and write its export JSON; with `table_runs`, also append the
+    job's results (plus budget allocation and simulations) for the combined table export"""
+    started = time.perf_counter()
+    failed_stages = []
+
+    def on_stage(stage, error):
+        if error is not None:
+            failed_stages.append(stage)
+            print(f"[{job['id']}] {stage} failed, using fallback data: {error}", file=sys.stderr)
+
+    results = run_pipeline(
+        engine,
+        job['customer_data'],
+        job['product_info'],
+        job['num_personas'] or args.num_personas,
+        options={
+            'competitor_analysis': not args.no_competitor_analysis,
+            'ab_testing': not args.no_ab_tests,
+            'merge_personas': not args.no_merge,
+            'merge_threshold': args.merge_threshold
+        },
+        on_stage=on_stage,
+        checkpoints=checkpoints,
+        run_id=job['id'],
+        run_store=run_store,
+        user_id=args.user,
+        reuse_stored=not args.fresh
+    )
+    payload = build_export_payload(
+        results['analysis'],
+        results['personas'],
+        results['campaigns'],
+        results['additional_results'],
+        results['configuration']
+    )
+
+    output_path = os.path.join(args.output_dir, f"{job['id']}.{JSON_EXPORT_FORMATS[args.format][0]}")
+    with open(output_path, 'wb') as f:
+        write_export(f, payload, args.format)
+    if args.report:
+        report_path = os.path.join(args.output_dir, f"{job['id']}.{REPORT_FORMATS[args.report]().extension}")
+        with open(report_path, 'w', encoding='utf-8') as f:
+            write_report(f, results['personas'], results['campaigns'], results['analysis'], args.report)
+    if table_runs is not None:
+        campaigns = (results['campaigns'] or {}).get('campaigns', [])
+        table_runs.append({
+            'run_id': job['id'],
+            'personas': results['personas'],
+            'campaigns': results['campaigns'],
+            'allocation': optimize_budget_allocation(results['campaigns'], args.budget),
+            'simulations': {
+                campaign.get('title', f'Campaign {i + 1}'): simulate_campaign_performance(
+                    campaign, n_trials=args.simulation_trials, seed=args.seed)
+                for i, campaign in enumerate(campaigns)
+            } if args.simulation_trials > 0 else {}
+        })
+
+    return {
+        'id': job['id'],
+        'output': output_path,
+        'failed_stages': failed_stages,
+        'resumed_stages': results['resumed_stages'],
+        'fallback_stages': results['fallback_stages'],
+        'stored_run_id': results['stored_run_id'],
+        'served_from_store': results['served_from_store'],
+        'seconds': round(time.perf_counter() - started, 2)
+    }
+
+
+def build_backend(args, api_key):
+    if args.backend == 'fake':
+        return make_backend('fake', model_name=args.model, latency_ms=args.fake_latency_ms,
+                            error_rate=args.fake_error_rate, error_kinds=args.fake_error_kinds,
+                            malformed_rate=args.fake_malformed_rate, seed=args.seed)
+    return make_backend('gemini', api_key, args.model)
+
+
+def positive_float(value: str) -> float:
+    number = float(value)
+    if number <= 0:
+        raise argparse.ArgumentTypeError(f"must be greater than 0, got {value}")
+    return number
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run the persona/campaign pipeline over a manifest of inputs")
+    parser.add_argument('manifest', help="JSON list or JSON Lines file of jobs")
+    parser.add_argument('--output-dir', default='results', help="Directory for per-job export JSON (default: results)")
+    parser.add_argument('--workers', type=int, default=4, help="Jobs run concurrently (default: 4)")
+    parser.add_argument('--rpm', type=positive_float, default=30, help="Global model calls per minute across all jobs (default: 30)")
+    parser.add_argument('--burst', type=int, default=4, help="Calls allowed back-to-back before the rate limit applies")
+    parser.add_argument('--num-personas', type=int, default=3, choices=range(2, 6), help="Default personas per job")
+    parser.add_argument('--backend', choices=['gemini', 'fake'], default='gemini',
+                        help="Model backend; 'fake' runs offline with simulated latency and errors")
+    parser.add_argument('--model', default=None, help="Model name (default: gemini-2.0-flash)")
+    parser.add_argument('--api-key', default=None, help="Gemini API key (default: GEMINI_API_KEY)")
+    parser.add_argument('--fake-latency-ms', type=float, default=250.0, help="Median fake-backend latency per call")
+    parser.add_argument('--fake-error-rate', type=float, default=0.0, help="Share of fake-backend calls that fail")
+    parser.add_argument('--fake-error-kinds', nargs='+', choices=list(FAKE_ERRORS), default=['backend_error'],
+                        help="Failure reasons the fake backend simulates (default: backend_error)")
+    parser.add_argument('--fake-malformed-rate', type=float, default=0.0,
+                        help="Share of fake-backend calls returning truncated JSON")
+    parser.add_argument('--seed', type=int, default=0, help="Fake-backend random seed")
+    parser.add_argument('--no-competitor-analysis', action='store_true', help="Skip competitor analysis")
+    parser.add_argument('--no-ab-tests', action='store_true', help="Skip A/B test ideas")
+    parser.add_argument('--no-merge', action='store_true', help="Keep overlapping personas separate")
+    parser.add_argument('--merge-threshold', type=float, default=0.8, help="Persona similarity merge threshold")
+    parser.add_argument('--format', choices=list(JSON_EXPORT_FORMATS), default='json',
+                        help="Per-job export format: indented JSON, compact JSON or NDJSON (default: json)")
+    parser.add_argument('--report', choices=list(REPORT_FORMATS), default=None,
+                        help="Also write each job's analysis report in this format")
+    parser.add_argument('--tables', choices=['auto', *TABLE_FORMATS], default=None,
+                        help="Also write personas, campaigns, channel allocations and simulations for all jobs "
+                             "as tables under <output-dir>/tables/ ('auto': Parquet if pyarrow is installed, else CSV)")
+    parser.add_argument('--budget', type=float, default=50000.0,
+                        help="Total budget the optimizer allocates across each job's campaigns for --tables")
+    parser.add_argument('--simulation-trials', type=int, default=20000,
+                        help="Monte Carlo trials per campaign for --tables (0 skips simulations)")
+    parser.add_argument('--checkpoint-dir', default=None, help="Save each completed stage here and resume from it on re-runs")
+    parser.add_argument('--fresh', action='store_true',
+                        help="Discard existing checkpoints for the manifest's jobs and ignore saved runs")
+    parser.add_argument('--run-store', default=None, metavar='PATH',
+                        help="Save finished runs to this SQLite file and reuse saved runs for identical inputs")
+    parser.add_argument('--user', default=os.getenv('PERSONA_DESIGNER_USER', 'local'),
+                        help="User the runs are saved under (default: PERSONA_DESIGNER_USER or 'local')")
+    parser.add_argument('--trace-jsonl', default=None, help="Write every recorded span to this JSON Lines file")
+    parser.add_argument('--otlp-endpoint', default=None,
+                        help="Send spans to an OpenTelemetry collector (OTLP/HTTP JSON), e.g. http://localhost:4318")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    api_key = args.api_key or os.getenv("GEMINI_API_KEY")
+    if args.backend == 'gemini' and not api_key:
+        print("GEMINI_API_KEY is not set (use --api-key, a .env file or --backend fake)", file=sys.stderr)
+        return 2
+
+    if args.tables:
+        try:
+            table_format = resolve_table_format(args.tables)
+        except ValueError as e:
+            print(e, file=sys.stderr)
+            return 2
+
+    jobs = load_manifest(args.manifest)
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    engine = EnhancedAIAnalysisEngine(backend=build_backend(args, api_key))
+    engine.rate_limiter = RateLimiter(args.rpm, burst=args.burst)
+    get_fallback_registry().add_alarm_hook(stderr_alarm_hook)
+
+    checkpoints = PipelineCheckpointStore(args.checkpoint_dir) if args.checkpoint_dir else None
+    if checkpoints and args.fresh:
+        for job in jobs:
+            checkpoints.clear(job['id'])
+    run_store = RunStore(args.run_store) if args.run_store else None
+
+    summaries, errors = [], 0
+    table_runs = [] if args.tables else None
+    with ThreadPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        futures = {pool.submit(run_job, engine, job, args, checkpoints, run_store, table_runs): job for job in jobs}
+        for done, future in enumerate(as_completed(futures), 1):
+            job = futures[future]
+            try:
+                summary = future.result()
+            except Exception as e:
+                errors += 1
+                summary = {'id': job['id'], 'error': str(e)}
+                print(f"[{done}/{len(jobs)}] {job['id']}: error: {e}", file=sys.stderr)
+            else:
+                notes = []
+                if summary['served_from_store']:
+                    notes.append(f"from run store: {summary['stored_run_id']}")
+                if summary['resumed_stages']:
+                    notes.append(f"resumed: {', '.join(summary['resumed_stages'])}")
+                if summary['fallback_stages']:
+                    notes.append("fallback: " + ', '.join(
+                        f"{stage} ({reason})" for stage, reason in summary['fallback_stages'].items()))
+                suffix = f" ({'; '.join(notes)})" if notes else ""
+                print(f"[{done}/{len(jobs)}] {job['id']}: {summary['output']} in {summary['seconds']}s{suffix}")
+            summaries.append(summary)
+
+    if table_runs is not None:
+        # Normalized once across all jobs so every table has one consistent schema
+        table_runs.sort(key=lambda run: run['run_id'])
+        paths = write_tables(build_result_tables(table_runs), os.path.join(args.output_dir, 'tables'), table_format)
+        print(f"Wrote {len(paths)} {table_format} tables to {os.path.join(args.output_dir, 'tables')}")
+
+    with open(os.path.join(args.output_dir, 'run_summary.json'), 'w', encoding='utf-8') as f:
+        json.dump({
+            'jobs': sorted(summaries, key=lambda s: s['id']),
+            'errors': errors,
+            'fallbacks': get_fallback_registry().status(),
+            'latency': get_tracer().summary(),
+            'counters': dict(get_tracer().counters)
+        }, f, indent=2)
+
+    if args.trace_jsonl:
+        with open(args.trace_jsonl, 'w', encoding='utf-8') as f:
+            f.write(get_tracer().to_jsonl())
+    if args.otlp_endpoint:
+        try:
+            print(f"Exported {get_tracer().export_otlp(args.otlp_endpoint)} spans to {args.otlp_endpoint}")
+        except OSError as e:
+            print(f"OTLP export to {args.otlp_endpoint} failed: {e}", file=sys.stderr)
+
+    return 1 if errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,37 @@
+"""AI Marketing Persona Designer: the analysis engine, pipeline, analytics and export logic.
+
+Nothing here imports Streamlit, so batch workers, the HTTP service and scripts can use the
+engine directly; `app.py` is the Streamlit UI built on top of this package.
+"""
+from .ab_testing import (CAMPAIGN_HORIZON_DAYS, attach_ab_test_plan, plan_ab_tests, power_curves,
+                         sample_size_per_variant, simulate_bayesian_ab)
+from .analytics import generate_persona_insights
+from .artifacts import ARTIFACT_GENERATORS, ArtifactPrefetcher, ArtifactStore, generate_artifacts_batch
+from .backends import (FAKE_ERRORS, FAKE_PROMPT_KINDS, FakeBackend, GeminiBackend, ModelBackend, ModelBackendError,
+                       ModelResponse, make_backend)
+from .budget import budget_frontier, build_budget_problem, optimize_budget_allocation
+from .charts import (create_budget_allocation_chart, create_budget_frontier_chart, create_confidence_chart,
+                     create_journey_map_chart, create_market_size_chart, create_persona_similarity_heatmap,
+                     create_power_curve_chart, create_roi_comparison_chart)
+from .concurrency import RateLimiter, SingleFlight
+from .engine import EnhancedAIAnalysisEngine
+from .export import (JSON_EXPORT_FORMATS, build_export_payload, export_to_tempfile, generate_comprehensive_report,
+                     iter_export_records, json_encoder_name, write_export)
+from .inputs import DEMO_CUSTOMER_DATA, DEMO_PRODUCT_INFO, customer_data_from_frame, validate_and_score_data
+from .memory import ConversationMemory
+from .models import EnhancedCampaign, EnhancedPersona, PersonaJourney
+from .persona_versions import PERSONA_HISTORY_KEYS, PersonaVersion, PersonaVersionStore, strip_persona_history
+from .pipeline import (PIPELINE_DEFAULTS, PIPELINE_STAGES, PipelineCheckpointStore, pipeline_input_hash,
+                       run_pipeline)
+from .reports import (REPORT_FORMATS, HtmlReportRenderer, MarkdownReportRenderer, ReportCache, get_report_cache,
+                      iter_report, render_report, write_report)
+from .run_store import RUN_PAYLOAD_FIELDS, RunStore
+from .sentiment import SentimentLexicon, get_sentiment_lexicon, score_review_sentiment
+from .similarity import merge_similar_personas, persona_feature_matrix, persona_similarity_matrix
+from .simulation import CHANNEL_PRIORS, SIMULATION_DEFAULTS, simulate_campaign_performance
+from .tables import (TABLE_FORMATS, TABLE_NAMES, build_result_tables, export_tables_zip, resolve_table_format,
+                     write_tables)
+from .telemetry import (FALLBACK_REASONS, PROVENANCE_KEY, FallbackRegistry, FallbackText, Tracer,
+                        classify_fallback_reason, get_fallback_registry, get_tracer, has_fallback, is_fallback,
+                        provenance, stderr_alarm_hook, strip_provenance, traced, webhook_alarm_hook)
+from .utils import fingerprint
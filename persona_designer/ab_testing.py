@@ -0,0 +1,154 @@
+"""A/B test planning: sample sizes, power curves and Bayesian win probabilities"""
+import time
+from statistics import NormalDist
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .simulation import SIMULATION_DEFAULTS, _parse_number, simulate_campaign_performance
+
+CAMPAIGN_HORIZON_DAYS = 84  # 12-week campaign, matching the simulated timeline
+DEFAULT_EMAIL_OPEN_RATE = 0.22
+
+def _normal_cdf(x: np.ndarray) -> np.ndarray:
+    """Vectorized standard normal CDF (Abramowitz-Stegun 7.1.26 erf, |error| < 1.5e-7)"""
+    x = np.asarray(x, dtype=float)
+    t = 1.0 / (1.0 + 0.3275911 * np.abs(x) / np.sqrt(2))
+    poly = t * (0.254829592 + t * (-0.284496736 + t * (1.421413741 + t * (-1.453152027 + t * 1.061405429))))
+    erf = 1.0 - poly * np.exp(-(x * x) / 2)
+    return 0.5 * (1.0 + np.sign(x) * erf)
+
+def _ab_test_metric(test: Dict) -> str:
+    text = f"{test.get('expected_impact', '')} {test.get('element', '')} {test.get('test_name', '')}".lower()
+    if 'open' in text or 'subject' in text:
+        return 'open_rate'
+    if 'click' in text or 'ctr' in text or 'engagement' in text:
+        return 'click_through_rate'
+    return 'conversion_rate'
+
+def _ab_test_lift(test: Dict, default: float = 0.10) -> float:
+    """Relative lift from strings like '+15% conversion rate' or '+0.5%'; bare numbers below 1
+    (0.12) are fractions and larger ones (12) percentage points"""
+    impact = test.get('expected_impact')
+    lift = _parse_number(impact)
+    if lift is None or lift == 0:
+        return default
+    lift = abs(lift)
+    if isinstance(impact, str) and '%' in impact:
+        return lift / 100
+    return lift / 100 if lift >= 1 else lift
+
+def sample_size_per_variant(baseline: np.ndarray, target: np.ndarray, alpha: float = 0.05, power: float = 0.8) -> np.ndarray:
+    """Two-sided two-proportion z-test sample size per variant, vectorized over designs"""
+    z_alpha = NormalDist().inv_cdf(1 - alpha / 2)
+    z_beta = NormalDist().inv_cdf(power)
+    pooled = (baseline + target) / 2
+    numerator = z_alpha * np.sqrt(2 * pooled * (1 - pooled)) + z_beta * np.sqrt(baseline * (1 - baseline) + target * (1 - target))
+    return np.ceil(numerator ** 2 / (target - baseline) ** 2)
+
+def power_curves(baseline: np.ndarray, target: np.ndarray, n_grid: np.ndarray, alpha: float = 0.05) -> np.ndarray:
+    """Power of each design (rows) at every per-variant sample size in n_grid (columns)"""
+    z_alpha = NormalDist().inv_cdf(1 - alpha / 2)
+    baseline, target = baseline[:, None], target[:, None]
+    pooled = (baseline + target) / 2
+    effect = np.abs(target - baseline) * np.sqrt(n_grid[None, :])
+    return _normal_cdf((effect - z_alpha * np.sqrt(2 * pooled * (1 - pooled))) /
+                       np.sqrt(baseline * (1 - baseline) + target * (1 - target)))
+
+def simulate_bayesian_ab(baseline: np.ndarray, target: np.ndarray, n_per_variant: np.ndarray, n_sims: int = 400,
+                         posterior_draws: int = 100, threshold: float = 0.95, seed: int = 0) -> Dict[str, np.ndarray]:
+    """Beta-Binomial simulation of many test designs at once.
+    For each design, simulates n_sims experiments, draws from both Beta(1 + x, 1 + n - x) posteriors
+    and reports how often B is declared the winner (P(B > A) > threshold) and the expected loss of shipping B."""
+    rng = np.random.default_rng(seed)
+    n = n_per_variant.astype(np.int64)[:, None]
+    conversions_a = rng.binomial(n, baseline[:, None], size=(len(n), n_sims))
+    conversions_b = rng.binomial(n, target[:, None], size=(len(n), n_sims))
+    
+    shape = (len(n), n_sims, posterior_draws)
+    posterior_a = rng.beta(1 + conversions_a[..., None], 1 + n[..., None] - conversions_a[..., None], size=shape)
+    posterior_b = rng.beta(1 + conversions_b[..., None], 1 + n[..., None] - conversions_b[..., None], size=shape)
+    
+    prob_b_better = (posterior_b > posterior_a).mean(axis=2)
+    expected_loss = np.maximum(posterior_a - posterior_b, 0).mean(axis=2)
+    return {
+        'bayesian_power': (prob_b_better > threshold).mean(axis=1),
+        'prob_b_better': prob_b_better.mean(axis=1),
+        'expected_loss': expected_loss.mean(axis=1),
+    }
+
+def plan_ab_tests(tests: List[Dict], campaign: Dict, alpha: float = 0.05, power: float = 0.8,
+                  simulation: Optional[Dict] = None) -> Dict:
+    """Sample sizes, durations, power curves and Bayesian checks for every proposed test,
+    using baseline rates and traffic from the local campaign simulation"""
+    if not tests:
+        return {'tests': []}
+    started = time.perf_counter()
+    simulation = simulation or simulate_campaign_performance(campaign, n_trials=20_000)
+    medians = {name: stats['p50'] for name, stats in simulation['distributions'].items() if 'p50' in stats}
+    daily_impressions = medians['impressions'] / CAMPAIGN_HORIZON_DAYS
+    daily_clicks = medians['clicks'] / CAMPAIGN_HORIZON_DAYS
+    metric_inputs = {
+        'click_through_rate': (medians['clicks'] / max(medians['impressions'], 1), daily_impressions),
+        'conversion_rate': (medians['leads'] / max(medians['clicks'], 1), daily_clicks),
+        'open_rate': (DEFAULT_EMAIL_OPEN_RATE, daily_impressions / float(SIMULATION_DEFAULTS['frequency'])),
+    }
+    
+    metrics = [_ab_test_metric(t) for t in tests]
+    lifts = np.array([_ab_test_lift(t) for t in tests])
+    baseline = np.clip(np.array([metric_inputs[m][0] for m in metrics]), 1e-4, 0.99)
+    target = np.clip(baseline * (1 + lifts), 1e-4, 0.999)
+    daily_traffic = np.array([metric_inputs[m][1] for m in metrics])
+    
+    n_required = sample_size_per_variant(baseline, target, alpha, power)
+    duration_days = np.ceil(2 * n_required / np.maximum(daily_traffic, 1))
+    n_grid = np.unique(np.geomspace(100, max(1000, n_required.max() * 2), 40).round())
+    curves = power_curves(baseline, target, n_grid, alpha)
+    bayes = simulate_bayesian_ab(baseline, target, np.minimum(n_required, 5_000_000))
+    
+    planned = []
+    for i, test in enumerate(tests):
+        planned.append({
+            'test_name': test.get('test_name', f'Test {i+1}'),
+            'metric': metrics[i].replace('_', ' '),
+            'baseline_rate': float(baseline[i]),
+            'expected_lift': float(lifts[i]),
+            'target_rate': float(target[i]),
+            'sample_size_per_variant': int(n_required[i]),
+            'daily_traffic': float(daily_traffic[i]),
+            'duration_days': int(duration_days[i]),
+            'fits_campaign': bool(duration_days[i] <= CAMPAIGN_HORIZON_DAYS),
+            'bayesian_power': float(bayes['bayesian_power'][i]),
+            'prob_b_better': float(bayes['prob_b_better'][i]),
+            'expected_loss': float(bayes['expected_loss'][i]),
+        })
+    
+    return {
+        'alpha': alpha,
+        'power': power,
+        'tests': planned,
+        'power_curve': {'sample_sizes': n_grid.tolist(), 'power': curves.round(4).tolist()},
+        'plan_ms': round((time.perf_counter() - started) * 1000, 1)
+    }
+
+def _proposed_tests(ideas) -> List[Dict]:
+    """The test dicts in a model response; anything that is not a dict is skipped"""
+    if not isinstance(ideas, dict):
+        return []
+    tests = ideas.get('ab_tests')
+    if not isinstance(tests, list):
+        # Tolerate responses that name the list differently
+        tests = next((v for v in ideas.values() if isinstance(v, list) and any(isinstance(t, dict) for t in v)), [])
+    return [test for test in tests if isinstance(test, dict)]
+
+def attach_ab_test_plan(ideas: Dict, campaign: Dict) -> Dict:
+    """Annotate model-proposed A/B tests with computed sample sizes and durations.
+    Returns new dicts and leaves `ideas` untouched (it may be shared, read-only fallback data)."""
+    tests = _proposed_tests(ideas)
+    plan = plan_ab_tests(tests, campaign)
+    tests = [
+        {**test, 'sample_size_per_variant': planned['sample_size_per_variant'],
+         'test_duration': f"{planned['duration_days']} days"}
+        for test, planned in zip(tests, plan['tests'])
+    ]
+    return {**ideas, 'ab_tests': tests, 'test_plan': plan}
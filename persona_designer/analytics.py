@@ -0,0 +1,71 @@
+"""Persona distribution insights"""
+
+
+def generate_persona_insights(personas_data):
+    """Generate smart insights about persona distribution and opportunities"""
+    if not personas_data or 'personas' not in personas_data:
+        return {}
+    
+    insights = {
+        'market_distribution': {},
+        'confidence_analysis': {},
+        'targeting_recommendations': [],
+        'revenue_potential': {}
+    }
+    
+    personas = personas_data['personas']
+    
+    # Market size analysis
+    total_market = 0
+    market_segments = []
+    
+    for persona in personas:
+        market_size = persona.get('market_size', '25%')
+        try:
+            if isinstance(market_size, str):
+                size = float(market_size.replace('%', ''))
+            else:
+                size = float(market_size)
+            market_segments.append(size)
+            total_market += size
+        except:
+            market_segments.append(25.0)
+    
+    insights['market_distribution'] = {
+        'total_addressable': f"{total_market:.1f}%",
+        'largest_segment': max(market_segments),
+        'segment_balance': 'Balanced' if max(market_segments) - min(market_segments) < 20 else 'Unbalanced'
+    }
+    
+    # Confidence analysis
+    confidences = []
+    for persona in personas:
+        conf = persona.get('confidence_score', 0.85)
+        if isinstance(conf, str):
+            try:
+                conf = float(conf.replace('%', '')) / 100
+            except:
+                conf = 0.85
+        confidences.append(conf)
+    
+    insights['confidence_analysis'] = {
+        'average_confidence': sum(confidences) / len(confidences),
+        'highest_confidence': max(confidences),
+        'reliability_score': 'High' if min(confidences) > 0.8 else 'Medium' if min(confidences) > 0.6 else 'Low'
+    }
+    
+    # Targeting recommendations
+    if insights['confidence_analysis']['average_confidence'] > 0.85:
+        insights['targeting_recommendations'].append("🎯 High-confidence personas - ready for immediate campaign launch")
+    
+    if insights['market_distribution']['segment_balance'] == 'Unbalanced':
+        insights['targeting_recommendations'].append("⚖️ Consider focusing on largest segment first for maximum impact")
+    
+    # Revenue potential (simplified estimation)
+    high_value_personas = sum(1 for p in personas if p.get('business_value', '').lower() in ['high', 'very high'])
+    insights['revenue_potential'] = {
+        'high_value_segments': high_value_personas,
+        'revenue_tier': 'Premium' if high_value_personas >= len(personas) / 2 else 'Standard'
+    }
+    
+    return insights
@@ -0,0 +1,169 @@
+"""Artifact cache, background prefetching and batch generation for Advanced Features"""
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+from .telemetry import get_tracer, is_fallback
+from .utils import fingerprint
+
+# Advanced Features artifact kinds and the engine method that generates each one
+ARTIFACT_GENERATORS = {
+    'content_sample': 'generate_content_sample',
+    'ab_tests': 'generate_ab_test_ideas',
+    'journey_map': 'generate_journey_map',
+}
+
+class ArtifactStore:
+    """Thread-safe cache of generated artifacts keyed by (kind, input fingerprint).
+    Fallback artifacts are never cached: they are kept only so `peek` can still display them,
+    and the next `get_or_generate` for the same input calls the model again."""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._items = {}
+        self._fallbacks = {}  # last fallback per key, for display only
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, kind: str, payload: Dict) -> Optional[Dict]:
+        with self._lock:
+            value = self._items.get((kind, fingerprint(payload)))
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        get_tracer().count(f"artifact_cache.{'miss' if value is None else 'hit'}")
+        return value
+    
+    def peek(self, kind: str, payload: Dict) -> Optional[Dict]:
+        """Look up an artifact (or the last fallback for it) without counting it as a cache hit or miss"""
+        key = (kind, fingerprint(payload))
+        with self._lock:
+            return self._items.get(key, self._fallbacks.get(key))
+    
+    def contains(self, kind: str, payload: Dict) -> bool:
+        with self._lock:
+            return (kind, fingerprint(payload)) in self._items
+    
+    def put(self, kind: str, payload: Dict, value: Dict):
+        key = (kind, fingerprint(payload))
+        with self._lock:
+            if is_fallback(value):
+                self._fallbacks[key] = value
+            else:
+                self._items[key] = value
+                self._fallbacks.pop(key, None)
+    
+    def get_or_generate(self, kind: str, payload: Dict, ai_engine) -> Dict:
+        """Return the cached artifact or generate it with the engine and cache it (unless it is fallback data)"""
+        value = self.get(kind, payload)
+        if value is None:
+            value = getattr(ai_engine, ARTIFACT_GENERATORS[kind])(payload)
+            self.put(kind, payload, value)
+        return value
+    
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self._fallbacks.clear()
+
+class ArtifactPrefetcher:
+    """Speculatively generates model-backed Advanced Features artifacts for the top personas/campaigns
+    on a low-priority background thread, bounded by a model-call budget"""
+    
+    def __init__(self, ai_engine, store: ArtifactStore, max_calls: int = 8, pause_seconds: float = 0.5):
+        self.ai_engine = ai_engine
+        self.store = store
+        self.max_calls = max_calls
+        self.pause_seconds = pause_seconds
+        self.calls_made = 0
+        self.completed = 0
+        self.planned = 0
+        self._cancelled = threading.Event()
+        self._idle = threading.Event()  # cleared while a foreground request is running
+        self._idle.set()
+        self._foreground_lock = threading.Lock()
+        self._foreground_count = 0
+        self._thread = None
+    
+    def start(self, personas_data: Dict, campaigns_data: Dict, top_n: int = 2):
+        tasks = []
+        campaigns = (campaigns_data or {}).get('campaigns', [])[:top_n]
+        personas = (personas_data or {}).get('personas', [])[:top_n]
+        for campaign in campaigns:
+            # Performance simulations run locally in milliseconds, so they are not prefetched
+            tasks.extend([
+                ('content_sample', campaign),
+                ('ab_tests', campaign),
+            ])
+        tasks.extend(('journey_map', persona) for persona in personas)
+        
+        self.planned = len(tasks)
+        self._thread = threading.Thread(target=self._run, args=(tasks,), daemon=True)
+        self._thread.start()
+    
+    def _run(self, tasks):
+        for kind, payload in tasks:
+            # Yield to user-initiated requests and keep a gap between calls
+            self._idle.wait()
+            if self._cancelled.wait(self.pause_seconds):
+                return
+            if self.calls_made >= self.max_calls:
+                return
+            if not self.store.contains(kind, payload):
+                self.calls_made += 1
+                try:
+                    self.store.get_or_generate(kind, payload, self.ai_engine)
+                except Exception:
+                    continue
+            self.completed += 1
+    
+    def cancel(self):
+        self._cancelled.set()
+        self._idle.set()
+    
+    @contextmanager
+    def foreground(self):
+        """Pause prefetching while a user-initiated request runs"""
+        with self._foreground_lock:
+            self._foreground_count += 1
+            self._idle.clear()
+        try:
+            yield
+        finally:
+            with self._foreground_lock:
+                self._foreground_count -= 1
+                if self._foreground_count == 0:
+                    self._idle.set()
+    
+    def fetch(self, kind: str, payload: Dict) -> Dict:
+        """Foreground lookup: serves the cached artifact or generates it with prefetching paused"""
+        with self.foreground():
+            # An identical prefetch already in flight is shared via the engine's single-flight layer
+            return self.store.get_or_generate(kind, payload, self.ai_engine)
+    
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+def generate_artifacts_batch(ai_engine, store: ArtifactStore, kind: str, payloads: List[Dict], max_workers: int = 4):
+    """Generate one artifact kind for many inputs concurrently.
+    Yields (index, status, artifact) in completion order; status is 'cached', 'done', 'fallback'
+    (fallback data, not cached, so running the batch again only re-requests these) or 'failed'."""
+    pending = {}
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"batch-{kind}") as executor:
+        for i, payload in enumerate(payloads):
+            cached = store.peek(kind, payload)
+            if cached is not None and not is_fallback(cached):
+                yield i, 'cached', cached
+            else:
+                pending[executor.submit(store.get_or_generate, kind, payload, ai_engine)] = i
+        
+        for future in as_completed(pending):
+            try:
+                artifact = future.result()
+            except Exception:
+                yield pending[future], 'failed', None
+            else:
+                yield pending[future], 'fallback' if is_fallback(artifact) else 'done', artifact
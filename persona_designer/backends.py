@@ -0,0 +1,170 @@
+"""Model backends: Google Gemini and an offline fake for tests and benchmarks"""
+import hashlib
+import json
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+from . import fallbacks
+from .lazy_imports import genai
+from .memory import _estimate_tokens
+
+@dataclass
+class ModelResponse:
+    text: str
+    prompt_tokens: int
+    response_tokens: int
+    latency_ms: float
+
+class ModelBackendError(RuntimeError):
+    """A backend call failed (network, quota, simulated error...)"""
+
+class ModelBackend:
+    """Text-generation interface the engine calls through"""
+    name = 'base'
+    model_name = ''
+    
+    def generate(self, prompt: str) -> ModelResponse:
+        raise NotImplementedError
+
+class GeminiBackend(ModelBackend):
+    """Google Gemini via google.generativeai"""
+    name = 'gemini'
+    
+    def __init__(self, api_key: str, model_name: str = 'gemini-2.0-flash'):
+        genai.configure(api_key=api_key)
+        self.model = genai.GenerativeModel(model_name)
+        self.model_name = model_name
+    
+    def generate(self, prompt: str) -> ModelResponse:
+        started = time.perf_counter()
+        response = self.model.generate_content(prompt)
+        text = response.text.strip()
+        usage = getattr(response, 'usage_metadata', None)
+        return ModelResponse(
+            text=text,
+            prompt_tokens=getattr(usage, 'prompt_token_count', 0) or _estimate_tokens(prompt),
+            response_tokens=getattr(usage, 'candidates_token_count', 0) or _estimate_tokens(text),
+            latency_ms=(time.perf_counter() - started) * 1000
+        )
+
+# Prompt markers identifying each engine method's request, checked in order
+FAKE_PROMPT_KINDS = [
+    ('analyze this customer research data', 'analysis'),
+    ('create exactly', 'personas'),
+    ('marketing campaign strategies', 'campaigns'),
+    ('Refine this marketing persona', 'refine'),
+    ('marketing content samples', 'content_sample'),
+    ('customer journey map', 'journey_map'),
+    ('marketing funnel priors', 'priors'),
+    ('A/B testing ideas', 'ab_tests'),
+    ('competitor analysis framework', 'competitor_analysis'),
+    ('running summary', 'summary'),
+    ('expert marketing consultant', 'answer')
+]
+
+# Simulated failure messages, one per fallback reason (classified like real backend errors)
+FAKE_ERRORS = {
+    'quota': "429 Resource exhausted: quota exceeded (simulated)",
+    'timeout': "Deadline exceeded: request timed out (simulated)",
+    'safety_block': "Response blocked by safety filters (simulated)",
+    'backend_error': "Simulated backend error"
+}
+
+class FakeBackend(ModelBackend):
+    """Offline backend returning schema-valid responses for every engine prompt.
+    Latency is lognormal around `latency_ms` (median) with spread `latency_sigma`, plus
+    `ms_per_token` per response token; `error_rate` of calls raise ModelBackendError with
+    a message drawn from `error_kinds`, and `malformed_rate` of calls return truncated JSON.
+    Content is derived from the prompt, so identical prompts get identical responses."""
+    name = 'fake'
+    
+    def __init__(self, latency_ms: float = 250.0, latency_sigma: float = 0.4, ms_per_token: float = 0.0,
+                 error_rate: float = 0.0, seed: int = 0, model_name: str = 'fake-model',
+                 error_kinds=('backend_error',), malformed_rate: float = 0.0):
+        self.latency_ms = latency_ms
+        self.latency_sigma = latency_sigma
+        self.ms_per_token = ms_per_token
+        self.error_rate = error_rate
+        self.error_kinds = list(error_kinds)
+        self.malformed_rate = malformed_rate
+        self.model_name = model_name
+        self._rng = np.random.default_rng(seed)
+        self._lock = threading.Lock()
+    
+    def generate(self, prompt: str) -> ModelResponse:
+        with self._lock:
+            base_latency = self.latency_ms * float(np.exp(self.latency_sigma * self._rng.standard_normal()))
+            failed = self._rng.random() < self.error_rate
+            error_kind = self.error_kinds[int(self._rng.integers(len(self.error_kinds)))]
+            malformed = self._rng.random() < self.malformed_rate
+        
+        kind = next((kind for marker, kind in FAKE_PROMPT_KINDS if marker in prompt), 'text')
+        text = self._respond(kind, prompt)
+        if malformed:
+            text = text[:len(text) // 2]
+        response_tokens = _estimate_tokens(text)
+        latency_ms = base_latency + self.ms_per_token * response_tokens
+        time.sleep(latency_ms / 1000)
+        if failed:
+            raise ModelBackendError(f"{FAKE_ERRORS.get(error_kind, FAKE_ERRORS['backend_error'])} ({kind})")
+        return ModelResponse(text, _estimate_tokens(prompt), response_tokens, latency_ms)
+    
+    def _respond(self, kind: str, prompt: str) -> str:
+        rng = np.random.default_rng(int(hashlib.sha256(prompt.encode('utf-8')).hexdigest()[:8], 16))
+        
+        if kind == 'analysis':
+            data = fallbacks.get_fallback_analysis()
+        elif kind == 'personas':
+            match = re.search(r'create exactly (\d+)', prompt)
+            data = fallbacks.thaw(fallbacks.get_fallback_personas(int(match.group(1)) if match else 3))
+            for persona in data['personas']:
+                persona['confidence_score'] = round(float(rng.uniform(0.7, 0.95)), 2)
+                persona['market_size'] = f"{int(rng.integers(10, 40))}%"
+        elif kind == 'campaigns':
+            templates = fallbacks.get_fallback_campaigns()['campaigns']
+            names = re.findall(r'"name": "([^"]+)"', prompt) or [t['persona_target'] for t in templates]
+            data = {'campaigns': []}
+            for i, name in enumerate(dict.fromkeys(names)):
+                campaign = dict(templates[i % len(templates)], persona_target=name)
+                campaign['title'] = f"{campaign['title']} for {name.split(' ')[0]}"
+                campaign['predicted_roi'] = f"{rng.uniform(1.5, 4.5):.1f}x"
+                data['campaigns'].append(campaign)
+        elif kind == 'refine':
+            match = re.search(r'ORIGINAL PERSONA:\s*(\{.*\})\s*USER FEEDBACK:\s*(.*?)\n\s*\n', prompt, re.S)
+            try:
+                data = json.loads(match.group(1))
+                data['pain_points'] = list(data.get('pain_points', [])) + [match.group(2).strip()[:120]]
+            except (AttributeError, ValueError):
+                data = fallbacks.get_fallback_personas(1)['personas'][0]
+        elif kind == 'content_sample':
+            data = fallbacks.get_fallback_content_sample()
+        elif kind == 'journey_map':
+            data = fallbacks.get_fallback_journey_map()
+        elif kind == 'priors':
+            data = {'qualification_rate': round(float(rng.uniform(0.35, 0.6)), 2), 'avg_order_value': int(rng.integers(200, 800))}
+        elif kind == 'ab_tests':
+            data = fallbacks.get_fallback_ab_tests()
+        elif kind == 'competitor_analysis':
+            data = fallbacks.get_fallback_competitor_analysis()
+        elif kind == 'summary':
+            return "The user asked about persona targeting and campaign channels; recommendations focused on the top two personas."
+        elif kind == 'answer':
+            return ("Focus budget on the persona with the highest confidence score first, then test messaging "
+                    "on the secondary persona's preferred channels before scaling.")
+        else:
+            return "OK"
+        return json.dumps(data)
+
+def make_backend(name: str = 'gemini', api_key: Optional[str] = None, model_name: Optional[str] = None,
+                 **options) -> ModelBackend:
+    """Build a backend by name ('gemini' or 'fake'); extra options go to the backend constructor"""
+    if name == 'fake':
+        return FakeBackend(model_name=model_name or 'fake-model', **options)
+    if name == 'gemini':
+        return GeminiBackend(api_key, model_name or 'gemini-2.0-flash')
+    raise ValueError(f"Unknown model backend '{name}'")
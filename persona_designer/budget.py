@@ -0,0 +1,98 @@
+"""Budget allocation across campaigns and channels under diminishing returns"""
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .simulation import CHANNEL_PRIORS, SIMULATION_DEFAULTS, _campaign_channels, _channel_family, _parse_number
+
+def build_budget_problem(campaigns_data: Dict) -> Dict:
+    """Diminishing-returns response curve for every campaign x channel cell.
+    Revenue(spend) = r0 * k * (1 - exp(-spend / k)): r0 is the return per dollar of the first
+    dollar (channel funnel priors scaled by the campaign's relative predicted ROI) and k is the
+    channel's saturation spend."""
+    campaigns = (campaigns_data or {}).get('campaigns', [])
+    predicted = [_parse_number(c.get('predicted_roi'), None) for c in campaigns]
+    known = [r for r in predicted if r and r > 0]
+    average_roi = sum(known) / len(known) if known else 1.0
+    
+    labels, r0, saturation = [], [], []
+    for i, campaign in enumerate(campaigns):
+        title = campaign.get('title', f'Campaign {i+1}')
+        multiplier = (predicted[i] / average_roi) if predicted[i] and predicted[i] > 0 else 1.0
+        for channel in _campaign_channels(campaign):
+            prior = CHANNEL_PRIORS[_channel_family(channel)]
+            return_per_dollar = (1000 / prior['cpm']) * prior['ctr'] * prior['lead_rate'] * \
+                SIMULATION_DEFAULTS['qualification_rate'] * prior['close_rate'] * SIMULATION_DEFAULTS['avg_order_value']
+            labels.append((title, channel))
+            r0.append(return_per_dollar * multiplier)
+            saturation.append(prior['saturation_spend'])
+    
+    return {'labels': labels, 'r0': np.array(r0), 'saturation': np.array(saturation)}
+
+def _water_fill(r0: np.ndarray, saturation: np.ndarray, budgets: np.ndarray, floor: float, iterations: int = 60):
+    """Optimal spend for each budget (rows) across cells (columns) by bisection on the marginal ROI.
+    At the optimum every funded cell has marginal return r0 * exp(-s / k) equal to the same lambda."""
+    budgets = np.atleast_1d(budgets).astype(float)[:, None]
+    log_r0 = np.log(r0)[None, :]
+    low = np.full_like(budgets, max(floor, 1e-9))  # lambda can't drop below the floor (e.g. break-even)
+    high = np.full_like(budgets, r0.max())
+    spend_at = lambda lam: saturation[None, :] * np.maximum(log_r0 - np.log(lam), 0.0)
+    
+    # Budgets that exhaust every cell above the floor stop there and leave the rest unspent
+    capped = spend_at(low).sum(axis=1, keepdims=True) <= budgets
+    for _ in range(iterations):
+        mid = np.sqrt(low * high)
+        over = spend_at(mid).sum(axis=1, keepdims=True) > budgets
+        low = np.where(over, mid, low)
+        high = np.where(over, high, mid)
+    lam = np.where(capped, max(floor, 1e-9), high)
+    return spend_at(lam), lam[:, 0]
+
+def optimize_budget_allocation(campaigns_data: Dict, total_budget: float, hold_below_break_even: bool = False,
+                               problem: Optional[Dict] = None) -> Dict:
+    """Allocate a total budget across campaigns x channels to maximize expected revenue"""
+    started = time.perf_counter()
+    problem = problem or build_budget_problem(campaigns_data)
+    if not problem['labels']:
+        return {}
+    
+    r0, saturation = problem['r0'], problem['saturation']
+    spend, marginal = _water_fill(r0, saturation, np.array([total_budget]), floor=1.0 if hold_below_break_even else 0.0)
+    spend = spend[0]
+    revenue = r0 * saturation * (1 - np.exp(-spend / saturation))
+    
+    campaigns = {}
+    for (title, channel), amount, cell_revenue in zip(problem['labels'], spend, revenue):
+        entry = campaigns.setdefault(title, {'title': title, 'spend': 0.0, 'expected_revenue': 0.0, 'channels': {}})
+        entry['spend'] += float(amount)
+        entry['expected_revenue'] += float(cell_revenue)
+        entry['channels'][channel] = round(float(amount), 2)
+    for entry in campaigns.values():
+        entry['roi'] = entry['expected_revenue'] / entry['spend'] if entry['spend'] > 0 else 0.0
+    
+    allocated = float(spend.sum())
+    return {
+        'total_budget': float(total_budget),
+        'allocated': allocated,
+        'unallocated': max(0.0, float(total_budget) - allocated),
+        'expected_revenue': float(revenue.sum()),
+        'expected_roi': float(revenue.sum() / allocated) if allocated > 0 else 0.0,
+        'marginal_roi': float(marginal[0]),
+        'campaigns': list(campaigns.values()),
+        'allocations': [
+            {'campaign': title, 'channel': channel, 'spend': float(amount), 'expected_revenue': float(cell_revenue)}
+            for (title, channel), amount, cell_revenue in zip(problem['labels'], spend, revenue)
+        ],
+        'solve_ms': round((time.perf_counter() - started) * 1000, 2)
+    }
+
+def budget_frontier(campaigns_data: Dict, budgets: List[float], problem: Optional[Dict] = None) -> Dict:
+    """Optimal expected revenue for a whole grid of total budgets, solved in one vectorized pass"""
+    problem = problem or build_budget_problem(campaigns_data)
+    if not problem['labels']:
+        return {}
+    r0, saturation = problem['r0'], problem['saturation']
+    spend, _ = _water_fill(r0, saturation, np.asarray(budgets, dtype=float), floor=0.0)
+    revenue = (r0 * saturation * (1 - np.exp(-spend / saturation))).sum(axis=1)
+    return {'budgets': list(map(float, budgets)), 'expected_revenue': revenue.tolist()}
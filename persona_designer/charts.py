@@ -0,0 +1,412 @@
+"""Plotly figures for personas, campaigns, budgets, A/B tests and journeys"""
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .lazy_imports import go, pd, plotly_subplots, px
+from .sentiment import SentimentLexicon, get_sentiment_lexicon
+from .similarity import persona_similarity_matrix
+from .telemetry import traced
+
+@traced('render.create_confidence_chart')
+def create_confidence_chart(personas_data):
+    """Create enhanced confidence score visualization"""
+    if not personas_data or 'personas' not in personas_data:
+        return None
+        
+    personas = personas_data['personas']
+    names = []
+    scores = []
+    refined_status = []
+    
+    for p in personas:
+        names.append(p.get('name', 'Unknown Persona'))
+        
+        confidence = p.get('confidence_score', 0.85)
+        if isinstance(confidence, dict):
+            confidence = confidence.get('overall_confidence', confidence.get('confidence_metrics', {}).get('overall_confidence', 0.85))
+        elif isinstance(confidence, str):
+            try:
+                if '%' in confidence:
+                    confidence = float(confidence.replace('%', '')) / 100
+                else:
+                    confidence = float(confidence)
+                    if confidence > 1:  # Handle cases where it's 85 instead of 0.85
+                        confidence = confidence / 100
+            except (ValueError, TypeError):
+                confidence = 0.85
+        elif not isinstance(confidence, (int, float)):
+            confidence = 0.85
+        elif isinstance(confidence, (int, float)) and confidence > 1:
+            confidence = confidence / 100  # Convert 85 to 0.85
+
+# Ensure confidence is within valid range
+        confidence = max(0, min(1, confidence))
+        
+        scores.append(confidence * 100)
+        refined_status.append('Refined' if p.get('is_refined', False) else 'Original')
+    
+    if not names or not scores:
+        return None
+    
+    fig = px.bar(
+        x=names,
+        y=scores,
+        title="🎯 Persona Confidence Scores",
+        labels={'x': 'Personas', 'y': 'Confidence Score (%)'},
+        color=scores,
+        color_continuous_scale='RdYlGn',
+        text=refined_status
+    )
+    
+    fig.update_traces(textposition='outside')
+    fig.update_layout(
+        showlegend=False,
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='#333'),
+        title_font_size=20
+    )
+    
+    return fig
+
+@traced('render.create_market_size_chart')
+def create_market_size_chart(personas_data):
+    """Create enhanced market size distribution chart"""
+    if not personas_data or 'personas' not in personas_data:
+        return None
+        
+    personas = personas_data['personas']
+    names = []
+    sizes = []
+    colors = []
+    
+    for p in personas:
+        name = p.get('name', 'Unknown Persona')
+        if p.get('is_refined', False):
+            name += " ⭐"
+        names.append(name)
+        
+        market_size = p.get('market_size', '25%')
+        if isinstance(market_size, dict):
+            market_size = market_size.get('market_segment_size', '25%')
+        
+        try:
+            if isinstance(market_size, str):
+                size_val = float(market_size.replace('%', ''))
+            else:
+                size_val = float(market_size)
+        except:
+            size_val = 25.0
+        
+        sizes.append(size_val)
+        colors.append('#ff6b6b' if p.get('is_refined', False) else '#4ecdc4')
+    
+    if not names or not sizes or sum(sizes) == 0:
+        return None
+    
+    fig = px.pie(
+        names=names,
+        values=sizes,
+        title="📊 Market Segment Distribution",
+        color_discrete_sequence=colors
+    )
+    
+    fig.update_traces(
+        textposition='inside', 
+        textinfo='percent+label',
+        textfont_size=12
+    )
+    fig.update_layout(
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='#333'),
+        title_font_size=20
+    )
+    
+    return fig
+
+@traced('render.create_persona_similarity_heatmap')
+def create_persona_similarity_heatmap(personas_data):
+    """Create persona overlap heatmap from pairwise similarity"""
+    if not personas_data or len(personas_data.get('personas', [])) < 2:
+        return None
+    
+    personas = personas_data['personas']
+    names = [p.get('name', f'Persona {i+1}') for i, p in enumerate(personas)]
+    similarity = persona_similarity_matrix(personas)
+    
+    fig = px.imshow(
+        np.round(similarity, 2),
+        x=names,
+        y=names,
+        zmin=0,
+        zmax=1,
+        text_auto=True,
+        color_continuous_scale='Teal',
+        title="🧬 Persona Overlap (Cosine Similarity)"
+    )
+    fig.update_layout(
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='#333'),
+        title_font_size=20,
+        coloraxis_colorbar=dict(title="Similarity")
+    )
+    
+    return fig
+
+@traced('render.create_roi_comparison_chart')
+def create_roi_comparison_chart(campaigns_data):
+    """Create enhanced ROI comparison chart"""
+    if not campaigns_data or 'campaigns' not in campaigns_data:
+        return None
+        
+    campaigns = campaigns_data['campaigns']
+    titles = []
+    roi_values = []
+    confidence_intervals = []
+    
+    for c in campaigns:
+        titles.append(c.get('title', 'Campaign'))
+        
+        roi = c.get('predicted_roi', '2.5x')
+        if isinstance(roi, dict):
+            roi = roi.get('projected_roi', '2.5x')
+        
+        try:
+            roi_val = float(str(roi).replace('x', ''))
+        except:
+            roi_val = 2.5
+        
+        roi_values.append(roi_val)
+        confidence_intervals.append(c.get('confidence_interval', '80-90%'))
+    
+    if not titles or not roi_values:
+        return None
+    
+    fig = px.bar(
+        x=titles,
+        y=roi_values,
+        title="🚀 Predicted Campaign ROI",
+        labels={'x': 'Campaigns', 'y': 'ROI Multiplier'},
+        color=roi_values,
+        color_continuous_scale='RdYlGn',
+        text=confidence_intervals
+    )
+    
+    fig.update_traces(textposition='outside')
+    fig.update_layout(
+        showlegend=False,
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='#333'),
+        xaxis_tickangle=-45,
+        title_font_size=20
+    )
+    
+    return fig
+
+def _score_journey_emotions(stages: List[Dict]) -> List[float]:
+    """Score each journey stage's emotions on a positive/negative scale"""
+    texts = [SentimentLexicon.SEPARATOR.join(map(str, s.get('emotions', []))) for s in stages]
+    return [round(float(score), 2) for score in get_sentiment_lexicon().score_many(texts)]
+
+@traced('render.create_budget_allocation_chart')
+def create_budget_allocation_chart(allocation: Dict):
+    """Stacked spend per campaign, split by channel"""
+    if not allocation or not allocation.get('allocations'):
+        return None
+    
+    df = pd.DataFrame(allocation['allocations'])
+    df = df[df['spend'] > 0]
+    if df.empty:
+        return None
+    
+    fig = px.bar(
+        df,
+        x='campaign',
+        y='spend',
+        color='channel',
+        title="💰 Optimized Budget Allocation",
+        labels={'campaign': 'Campaigns', 'spend': 'Spend ($)', 'channel': 'Channel'},
+        hover_data={'expected_revenue': ':,.0f'}
+    )
+    fig.update_layout(
+        barmode='stack',
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='#333'),
+        title_font_size=20
+    )
+    return fig
+
+@traced('render.create_budget_frontier_chart')
+def create_budget_frontier_chart(frontier: Dict, selected_budget: Optional[float] = None):
+    """Optimal expected revenue as the total budget grows"""
+    if not frontier or not frontier.get('budgets'):
+        return None
+    
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        x=frontier['budgets'],
+        y=frontier['expected_revenue'],
+        mode='lines',
+        name='Optimal expected revenue',
+        line=dict(width=3, color='#667eea')
+    ))
+    fig.add_trace(go.Scatter(
+        x=frontier['budgets'],
+        y=frontier['budgets'],
+        mode='lines',
+        name='Break-even',
+        line=dict(dash='dash', color='#999')
+    ))
+    if selected_budget:
+        fig.add_vline(x=selected_budget, line_dash='dot', line_color='#f5576c')
+    fig.update_layout(
+        title="📈 Revenue vs. Total Budget",
+        xaxis_title="Total Budget ($)",
+        yaxis_title="Expected Revenue ($)",
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        title_font_size=20
+    )
+    return fig
+
+@traced('render.create_power_curve_chart')
+def create_power_curve_chart(plan: Dict):
+    """Statistical power vs. users per variant for every planned A/B test"""
+    curve = (plan or {}).get('power_curve')
+    if not curve or not plan.get('tests'):
+        return None
+    
+    fig = go.Figure()
+    for test, power in zip(plan['tests'], curve['power']):
+        fig.add_trace(go.Scatter(
+            x=curve['sample_sizes'],
+            y=power,
+            mode='lines',
+            name=test['test_name']
+        ))
+    fig.add_hline(y=plan.get('power', 0.8), line_dash='dash', line_color='#999')
+    fig.update_layout(
+        title="🧪 Power Curves",
+        xaxis_title="Users per Variant",
+        yaxis_title="Power",
+        xaxis_type='log',
+        yaxis=dict(range=[0, 1], tickformat='.0%'),
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        title_font_size=20
+    )
+    return fig
+
+@traced('render.create_journey_map_chart')
+def create_journey_map_chart(journey_data: Dict):
+    """Create enhanced interactive journey map visualization.
+    Multi-persona results ({"journey_maps": [...]}) render as small multiples on a shared emotion scale."""
+    if journey_data and 'journey_maps' in journey_data:
+        return _create_journey_small_multiples(journey_data['journey_maps'])
+    if not journey_data or 'journey_map' not in journey_data:
+        return None
+        
+    stages = journey_data['journey_map']
+    x = [s.get('stage', 'Stage') for s in stages]
+    
+    # Create emotion scores (positive/negative scale)
+    emotion_scores = _score_journey_emotions(stages)
+    
+    fig = go.Figure()
+    
+    # Add emotion journey line
+    fig.add_trace(go.Scatter(
+        x=x,
+        y=emotion_scores,
+        mode='lines+markers+text',
+        name='Customer Emotion Journey',
+        text=[', '.join(s.get('emotions', [])) for s in stages],
+        textposition="top center",
+        marker=dict(size=12, color='blue'),
+        line=dict(width=3)
+    ))
+    
+    # Add opportunity markers
+    fig.add_trace(go.Scatter(
+        x=x,
+        y=[max(emotion_scores) + 1] * len(x),
+        mode='markers+text',
+        name='Key Opportunities',
+        text=[', '.join(s.get('opportunities', [])[:2]) for s in stages],
+        textposition="top center",
+        marker=dict(size=10, color='green', symbol='star'),
+        showlegend=False
+    ))
+    
+    fig.update_layout(
+        title="🗺️ Customer Journey Map",
+        xaxis_title="Journey Stages",
+        yaxis_title="Emotional Experience",
+        yaxis=dict(
+            tickmode='array',
+            tickvals=[-2, -1, 0, 1, 2],
+            ticktext=['Very Negative', 'Negative', 'Neutral', 'Positive', 'Very Positive']
+        ),
+        showlegend=True,
+        height=500,
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        title_font_size=20
+    )
+    
+    return fig
+
+def _create_journey_small_multiples(journey_maps: List[Dict], max_cols: int = 2):
+    """One emotion-journey panel per persona with shared axes for side-by-side comparison"""
+    journey_maps = [j for j in journey_maps if j.get('journey_map')]
+    if not journey_maps:
+        return None
+    
+    cols = min(max_cols, len(journey_maps))
+    rows = -(-len(journey_maps) // cols)
+    fig = plotly_subplots.make_subplots(
+        rows=rows,
+        cols=cols,
+        shared_yaxes=True,
+        subplot_titles=[j.get('persona', 'Persona') for j in journey_maps],
+        vertical_spacing=0.18 if rows > 1 else 0.1
+    )
+    
+    all_scores = []
+    for i, journey in enumerate(journey_maps):
+        stages = journey['journey_map']
+        emotion_scores = _score_journey_emotions(stages)
+        all_scores.extend(emotion_scores)
+        fig.add_trace(go.Scatter(
+            x=[s.get('stage', 'Stage') for s in stages],
+            y=emotion_scores,
+            mode='lines+markers',
+            name=journey.get('persona', 'Persona'),
+            hovertext=[', '.join(s.get('emotions', [])) for s in stages],
+            marker=dict(size=9),
+            line=dict(width=3)
+        ), row=i // cols + 1, col=i % cols + 1)
+    
+    low, high = min(all_scores + [-2]), max(all_scores + [2])
+    fig.update_yaxes(
+        range=[low - 0.5, high + 0.5],
+        tickmode='array',
+        tickvals=[-2, -1, 0, 1, 2],
+        ticktext=['Very Negative', 'Negative', 'Neutral', 'Positive', 'Very Positive']
+    )
+    fig.update_xaxes(tickangle=-30)
+    fig.update_layout(
+        title="🗺️ Customer Journey Maps by Persona",
+        showlegend=False,
+        height=320 * rows + 80,
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        title_font_size=20
+    )
+    
+    return fig
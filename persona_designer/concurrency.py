@@ -0,0 +1,71 @@
+"""Request coalescing and rate limiting for model calls"""
+import threading
+import time
+
+class _InFlightCall:
+    __slots__ = ('done', 'result', 'error')
+    
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class SingleFlight:
+    """Run one call per key at a time; concurrent callers with the same key wait for and share its result"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.coalesced_count = 0
+    
+    def do(self, key: str, fn) -> tuple:
+        """Return (result, coalesced); `coalesced` is True when this caller shared another caller's call"""
+        with self._lock:
+            call = self._calls.get(key)
+            is_leader = call is None
+            if is_leader:
+                call = self._calls[key] = _InFlightCall()
+            else:
+                self.coalesced_count += 1
+        
+        if not is_leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+        
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+        return call.result, False
+
+class RateLimiter:
+    """Token bucket shared by every caller of an engine: at most `rate_per_minute` calls, bursts up to `burst`"""
+    
+    def __init__(self, rate_per_minute: float, burst: int = 1):
+        if rate_per_minute <= 0:
+            raise ValueError(f"rate_per_minute must be positive, got {rate_per_minute}")
+        self.rate = rate_per_minute / 60.0
+        self.capacity = max(1, burst)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self):
+        """Block until a call may proceed"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
@@ -0,0 +1,459 @@
+"""The analysis engine: prompts, model calls and fallbacks for every generated artifact"""
+import hashlib
+import json
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from . import fallbacks
+from .ab_testing import _proposed_tests, attach_ab_test_plan
+from .artifacts import ArtifactStore, generate_artifacts_batch
+from .backends import GeminiBackend, ModelBackend
+from .concurrency import SingleFlight
+from .memory import ConversationMemory, _truncate_to_tokens
+from .persona_versions import PERSONA_HISTORY_KEYS, strip_persona_history
+from .simulation import simulate_campaign_performance
+from .telemetry import (PROVENANCE_KEY, FallbackText, classify_fallback_reason, get_fallback_registry, get_tracer,
+                        is_fallback, strip_provenance, traced)
+
+class EnhancedAIAnalysisEngine:
+    # Default results used when a model call fails
+    _get_fallback_analysis = staticmethod(fallbacks.get_fallback_analysis)
+    _get_fallback_personas = staticmethod(fallbacks.get_fallback_personas)
+    _get_fallback_campaigns = staticmethod(fallbacks.get_fallback_campaigns)
+    _get_fallback_content_sample = staticmethod(fallbacks.get_fallback_content_sample)
+    _get_fallback_journey_map = staticmethod(fallbacks.get_fallback_journey_map)
+    _get_fallback_ab_tests = staticmethod(fallbacks.get_fallback_ab_tests)
+    _get_fallback_competitor_analysis = staticmethod(fallbacks.get_fallback_competitor_analysis)
+    
+    def __init__(self, api_key=None, model_name='gemini-2.0-flash', backend: Optional[ModelBackend] = None):
+        self.backend = backend if backend is not None else GeminiBackend(api_key, model_name)
+        self.model_name = self.backend.model_name
+        # The engine is shared across Streamlit sessions via st.cache_resource,
+        # so identical prompts from concurrent sessions collapse into one call
+        self._single_flight = SingleFlight()
+        # Optional RateLimiter shared by all threads using this engine (set by batch runners)
+        self.rate_limiter = None
+        self._usage_lock = threading.Lock()
+        self.usage = {'calls': 0, 'errors': 0, 'prompt_tokens': 0, 'response_tokens': 0}
+    
+    def _generate_text(self, prompt: str) -> str:
+        """Send a prompt to the model, sharing the response with identical in-flight requests"""
+        key = hashlib.sha256(f"{self.model_name}\n{prompt}".encode('utf-8')).hexdigest()
+        
+        def call():
+            if self.rate_limiter is not None:
+                with tracer.span('model.rate_limit_wait'):
+                    self.rate_limiter.acquire()
+            with tracer.span('model.generate_content', backend=self.backend.name, model=self.model_name) as span:
+                try:
+                    response = self.backend.generate(prompt)
+                except Exception:
+                    with self._usage_lock:
+                        self.usage['calls'] += 1
+                        self.usage['errors'] += 1
+                    raise
+                span['attributes'].update(prompt_tokens=response.prompt_tokens, response_tokens=response.response_tokens)
+            with self._usage_lock:
+                self.usage['calls'] += 1
+                self.usage['prompt_tokens'] += response.prompt_tokens
+                self.usage['response_tokens'] += response.response_tokens
+            tracer.count('tokens.prompt', response.prompt_tokens)
+            tracer.count('tokens.response', response.response_tokens)
+            return response.text
+        
+        tracer = get_tracer()
+        text, coalesced = self._single_flight.do(key, call)
+        if coalesced:
+            tracer.count('single_flight.coalesced')
+            tracer.annotate(coalesced=True)
+        return text
+    
+    def _generate_json(self, prompt: str) -> Dict:
+        """Send a prompt and parse the (possibly markdown-fenced) JSON response"""
+        response_text = self._generate_text(prompt)
+        with get_tracer().span('model.parse_json', chars=len(response_text)):
+            if response_text.startswith('```json'):
+                response_text = response_text[7:]
+            if response_text.endswith('```'):
+                response_text = response_text[:-3]
+            
+            return json.loads(response_text)
+    
+    @staticmethod
+    def _prompt_json(data) -> str:
+        """Serialize context data for a prompt (provenance records and refinement history are not sent to the model)"""
+        with get_tracer().span('prompt.build'):
+            return json.dumps(strip_persona_history(strip_provenance(data)), indent=2)
+    
+    def _provenance(self, method: str, source: str, reason: Optional[str] = None) -> Dict:
+        record = {'source': source, 'method': method, 'backend': self.backend.name, 'model': self.model_name,
+                  'generated_at': datetime.now().isoformat()}
+        if reason:
+            record['reason'] = reason
+        return record
+    
+    def _from_model(self, method: str, data):
+        """Count a model-generated result and stamp it with its provenance"""
+        get_fallback_registry().record_success(method)
+        if isinstance(data, dict):
+            data[PROVENANCE_KEY] = self._provenance(method, 'model')
+        return data
+    
+    def _fallback(self, method: str, error: Exception, data=None):
+        """Count a fallback activation by reason, tag the enclosing engine span with its cause
+        and stamp the fallback data (a dict or text) with its provenance"""
+        reason = classify_fallback_reason(error)
+        tracer = get_tracer()
+        tracer.count(f'fallback.{method}.{reason}')
+        tracer.annotate(fallback=True, fallback_reason=reason,
+                        fallback_error=f"{type(error).__name__}: {error}"[:200])
+        get_fallback_registry().record_fallback(method, reason, error)
+        if isinstance(data, dict):
+            # Fallback data is shared and read-only: only the top level is copied to carry the provenance
+            data = dict(data)
+            data[PROVENANCE_KEY] = self._provenance(method, 'fallback', reason)
+        elif isinstance(data, str):
+            data = FallbackText(data, self._provenance(method, 'fallback', reason))
+        return data
+    
+    @traced('engine.analyze_customer_data')
+    def analyze_customer_data(self, customer_data: str, product_info: str) -> Dict:
+        """Analyze customer data using Gemini"""
+        
+        prompt = f"""
+        As an expert marketing data analyst, analyze this customer research data and product information:
+
+        CUSTOMER DATA:
+        {customer_data}
+
+        PRODUCT INFO:
+        {product_info}
+
+        Provide a comprehensive analysis in JSON format with:
+        1. Customer segments (3-4 distinct behavioral clusters)
+        2. Key demographic patterns
+        3. Pain points and motivations
+        4. Communication preferences
+        5. Market opportunities
+
+        Return only valid JSON without any markdown formatting.
+        """
+        
+        try:
+            result = self._generate_json(prompt)
+        except Exception as e:
+            return self._fallback('analyze_customer_data', e, self._get_fallback_analysis())
+        return self._from_model('analyze_customer_data', result)
+    
+    @traced('engine.create_personas')
+    def create_personas(self, analysis_data: Dict, num_personas: int = 3) -> Dict:
+        """Create detailed personas based on analysis"""
+        
+        prompt = f"""
+        Based on this customer analysis data, create exactly {num_personas} detailed marketing personas:
+
+        ANALYSIS DATA:
+        {self._prompt_json(analysis_data)}
+
+        For each persona, provide:
+        1. Name and tagline
+        2. Detailed demographics
+        3. Psychographic profile
+        4. Behavioral patterns
+        5. Pain points and goals
+        6. Communication preferences
+        7. Confidence scores (0-1)
+
+        Return as JSON with a "personas" array containing exactly {num_personas} personas. No markdown formatting.
+        """
+        
+        try:
+            result = self._generate_json(prompt)
+        except Exception as e:
+            return self._fallback('create_personas', e, self._get_fallback_personas(num_personas))
+        return self._from_model('create_personas', result)
+    
+    @traced('engine.create_campaigns')
+    def create_campaigns(self, personas_data: Dict) -> Dict:
+        """Create campaign strategies for each persona"""
+        
+        prompt = f"""
+        Create comprehensive marketing campaign strategies for these personas:
+
+        PERSONAS:
+        {self._prompt_json(personas_data)}
+
+        For each persona, create a campaign with:
+        1. Campaign title and central theme (memorable tagline)
+        2. Core messaging strategy
+        3. Channel recommendations
+        4. Content strategy
+        5. ROI predictions
+        6. Success metrics
+
+        Return as JSON with a "campaigns" array. Each campaign must include:
+        - title
+        - theme (catchy campaign theme/tagline)
+        - persona_target
+        - key_message
+        - value_propositions (array)
+        - channels (array)
+        - content_strategy (array)
+        - predicted_roi
+        - confidence_interval
+ 
+        No markdown formatting.
+        """
+        
+        
+        try:
+            result = self._generate_json(prompt)
+        except Exception as e:
+            return self._fallback('create_campaigns', e, self._get_fallback_campaigns())
+        return self._from_model('create_campaigns', result)
+    
+    @traced('engine.refine_persona')
+    def refine_persona(self, original_persona: Dict, feedback: str) -> Dict:
+        """FIXED: Refine persona based on user feedback"""
+        prompt = f"""
+        Refine this marketing persona based on the user feedback. Make meaningful changes to improve the persona:
+        
+        ORIGINAL PERSONA:
+        {self._prompt_json(original_persona)}
+        
+        USER FEEDBACK:
+        {feedback}
+        
+        Based on the feedback, update relevant fields while keeping the JSON structure intact.
+        Make sure to incorporate the feedback into demographics, psychographics, pain_points, goals, or other relevant sections.
+        Return the complete updated persona as JSON with no markdown formatting.
+        """
+        
+        try:
+            refined_persona = self._generate_json(prompt)
+            
+            # Feedback and earlier versions live in the caller's PersonaVersionStore, not in the persona
+            for key in PERSONA_HISTORY_KEYS:
+                refined_persona.pop(key, None)
+            refined_persona['is_refined'] = True
+            refined_persona['last_refinement'] = datetime.now().isoformat()
+            
+            return self._from_model('refine_persona', refined_persona)
+        except Exception as e:
+            # A copy of the original persona comes back, marked as a fallback so callers can tell it was not refined
+            return self._fallback('refine_persona', e, original_persona)
+    
+    @traced('engine.generate_content_sample')
+    def generate_content_sample(self, campaign_data: Dict) -> Dict:
+        """Generate sample marketing content for campaign"""
+        prompt = f"""
+        Generate comprehensive marketing content samples for this campaign:
+        
+        CAMPAIGN DATA:
+        {self._prompt_json(campaign_data)}
+
+        Create realistic, engaging content including:
+        1. Email subject line and full body
+        2. Social media posts (3 variations)
+        3. Google Ad copy (headline + description)
+        4. Blog post title and introduction paragraph
+        5. Landing page headline and value proposition
+
+        Return as JSON with detailed content. No markdown formatting.
+        """
+        
+        try:
+            result = self._generate_json(prompt)
+        except Exception as e:
+            return self._fallback('generate_content_sample', e, self._get_fallback_content_sample())
+        return self._from_model('generate_content_sample', result)
+    
+    @traced('engine.generate_journey_map')
+    def generate_journey_map(self, persona_data: Dict, store: Optional[ArtifactStore] = None, max_workers: int = 4) -> Dict:
+        """Generate detailed customer journey map.
+        Pass {"personas": [...]} to map every persona concurrently; maps are cached per persona
+        fingerprint in `store`, so a refined persona only regenerates its own map. Fallback maps are
+        not cached, so the next call retries the model for just those personas."""
+        if 'personas' in persona_data:
+            personas = persona_data['personas']
+            store = store if store is not None else ArtifactStore()
+            journey_maps = [None] * len(personas)
+            for i, status, journey in generate_artifacts_batch(self, store, 'journey_map', personas, max_workers):
+                journey_maps[i] = {
+                    'persona': personas[i].get('name', f'Persona {i+1}'),
+                    'status': status,
+                    'fallback': is_fallback(journey),
+                    'journey_map': (journey or {}).get('journey_map', [])
+                }
+            return {"journey_maps": journey_maps}
+        
+        prompt = f"""
+        Create a comprehensive customer journey map for this persona:
+        
+        PERSONA DATA:
+        {self._prompt_json(persona_data)}
+
+        Generate a detailed journey with:
+        1. 6-7 key stages (Awareness to Advocacy)
+        2. Specific touchpoints for each stage
+        3. Emotional states throughout journey
+        4. Pain points at each stage
+        5. Opportunities for engagement
+        6. Recommended actions
+
+        Return as JSON with "journey_map" containing detailed stage information.
+        """
+        
+        try:
+            result = self._generate_json(prompt)
+        except Exception as e:
+            return self._fallback('generate_journey_map', e, self._get_fallback_journey_map())
+        return self._from_model('generate_journey_map', result)
+    
+    @traced('engine.answer_query')
+    def answer_query(self, query: str, context: Dict, memory: Optional[ConversationMemory] = None) -> str:
+        """FIXED: Enhanced AI assistant for queries"""
+        conversation = memory.build_context() if memory else ""
+        conversation_block = f"""
+        CONVERSATION SO FAR:
+        {conversation}
+        """ if conversation else ""
+        
+        prompt = f"""
+        You are an expert marketing consultant. Answer this query based on the analysis data provided.
+        Be specific, actionable, and reference the actual data when possible.
+        {conversation_block}
+        USER QUERY: {query}
+        
+        CONTEXT DATA:
+        Personas: {self._prompt_json(context.get('personas_data', {}))}
+        Campaigns: {self._prompt_json(context.get('campaigns_data', {}))}
+        
+        Provide a helpful, detailed response with specific recommendations and insights.
+        Treat the conversation so far as background for follow-up questions.
+        """
+        
+        try:
+            answer = self._generate_text(prompt)
+        except Exception as e:
+            return self._fallback('answer_query', e, f"I apologize, but I encountered an error: {str(e)}. Please try rephrasing your question or check the system status.")
+        return self._from_model('answer_query', answer)
+
+    @traced('engine.summarize_conversation')
+    def summarize_conversation(self, summary: str, turns: List[tuple], max_tokens: int = 400) -> str:
+        """Fold older assistant turns into a compact running summary"""
+        transcript = "\n\n".join(f"Q: {q}\nA: {a}" for q, a in turns)
+        prompt = f"""
+        Update the running summary of a marketing strategy conversation.
+        
+        CURRENT SUMMARY:
+        {summary or "(empty)"}
+        
+        NEW EXCHANGES:
+        {transcript}
+        
+        Write a concise summary (under {max_tokens * 3 // 4} words) of the questions asked, the
+        recommendations given and any decisions or preferences the user stated.
+        Return plain text only.
+        """
+        
+        try:
+            summary_text = self._generate_text(prompt)
+        except Exception as e:
+            self._fallback('summarize_conversation', e)
+            # Local compression: keep the question and the first sentence of each answer
+            condensed = [f"Q: {q} A: {a.split('. ')[0].strip()}" for q, a in turns]
+            return _truncate_to_tokens(" ".join(filter(None, [summary] + condensed)), max_tokens)
+        self._from_model('summarize_conversation', None)
+        return _truncate_to_tokens(summary_text, max_tokens)
+    
+    @traced('engine.propose_simulation_priors')
+    def propose_simulation_priors(self, campaign_data: Dict) -> Optional[Dict]:
+        """Ask the model for funnel-rate priors used by the local Monte Carlo simulation"""
+        prompt = f"""
+        Propose realistic marketing funnel priors for this campaign:
+        
+        CAMPAIGN:
+        {self._prompt_json(campaign_data)}
+        
+        Return JSON with:
+        - "channels": an object keyed by channel name, each with "cpm" (USD per 1000 impressions),
+          "ctr", "lead_rate" (leads per click) and "close_rate" (sales per qualified lead) as decimals
+        - "qualification_rate": share of leads that qualify (decimal)
+        - "avg_order_value": expected revenue per sale in USD
+        
+        Return only valid JSON without any markdown formatting.
+        """
+        
+        try:
+            priors = self._generate_json(prompt)
+        except Exception as e:
+            self._fallback('propose_simulation_priors', e)
+            return None
+        return self._from_model('propose_simulation_priors', priors)
+    
+    @traced('engine.simulate_performance')
+    def simulate_performance(self, campaign_data: Dict, use_model_priors: bool = False, **simulation_options) -> Dict:
+        """Simulate campaign performance locally with vectorized Monte Carlo trials.
+        The model is only consulted (optionally) to propose funnel priors."""
+        priors = self.propose_simulation_priors(campaign_data) if use_model_priors else None
+        return simulate_campaign_performance(campaign_data, priors=priors, **simulation_options)
+    
+    @traced('engine.generate_ab_test_ideas')
+    def generate_ab_test_ideas(self, campaign_data: Dict) -> Dict:
+        """NEW FEATURE: Generate A/B test ideas"""
+        prompt = f"""
+        Generate A/B testing ideas for this campaign to optimize performance:
+        
+        CAMPAIGN:
+        {self._prompt_json(campaign_data)}
+
+        Suggest 5-7 specific A/B tests covering:
+        1. Headlines and messaging
+        2. Visual elements
+        3. Call-to-action buttons
+        4. Email subject lines
+        5. Landing page layouts
+        6. Targeting parameters
+
+        Return as JSON with an "ab_tests" array; each test has test_name, element, variant_a,
+        variant_b and expected_impact (e.g. "+12% conversion rate").
+        """
+        
+        try:
+            ideas = self._generate_json(prompt)
+            if not _proposed_tests(ideas):
+                raise ValueError("Response has no A/B test objects")
+            ideas = self._from_model('generate_ab_test_ideas', ideas)
+        except Exception as e:
+            ideas = self._fallback('generate_ab_test_ideas', e, self._get_fallback_ab_tests())
+        
+        # Sample sizes, durations and power come from the local planner, not the model
+        return attach_ab_test_plan(ideas, campaign_data)
+    
+    @traced('engine.generate_competitor_analysis')
+    def generate_competitor_analysis(self, personas_data: Dict) -> Dict:
+        """NEW FEATURE: Competitor analysis insights"""
+        prompt = f"""
+        Based on these personas, generate a competitor analysis framework:
+        
+        PERSONAS:
+        {self._prompt_json(personas_data)}
+
+        Provide:
+        1. Key competitors likely targeting these personas
+        2. Competitive positioning opportunities
+        3. Differentiation strategies
+        4. Pricing considerations
+        5. Channel strategy vs competitors
+
+        Return as JSON with actionable insights.
+        """
+        
+        try:
+            result = self._generate_json(prompt)
+        except Exception as e:
+            return self._fallback('generate_competitor_analysis', e, self._get_fallback_competitor_analysis())
+        return self._from_model('generate_competitor_analysis', result)
+    
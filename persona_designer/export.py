@@ -0,0 +1,117 @@
+"""Export documents: the JSON payload, its streaming JSON/NDJSON writers and the Markdown report"""
+import json
+import os
+import tempfile
+from datetime import datetime
+from typing import Dict, Iterator, Optional
+
+from .lazy_imports import optional_module
+from .reports import render_report
+from .telemetry import get_tracer
+
+def build_export_payload(analysis_data: Dict, personas_data: Dict, campaigns_data: Dict,
+                         additional_results: Optional[Dict] = None, configuration: Optional[Dict] = None) -> Dict:
+    """The "Export Data" JSON document shared by the UI download and the batch runner"""
+    return {
+        "metadata": {
+            "generated_at": datetime.now().isoformat(),
+            "ai_engine": "Google Gemini Pro",
+            "version": "2.0",
+            "personas_count": len((personas_data or {}).get('personas', [])),
+            "campaigns_count": len((campaigns_data or {}).get('campaigns', []))
+        },
+        "analysis": analysis_data or {},
+        "personas": personas_data or {},
+        "campaigns": campaigns_data or {},
+        "additional_insights": additional_results or {},
+        "configuration": configuration or {}
+    }
+
+def generate_comprehensive_report(personas_data, campaigns_data, analysis_data=None):
+    """Generate comprehensive markdown report (cached by input fingerprint; see reports.py for HTML and streaming)"""
+    return render_report(personas_data, campaigns_data, analysis_data, 'markdown')
+
+# Streaming JSON Export
+JSON_EXPORT_FORMATS = {
+    'json': ('json', 'application/json'),
+    'compact_json': ('json', 'application/json'),
+    'ndjson': ('ndjson', 'application/x-ndjson')
+}
+
+def json_encoder_name() -> str:
+    """'orjson' when the faster encoder is installed, else 'json'"""
+    return 'orjson' if optional_module('orjson') is not None else 'json'
+
+def _encode(data, indent: bool = False, chunked: bool = False) -> Iterator[bytes]:
+    """UTF-8 JSON for `data`: one orjson call when available, else the stdlib encoder
+    (in bounded chunks when `chunked`, so a whole payload is never held as one string)"""
+    orjson = optional_module('orjson')
+    if orjson is not None:
+        try:
+            yield orjson.dumps(data, default=str,
+                               option=orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if indent else 0))
+            return
+        except TypeError:
+            pass  # e.g. integers wider than 64 bits; the stdlib encoder handles them
+    encoder = json.JSONEncoder(default=str, ensure_ascii=False,
+                               indent=2 if indent else None, separators=None if indent else (',', ':'))
+    if not chunked:
+        yield encoder.encode(data).encode('utf-8')
+        return
+    buffer, size = [], 0
+    for chunk in encoder.iterencode(data):
+        buffer.append(chunk)
+        size += len(chunk)
+        if size >= 65536:
+            yield ''.join(buffer).encode('utf-8')
+            buffer, size = [], 0
+    if buffer:
+        yield ''.join(buffer).encode('utf-8')
+
+def iter_export_records(payload: Dict) -> Iterator[Dict]:
+    """An export payload as self-describing records: one per persona, campaign and additional
+    insight, plus metadata, analysis and configuration records"""
+    yield {'type': 'metadata', 'data': payload.get('metadata', {})}
+    yield {'type': 'analysis', 'data': payload.get('analysis', {})}
+    for section, item_type in (('personas', 'persona'), ('campaigns', 'campaign')):
+        container = payload.get(section) or {}
+        extra = {key: value for key, value in container.items() if key != section}
+        if extra:
+            yield {'type': f'{section}_meta', 'data': extra}
+        for index, item in enumerate(container.get(section, [])):
+            yield {'type': item_type, 'index': index, 'data': item}
+    for kind, artifact in (payload.get('additional_insights') or {}).items():
+        yield {'type': 'artifact', 'kind': kind, 'data': artifact}
+    yield {'type': 'configuration', 'data': payload.get('configuration', {})}
+
+def write_export(stream, payload: Dict, fmt: str = 'json') -> int:
+    """Write an export payload to a binary stream and return the bytes written.
+    `json` matches the indented "Export Data" download, `compact_json` drops the whitespace
+    and `ndjson` writes one record per line (see `iter_export_records`)."""
+    if fmt not in JSON_EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format '{fmt}' (expected one of: {', '.join(JSON_EXPORT_FORMATS)})")
+    written = 0
+    with get_tracer().span('export.write', format=fmt, encoder=json_encoder_name()):
+        if fmt == 'ndjson':
+            for record in iter_export_records(payload):
+                for chunk in _encode(record):
+                    written += stream.write(chunk)
+                written += stream.write(b'\n')
+        else:
+            for chunk in _encode(payload, indent=fmt == 'json', chunked=True):
+                written += stream.write(chunk)
+    return written
+
+def export_to_tempfile(payload: Dict, fmt: str = 'json', directory: Optional[str] = None) -> str:
+    """Write an export to a new temporary file and return its path; the caller deletes it"""
+    if fmt not in JSON_EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format '{fmt}' (expected one of: {', '.join(JSON_EXPORT_FORMATS)})")
+    with tempfile.NamedTemporaryFile('wb', suffix=f'.{JSON_EXPORT_FORMATS[fmt][0]}', prefix='persona-export-',
+                                     dir=directory, delete=False) as f:
+        try:
+            write_export(f, payload, fmt)
+        except BaseException:
+            f.close()
+            os.remove(f.name)
+            raise
+    return f.name
@@ -0,0 +1,93 @@
+"""Default results returned when the model is unavailable or its response is unusable.
+
+The data lives in `data/fallbacks.json`, is read on first use and then shared: every getter returns
+the same read-only FrozenDict/FrozenList tree. Code that changes a fallback result takes its own
+copy with `thaw()` first.
+"""
+import functools
+import json
+import os
+
+FALLBACK_DATASET_VERSION = 1
+FALLBACK_DATASET_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'fallbacks.json')
+
+
+def _read_only(self, *args, **kwargs):
+    raise TypeError(f"{type(self).__name__} is shared fallback data; take a mutable copy with thaw() first")
+
+
+class FrozenDict(dict):
+    """Read-only dict; still a dict for json, orjson and isinstance checks"""
+    __slots__ = ()
+    __setitem__ = __delitem__ = __ior__ = clear = pop = popitem = setdefault = update = _read_only
+
+    def __reduce__(self):
+        return (FrozenDict, (dict(self),))
+
+
+class FrozenList(list):
+    """Read-only list; still a list for json, orjson and isinstance checks"""
+    __slots__ = ()
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _read_only
+    append = extend = insert = pop = remove = clear = sort = reverse = _read_only
+
+    def __reduce__(self):
+        return (FrozenList, (list(self),))
+
+
+def _freeze(value):
+    if isinstance(value, dict):
+        return FrozenDict((key, _freeze(item)) for key, item in value.items())
+    if isinstance(value, list):
+        return FrozenList(_freeze(item) for item in value)
+    return value
+
+
+def thaw(value):
+    """Deep mutable copy of (possibly frozen) JSON-like data, made of plain dicts and lists"""
+    if isinstance(value, dict):
+        return {key: thaw(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [thaw(item) for item in value]
+    return value
+
+
+@functools.lru_cache(maxsize=None)
+def load_fallback_dataset() -> FrozenDict:
+    """The versioned fallback dataset, read and frozen once per process"""
+    with open(FALLBACK_DATASET_PATH, encoding='utf-8') as f:
+        data = json.load(f)
+    if data.get('version') != FALLBACK_DATASET_VERSION:
+        raise ValueError(f"{FALLBACK_DATASET_PATH} is version {data.get('version')}, "
+                         f"expected {FALLBACK_DATASET_VERSION}")
+    return _freeze(data)
+
+
+def get_fallback_analysis():
+    """Fallback analysis data"""
+    return load_fallback_dataset()['analysis']
+
+@functools.lru_cache(maxsize=16)
+def get_fallback_personas(num_personas: int = 3):
+    """Enhanced fallback personas data"""
+    return FrozenDict(personas=FrozenList(load_fallback_dataset()['personas'][:num_personas]))
+
+def get_fallback_campaigns():
+    """Enhanced fallback campaigns data"""
+    return load_fallback_dataset()['campaigns']
+
+def get_fallback_content_sample():
+    """Fallback content samples"""
+    return load_fallback_dataset()['content_sample']
+
+def get_fallback_journey_map():
+    """Fallback customer journey map"""
+    return load_fallback_dataset()['journey_map']
+
+def get_fallback_ab_tests():
+    """Fallback A/B test ideas"""
+    return load_fallback_dataset()['ab_tests']
+
+def get_fallback_competitor_analysis():
+    """Fallback competitor analysis"""
+    return load_fallback_dataset()['competitor_analysis']
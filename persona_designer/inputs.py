@@ -0,0 +1,95 @@
+"""Demo inputs, CSV preparation and input quality scoring"""
+from .lazy_imports import pd
+
+DEMO_CUSTOMER_DATA = """
+Age 34, Software Engineer, $85k income: "I need tools that save time and integrate well with my existing workflow. Customer service response time is crucial - I can't wait days for support."
+
+Age 42, Teacher, $55k income: "Budget is always a concern with two kids in college. I research thoroughly before buying anything for the family. Value for money is everything."
+
+Age 29, Marketing Manager, $70k income: "I love trying new products, especially if they're innovative and trending. Social proof is important - I check reviews and what influencers are saying."
+
+Age 51, Business Owner, $120k income: "Quality is non-negotiable for my business. I'm willing to pay premium for excellent products and white-glove service."
+
+Review: "Great product quality but wish the onboarding was simpler. Support team was helpful though - they walked me through everything."
+
+Survey Response: "Price is reasonable for the value provided. My family uses this daily now. Kids love the user interface."
+
+Interview: "As a busy professional, I appreciate products that respect my time. The interface is intuitive and I was productive immediately."
+
+Feedback: "Love the premium features, but would like more customization options for power users like myself."
+
+Age 38, Nurse, $65k income: "Healthcare worker here - I need reliable, professional-grade solutions I can trust during critical moments."
+
+Review: "Excellent ROI and my team's productivity improved significantly. The analytics dashboard is incredibly helpful for tracking performance."
+
+Age 26, Freelancer, $45k income: "As a freelancer, I need affordable solutions that help me compete with bigger agencies. Automation features are game-changers."
+
+Survey: "The mobile app is fantastic - I can manage everything on the go between client meetings."
+"""
+
+DEMO_PRODUCT_INFO = "AI-powered productivity platform that helps businesses automate workflows, integrate tools, and boost team efficiency. Starting at $29/month with premium tiers up to $299/month. Key features include smart automation, analytics dashboard, mobile app, and 24/7 support."
+
+def customer_data_from_frame(df: 'pd.DataFrame', max_rows: int = 100) -> str:
+    """Render an uploaded research table as prompt text (long tables are elided in the middle)"""
+    return df.to_string(max_rows=max_rows)
+
+def validate_and_score_data(customer_data, product_info):
+    """Enhanced data validation with detailed scoring"""
+    if not customer_data and not product_info:
+        return {'customer_data_quality': 0, 'product_detail_quality': 0, 'overall_readiness': 0, 'recommendations': []}
+    scores = {
+        'customer_data_quality': 0,
+        'product_detail_quality': 0,
+        'overall_readiness': 0,
+        'recommendations': []
+    }
+    
+    # Customer data analysis
+    if customer_data:
+        word_count = len(customer_data.split())
+        line_count = len(customer_data.split('\n'))
+        
+        # Check for key indicators
+        has_demographics = any(word in customer_data.lower() for word in ['age', 'income', 'salary', 'years old'])
+        has_pain_points = any(word in customer_data.lower() for word in ['problem', 'issue', 'difficult', 'frustrated', 'need'])
+        has_behaviors = any(word in customer_data.lower() for word in ['use', 'buy', 'prefer', 'like', 'want'])
+        
+        # Scoring
+        scores['customer_data_quality'] = min(100, (
+            (word_count * 0.5) +
+            (line_count * 2) +
+            (has_demographics * 20) +
+            (has_pain_points * 15) +
+            (has_behaviors * 15)
+        ))
+        
+        # Recommendations
+        if word_count < 100:
+            scores['recommendations'].append("Add more detailed customer feedback or interview data")
+        if not has_demographics:
+            scores['recommendations'].append("Include age, income, or occupation information")
+        if not has_pain_points:
+            scores['recommendations'].append("Add customer problems or pain points")
+    
+    # Product info analysis
+    if product_info:
+        word_count = len(product_info.split())
+        has_pricing = any(word in product_info.lower() for word in ['$', 'price', 'cost', 'free', 'premium'])
+        has_features = any(word in product_info.lower() for word in ['feature', 'benefit', 'capability'])
+        has_target = any(word in product_info.lower() for word in ['target', 'customer', 'market'])
+        
+        scores['product_detail_quality'] = min(100, (
+            (word_count * 2) +
+            (has_pricing * 25) +
+            (has_features * 20) +
+            (has_target * 15)
+        ))
+        
+        if word_count < 20:
+            scores['recommendations'].append("Provide more detailed product information")
+        if not has_pricing:
+            scores['recommendations'].append("Include pricing information")
+    
+    scores['overall_readiness'] = (scores['customer_data_quality'] + scores['product_detail_quality']) / 2
+    
+    return scores
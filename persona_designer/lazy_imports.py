@@ -0,0 +1,42 @@
+"""Deferred imports of heavy optional modules"""
+import functools
+import importlib
+from typing import TYPE_CHECKING
+
+class _LazyModule:
+    """Stand-in for a heavy module that imports it on first attribute access.
+    pandas, plotly and google.generativeai account for most of the package's import time,
+    and the CLI, HTTP service and fake backend never touch some or all of them."""
+    
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+    
+    def __getattr__(self, attr):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+    
+    def __repr__(self):
+        return f"<lazy module '{self._name}'{' (loaded)' if self._module is not None else ''}>"
+
+@functools.lru_cache(maxsize=None)
+def optional_module(name: str):
+    """The module if it is installed, else None (checked once per process)"""
+    try:
+        return importlib.import_module(name)
+    except ImportError:
+        return None
+
+if TYPE_CHECKING:
+    import pandas as pd
+    import plotly.express as px
+    import plotly.graph_objects as go
+    import google.generativeai as genai
+    import plotly.subplots as plotly_subplots
+else:
+    pd = _LazyModule('pandas')
+    px = _LazyModule('plotly.express')
+    go = _LazyModule('plotly.graph_objects')
+    genai = _LazyModule('google.generativeai')
+    plotly_subplots = _LazyModule('plotly.subplots')
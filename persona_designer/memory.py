@@ -0,0 +1,86 @@
+"""Token-budgeted conversation memory for the AI assistant"""
+import threading
+
+def _estimate_tokens(text: str) -> int:
+    """Rough token estimate (~4 characters per token)"""
+    return max(1, len(text) // 4) if text else 0
+
+def _truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Trim text to fit a token budget, keeping the most recent content"""
+    max_chars = max_tokens * 4
+    if len(text) <= max_chars:
+        return text
+    return "..." + text[-(max_chars - 3):]
+
+class ConversationMemory:
+    """Recent assistant turns verbatim plus a rolling summary of older turns, under a fixed token budget"""
+    
+    def __init__(self, token_budget: int = 1500, recent_turns: int = 3, summary_share: float = 0.4):
+        self.token_budget = token_budget
+        self.recent_turns = recent_turns
+        self.summary_budget = int(token_budget * summary_share)
+        self.summary = ""
+        self.turns = []  # (query, answer) pairs not yet folded into the summary
+        self._lock = threading.Lock()
+        self._summarizer = None
+    
+    def add_turn(self, query: str, answer: str):
+        with self._lock:
+            self.turns.append((query, answer))
+    
+    def build_context(self) -> str:
+        """Summary first, then as many recent turns (newest first) as fit the remaining budget"""
+        with self._lock:
+            summary = self.summary
+            turns = list(self.turns)
+        
+        parts = []
+        remaining = self.token_budget
+        if summary:
+            summary = _truncate_to_tokens(summary, self.summary_budget)
+            parts.append(f"Summary of earlier discussion: {summary}")
+            remaining -= _estimate_tokens(parts[0])
+        
+        recent = []
+        for query, answer in reversed(turns):
+            turn_text = f"Q: {query}\nA: {answer}"
+            cost = _estimate_tokens(turn_text)
+            if cost > remaining:
+                if not recent and remaining > 50:
+                    recent.append(_truncate_to_tokens(turn_text, remaining))
+                break
+            recent.append(turn_text)
+            remaining -= cost
+        
+        parts.extend(reversed(recent))
+        return "\n\n".join(parts)
+    
+    def summarize_async(self, engine):
+        """Fold turns older than the recent window into the summary on a background thread"""
+        with self._lock:
+            if len(self.turns) <= self.recent_turns:
+                return
+            if self._summarizer is not None and self._summarizer.is_alive():
+                return
+            self._summarizer = threading.Thread(
+                target=self._fold_older_turns, args=(engine,), daemon=True
+            )
+            self._summarizer.start()
+    
+    def _fold_older_turns(self, engine):
+        with self._lock:
+            older = self.turns[:-self.recent_turns]
+            summary = self.summary
+        
+        new_summary = engine.summarize_conversation(summary, older, self.summary_budget)
+        
+        with self._lock:
+            # Turns are only ever appended, so the folded ones are still the prefix
+            if self.turns[:len(older)] == older:
+                self.turns = self.turns[len(older):]
+                self.summary = new_summary
+    
+    def clear(self):
+        with self._lock:
+            self.summary = ""
+            self.turns = []
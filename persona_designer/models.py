@@ -0,0 +1,41 @@
+"""Typed records for personas, campaigns and journeys"""
+from dataclasses import dataclass
+from typing import Any, Dict, List
+
+@dataclass
+class EnhancedPersona:
+    name: str
+    tagline: str
+    demographics: Dict[str, Any]
+    psychographics: Dict[str, Any]
+    behavior_patterns: Dict[str, Any]
+    pain_points: List[str]
+    goals: List[str]
+    preferred_channels: List[str]
+    messaging_preferences: Dict[str, Any]
+    confidence_score: float
+    market_size: str
+    business_value: str
+    is_refined: bool = False
+    refinement_history: List[str] = None
+
+@dataclass
+class EnhancedCampaign:
+    title: str
+    persona_target: str
+    theme: str
+    key_message: str
+    value_propositions: List[str]
+    channels: List[str]
+    content_formats: List[str]
+    success_metrics: List[str]
+    predicted_roi: str
+    confidence_interval: str
+    budget_allocation: Dict[str, str]
+
+@dataclass
+class PersonaJourney:
+    stages: List[str]
+    touchpoints: List[str]
+    emotions: List[str]
+    opportunities: List[str]
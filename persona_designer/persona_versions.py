@@ -0,0 +1,137 @@
+"""Versioned persona history kept outside the persona payload"""
+import copy
+from dataclasses import dataclass
+from datetime import datetime
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+from .telemetry import PROVENANCE_KEY
+
+# Refinement bookkeeping that belongs to the history, not to the persona sent to the model
+PERSONA_HISTORY_KEYS = ('refinement_history', 'refinement_feedback', 'last_refinement')
+
+_MISSING = object()
+
+
+def strip_persona_history(data):
+    """Copy of a JSON-like structure without refinement bookkeeping (for prompts)"""
+    if isinstance(data, dict):
+        return {key: strip_persona_history(value) for key, value in data.items() if key not in PERSONA_HISTORY_KEYS}
+    if isinstance(data, list):
+        return [strip_persona_history(value) for value in data]
+    return data
+
+
+@dataclass(frozen=True)
+class PersonaVersion:
+    version: int
+    parent: Optional[int]
+    fields: Mapping[str, Any]
+    feedback: Optional[str]
+    created_at: str
+    changed_fields: Tuple[str, ...]
+
+
+class PersonaVersionStore:
+    """Immutable persona versions per lineage (one lineage per persona slot).
+    A new version reuses its parent's value object for every top-level field that did not change,
+    so a refinement only stores what it changed. Checking out any version is a list index plus a
+    shallow copy of the top-level fields; nested values are shared with the history and must be
+    replaced rather than mutated in place."""
+
+    def __init__(self):
+        self._versions: Dict[str, List[PersonaVersion]] = {}
+        self._heads: Dict[str, int] = {}
+
+    def track(self, persona: Dict) -> str:
+        """Start a lineage with `persona` as version 0 and return its id"""
+        lineage = f"persona-{len(self._versions)}"
+        self._versions[lineage] = []
+        self._append(lineage, persona, None, None)
+        return lineage
+
+    def commit(self, lineage: str, persona: Dict, feedback: Optional[str] = None) -> int:
+        """Add `persona` as a child of the current head, make it the head and return its version number"""
+        return self._append(lineage, persona, self._heads[lineage], feedback)
+
+    def _append(self, lineage: str, persona: Dict, parent: Optional[int], feedback: Optional[str]) -> int:
+        versions = self._versions[lineage]
+        parent_fields = versions[parent].fields if parent is not None else {}
+        fields, changed = {}, []
+        for key, value in persona.items():
+            if key in PERSONA_HISTORY_KEYS:
+                continue
+            previous = parent_fields.get(key, _MISSING)
+            if previous is not _MISSING and previous == value:
+                fields[key] = previous
+            else:
+                fields[key] = copy.deepcopy(value)
+                changed.append(key)
+        changed.extend(key for key in parent_fields if key not in fields)
+        changed = [key for key in changed if key != PROVENANCE_KEY]
+        versions.append(PersonaVersion(
+            version=len(versions),
+            parent=parent,
+            fields=MappingProxyType(fields),
+            feedback=feedback,
+            created_at=datetime.now().isoformat(),
+            changed_fields=tuple(changed) if parent is not None else ()
+        ))
+        self._heads[lineage] = len(versions) - 1
+        return self._heads[lineage]
+
+    def get(self, lineage: str, version: Optional[int] = None) -> Dict:
+        """Persona at `version` (default: the head) without moving the head"""
+        entry = self._versions[lineage][self._heads[lineage] if version is None else version]
+        persona = dict(entry.fields)
+        if persona.get('is_refined'):
+            persona['last_refinement'] = entry.created_at
+        return persona
+
+    def checkout(self, lineage: str, version: int) -> Dict:
+        """Make `version` the head (later refinements branch from it) and return its persona"""
+        if not 0 <= version < len(self._versions[lineage]):
+            raise KeyError(f"{lineage} has no version {version}")
+        self._heads[lineage] = version
+        return self.get(lineage)
+
+    def head(self, lineage: str) -> int:
+        return self._heads[lineage]
+
+    def heads(self) -> Tuple[Tuple[str, int], ...]:
+        """(lineage, head version) for every lineage; identifies the current set of personas"""
+        return tuple(sorted(self._heads.items()))
+
+    def refinement_count(self, lineage: str) -> int:
+        """Refinements between version 0 and the head"""
+        versions, count = self._versions[lineage], 0
+        version = versions[self._heads[lineage]]
+        while version.parent is not None:
+            count += 1
+            version = versions[version.parent]
+        return count
+
+    def history(self, lineage: str) -> List[Dict]:
+        """Version metadata, oldest first, without the persona fields"""
+        head = self._heads[lineage]
+        return [{
+            'version': v.version,
+            'parent': v.parent,
+            'feedback': v.feedback,
+            'created_at': v.created_at,
+            'changed_fields': list(v.changed_fields),
+            'source': (v.fields.get(PROVENANCE_KEY) or {}).get('source'),
+            'is_head': v.version == head
+        } for v in self._versions[lineage]]
+
+    def stats(self) -> Dict:
+        """Versions stored and how many top-level field values they share with an earlier version"""
+        versions = [v for lineage in self._versions.values() for v in lineage]
+        references = sum(len(v.fields) for v in versions)
+        unique = len({id(value) for v in versions for value in v.fields.values()})
+        return {'lineages': len(self._versions), 'versions': len(versions), 'field_references': references,
+                'unique_field_values': unique, 'shared_field_values': references - unique}
+
+    def clear(self):
+        self._versions.clear()
+        self._heads.clear()
@@ -0,0 +1,203 @@
+"""The analysis pipeline and its on-disk stage checkpoints"""
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from . import fallbacks
+from .run_store import RUN_PAYLOAD_FIELDS, RunStore
+from .similarity import merge_similar_personas
+from .utils import fingerprint
+from .telemetry import (PROVENANCE_KEY, classify_fallback_reason, get_fallback_registry, get_tracer, has_fallback,
+                        is_fallback, provenance)
+
+# Pipeline Checkpoints
+class PipelineCheckpointStore:
+    """Stage outputs on disk at <root>/<run_id>/<stage>.json, tagged with the hash of the run's inputs
+    and of the upstream stage output the stage was built from. A checkpoint is only reused when both
+    are unchanged."""
+    
+    def __init__(self, root: str):
+        self.root = root
+    
+    def _path(self, run_id: str, stage: str) -> str:
+        return os.path.join(self.root, run_id, f"{stage}.json")
+    
+    def load(self, run_id: str, stage: str, input_hash: str, upstream_hash: Optional[str] = None):
+        """Saved stage output, or None if missing, unreadable or produced from different inputs
+        (or, when `upstream_hash` is given, from a different upstream stage output)"""
+        try:
+            with open(self._path(run_id, stage), encoding='utf-8') as f:
+                checkpoint = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if checkpoint.get('input_hash') != input_hash:
+            return None
+        if upstream_hash is not None and checkpoint.get('upstream_hash') != upstream_hash:
+            return None
+        return checkpoint.get('result')
+    
+    def save(self, run_id: str, stage: str, input_hash: str, result, upstream_hash: Optional[str] = None):
+        """Write atomically so a crash mid-write never leaves a truncated checkpoint"""
+        path = self._path(run_id, stage)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'stage': stage,
+                'input_hash': input_hash,
+                'upstream_hash': upstream_hash,
+                'saved_at': datetime.now().isoformat(),
+                'result': result
+            }, f, default=str)
+        os.replace(tmp_path, path)
+    
+    def completed_stages(self, run_id: str, input_hash: str) -> List[str]:
+        return [stage for stage in PIPELINE_STAGES if self.load(run_id, stage, input_hash) is not None]
+    
+    def clear(self, run_id: str):
+        for stage in PIPELINE_STAGES:
+            try:
+                os.remove(self._path(run_id, stage))
+            except FileNotFoundError:
+                pass
+
+# Analysis Pipeline
+PIPELINE_STAGES = ('analysis', 'personas', 'campaigns', 'competitor_analysis', 'ab_tests')
+PIPELINE_DEFAULTS = {
+    'competitor_analysis': True,
+    'ab_testing': True,
+    'journey_maps': True,
+    'merge_personas': True,
+    'merge_threshold': 0.8
+}
+
+def pipeline_input_hash(ai_engine, customer_data: str, product_info: str, num_personas: int, options: Dict) -> str:
+    """Identity of a run's inputs; checkpoints from a different hash are never resumed"""
+    return fingerprint({
+        'model': getattr(ai_engine, 'model_name', None),
+        'customer_data': customer_data,
+        'product_info': product_info,
+        'num_personas': num_personas,
+        'options': options
+    })
+
+def run_pipeline(ai_engine, customer_data: str, product_info: str, num_personas: int = 3,
+                 options: Optional[Dict] = None, on_stage=None,
+                 checkpoints: Optional[PipelineCheckpointStore] = None, run_id: Optional[str] = None,
+                 run_store: Optional[RunStore] = None, user_id: str = 'local', reuse_stored: bool = True) -> Dict:
+    """Run analysis → personas → campaigns → optional extras.
+    A stage that raises falls back to default data so the run always completes.
+    `on_stage(stage, error)` is called as each stage finishes (error is None on success).
+    With a checkpoint store, each successful stage is saved under `run_id` and a re-run
+    with the same inputs resumes from the saved stages instead of calling the model again.
+    A stage is only resumed when the upstream output it was built from is unchanged, and a stage
+    built on fallback data is never saved, so regenerating an earlier stage recomputes what follows.
+    Stages whose result is fallback data are reported in `fallback_stages` with their reason.
+    With a run store, the finished run is saved under `stored_run_id`; when `reuse_stored` is set
+    and the store already holds a run for identical inputs without fallback data, that run is
+    returned (`served_from_store` is True) and the model is not called at all."""
+    options = {**PIPELINE_DEFAULTS, **(options or {})}
+    input_hash = pipeline_input_hash(ai_engine, customer_data, product_info, num_personas, options)
+    configuration = {
+        'competitor_analysis': options['competitor_analysis'],
+        'ab_testing': options['ab_testing'],
+        'journey_maps': options['journey_maps']
+    }
+    if run_store is not None and reuse_stored:
+        stored_run_id = run_store.find_by_input(input_hash, user_id)
+        stored = run_store.load(stored_run_id) if stored_run_id else None
+        if stored is not None:
+            get_tracer().count('pipeline.served_from_store')
+            return {
+                **{field: stored[field] for field in RUN_PAYLOAD_FIELDS},
+                'additional_results': stored['additional_results'] or {},
+                'persona_merges': stored['persona_merges'] or [],
+                'run_id': run_id or input_hash[:16],
+                'resumed_stages': [],
+                'fallback_stages': {},
+                'configuration': configuration,
+                'stored_run_id': stored_run_id,
+                'served_from_store': True
+            }
+    run_id = run_id or input_hash[:16]
+    resumed_stages = []
+    fallback_stages = {}  # stage -> fallback reason
+    tracer = get_tracer()
+    stage_fallbacks = {
+        'analysis': fallbacks.get_fallback_analysis,
+        'personas': lambda: fallbacks.get_fallback_personas(num_personas),
+        'campaigns': fallbacks.get_fallback_campaigns,
+        'competitor_analysis': lambda: None,
+        'ab_tests': lambda: None
+    }
+    
+    def stage(name, fn, upstream=None):
+        upstream_hash = fingerprint(upstream)
+        if checkpoints is not None:
+            saved = checkpoints.load(run_id, name, input_hash, upstream_hash)
+            if saved is not None:
+                resumed_stages.append(name)
+                tracer.count('pipeline.resumed_stages')
+                if on_stage:
+                    on_stage(name, None)
+                return saved
+        try:
+            with tracer.span(f'pipeline.{name}', run_id=run_id):
+                result, error = fn(), None
+        except Exception as e:
+            result, error = stage_fallbacks[name](), e
+            reason = classify_fallback_reason(e)
+            get_fallback_registry().record_fallback(f'pipeline.{name}', reason, e)
+            if isinstance(result, dict):
+                # Shallow copy of the shared read-only fallback data, just to carry the provenance
+                result = {**result, PROVENANCE_KEY: {'source': 'fallback', 'method': f'pipeline.{name}',
+                                                     'reason': reason, 'generated_at': datetime.now().isoformat()}}
+        if is_fallback(result):
+            fallback_stages[name] = provenance(result).get('reason')
+        elif checkpoints is not None and error is None and result is not None and not has_fallback(upstream):
+            # Fallback data, and results built on it, are never checkpointed, so a resumed run
+            # retries the model for them
+            checkpoints.save(run_id, name, input_hash, result, upstream_hash)
+        if on_stage:
+            on_stage(name, error)
+        return result
+    
+    analysis = stage('analysis', lambda: ai_engine.analyze_customer_data(customer_data, product_info))
+    personas = stage('personas', lambda: ai_engine.create_personas(analysis, num_personas), analysis)
+    persona_merges = []
+    if options['merge_personas']:
+        personas, persona_merges = merge_similar_personas(personas, options['merge_threshold'])
+    campaigns = stage('campaigns', lambda: ai_engine.create_campaigns(personas), personas)
+    
+    additional_results = {}
+    if options['competitor_analysis']:
+        competitor_analysis = stage('competitor_analysis', lambda: ai_engine.generate_competitor_analysis(personas),
+                                    personas)
+        if competitor_analysis:
+            additional_results['competitor_analysis'] = competitor_analysis
+    if options['ab_testing'] and campaigns and campaigns.get('campaigns'):
+        ab_tests = stage('ab_tests', lambda: ai_engine.generate_ab_test_ideas(campaigns['campaigns'][0]),
+                         campaigns['campaigns'][0])
+        if ab_tests:
+            additional_results['ab_tests'] = ab_tests
+    
+    results = {
+        'analysis': analysis,
+        'personas': personas,
+        'campaigns': campaigns,
+        'additional_results': additional_results,
+        'persona_merges': persona_merges,
+        'run_id': run_id,
+        'resumed_stages': resumed_stages,
+        'fallback_stages': fallback_stages,
+        'configuration': configuration,
+        'stored_run_id': None,
+        'served_from_store': False
+    }
+    if run_store is not None:
+        results['stored_run_id'] = run_store.save(results, input_hash, user_id=user_id,
+                                                  model=getattr(ai_engine, 'model_name', None),
+                                                  num_personas=num_personas)
+    return results
@@ -0,0 +1,265 @@
+"""Streaming report writer: the analysis report as Markdown, HTML or print-ready HTML"""
+import functools
+import html
+import io
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+from .telemetry import get_tracer
+from .utils import fingerprint
+
+REPORT_TITLE = "🎯 AI Marketing Persona & Campaign Analysis Report"
+REPORT_TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+# Stands in for the "Generated" time in cached reports; replaced each time a report is served
+_GENERATED_AT_SLOT = '\x00generated_at\x00'
+
+STRATEGIC_RECOMMENDATIONS = [
+    ("Persona Refinement", "Continuously gather customer feedback to refine personas"),
+    ("A/B Testing", "Test campaign variations to optimize performance"),
+    ("Cross-Channel Integration", "Ensure consistent messaging across all channels"),
+    ("Performance Monitoring", "Track key metrics and adjust strategies accordingly"),
+    ("Personalization", "Use persona insights to create highly targeted content")
+]
+
+
+class MarkdownReportRenderer:
+    """Report building blocks as Markdown"""
+    extension = 'md'
+    mime = 'text/markdown'
+
+    def begin(self, title: str) -> str:
+        return ""
+
+    def end(self) -> str:
+        return ""
+
+    def heading(self, level: int, text: str) -> str:
+        return f"{'#' * level} {text}\n" + ("\n" if level < 3 else "")
+
+    def paragraph(self, text: str) -> str:
+        return f"{text}\n\n"
+
+    def tagline(self, text: str) -> str:
+        return f"*{text}*\n\n"
+
+    def fields(self, items: List[Tuple[str, str]]) -> str:
+        return "".join(f"**{label}:** {value}\n" for label, value in items) + "\n"
+
+    def bullets(self, title: str, items: List[str]) -> str:
+        return f"**{title}:**\n" + "".join(f"- {item}\n" for item in items) + "\n"
+
+    def numbered(self, items: List[Tuple[str, str]]) -> str:
+        return "".join(f"{i}. **{label}:** {text}\n" for i, (label, text) in enumerate(items, 1)) + "\n"
+
+    def begin_item(self) -> str:
+        return ""
+
+    def end_item(self) -> str:
+        return "---\n\n"
+
+    def footer(self, lines: List[str]) -> str:
+        return "---\n" + "\n".join(f"*{line}*" for line in lines)
+
+
+class HtmlReportRenderer:
+    """Report building blocks as a standalone HTML page; `print_layout` adds page breaks and
+    a print stylesheet so the page can be saved as PDF from the browser"""
+    extension = 'html'
+    mime = 'text/html'
+
+    SCREEN_CSS = """
+    body { font-family: -apple-system, 'Segoe UI', Roboto, sans-serif; max-width: 960px; margin: 2rem auto; padding: 0 1rem; color: #222; line-height: 1.5; }
+    h1 { color: #667eea; } h2 { border-bottom: 2px solid #667eea; padding-bottom: 0.3rem; }
+    .item { border: 1px solid #e0e0e0; border-radius: 8px; padding: 0.5rem 1.2rem; margin: 1rem 0; }
+    .tagline { font-style: italic; color: #555; }
+    dl.fields { display: grid; grid-template-columns: max-content 1fr; gap: 0.2rem 1rem; } dl.fields dt { font-weight: bold; }
+    footer { margin-top: 2rem; color: #777; font-style: italic; }
+    """
+    PRINT_CSS = """
+    @page { size: A4; margin: 18mm; }
+    body { max-width: none; margin: 0; font-size: 11pt; }
+    h2 { page-break-before: always; } h2:first-of-type { page-break-before: avoid; }
+    .item { page-break-inside: avoid; border: none; border-bottom: 1px solid #ccc; border-radius: 0; }
+    """
+
+    def __init__(self, print_layout: bool = False):
+        self.print_layout = print_layout
+
+    def begin(self, title: str) -> str:
+        css = self.SCREEN_CSS + (self.PRINT_CSS if self.print_layout else "")
+        return (f"<!DOCTYPE html>\n<html lang=\"en\">\n<head>\n<meta charset=\"utf-8\">\n"
+                f"<title>{html.escape(title)}</title>\n<style>{css}</style>\n</head>\n<body>\n")
+
+    def end(self) -> str:
+        return "</body>\n</html>\n"
+
+    def heading(self, level: int, text: str) -> str:
+        return f"<h{level}>{html.escape(text)}</h{level}>\n"
+
+    def paragraph(self, text: str) -> str:
+        return f"<p>{html.escape(text)}</p>\n"
+
+    def tagline(self, text: str) -> str:
+        return f"<p class=\"tagline\">{html.escape(text)}</p>\n"
+
+    def fields(self, items: List[Tuple[str, str]]) -> str:
+        rows = "".join(f"<dt>{html.escape(label)}</dt><dd>{html.escape(str(value))}</dd>" for label, value in items)
+        return f"<dl class=\"fields\">{rows}</dl>\n"
+
+    def bullets(self, title: str, items: List[str]) -> str:
+        rows = "".join(f"<li>{html.escape(str(item))}</li>" for item in items)
+        return f"<p><strong>{html.escape(title)}:</strong></p>\n<ul>{rows}</ul>\n"
+
+    def numbered(self, items: List[Tuple[str, str]]) -> str:
+        rows = "".join(f"<li><strong>{html.escape(label)}:</strong> {html.escape(text)}</li>" for label, text in items)
+        return f"<ol>{rows}</ol>\n"
+
+    def begin_item(self) -> str:
+        return "<section class=\"item\">\n"
+
+    def end_item(self) -> str:
+        return "</section>\n"
+
+    def footer(self, lines: List[str]) -> str:
+        return "<footer>" + "<br>".join(html.escape(line) for line in lines) + "</footer>\n"
+
+
+REPORT_FORMATS = {
+    'markdown': MarkdownReportRenderer,
+    'html': HtmlReportRenderer,
+    'print_html': lambda: HtmlReportRenderer(print_layout=True)
+}
+
+
+def _format_confidence(confidence) -> str:
+    return f"{confidence:.0%}" if isinstance(confidence, (int, float)) else str(confidence)
+
+
+def iter_report(personas_data: Optional[Dict], campaigns_data: Optional[Dict], analysis_data: Optional[Dict] = None,
+                fmt: str = 'markdown', generated_at: Union[datetime, str, None] = None) -> Iterator[str]:
+    """Yield the report one section at a time; memory use does not grow with the number of
+    personas and campaigns, so batch reports can be streamed straight to a file or response.
+    `generated_at` defaults to now; a string is written as-is."""
+    if fmt not in REPORT_FORMATS:
+        raise ValueError(f"Unknown report format '{fmt}' (expected one of: {', '.join(REPORT_FORMATS)})")
+    r = REPORT_FORMATS[fmt]()
+    personas = (personas_data or {}).get('personas', [])
+    campaigns = (campaigns_data or {}).get('campaigns', [])
+
+    yield r.begin(REPORT_TITLE)
+    yield r.heading(1, REPORT_TITLE)
+    if not isinstance(generated_at, str):
+        generated_at = (generated_at or datetime.now()).strftime(REPORT_TIME_FORMAT)
+    yield r.fields([
+        ("Generated", generated_at),
+        ("AI Engine", "Google Gemini Pro"),
+        ("Analysis Type", "Comprehensive Customer Intelligence")
+    ])
+
+    # Executive Summary
+    yield r.heading(2, "📊 Executive Summary")
+    yield r.paragraph(f"This report presents {len(personas)} detailed customer personas and {len(campaigns)} "
+                      "strategic marketing campaigns generated through AI analysis of customer research data.")
+
+    # Personas Section
+    yield r.heading(2, "👥 Customer Personas")
+    for i, persona in enumerate(personas):
+        name = persona.get('name', f'Persona {i+1}')
+        chunk = [r.begin_item(), r.heading(3, f"{name} ✨ (Refined)" if persona.get('is_refined', False) else name),
+                 r.tagline(persona.get('tagline', 'Marketing persona'))]
+        demographics = persona.get('demographics', {})
+        chunk.append(r.bullets("Demographics", [
+            f"Age: {demographics.get('age_range', 'N/A')}",
+            f"Income: {demographics.get('income_range', 'N/A')}",
+            f"Education: {demographics.get('education', 'N/A')}",
+            f"Location: {demographics.get('location', 'N/A')}"
+        ]))
+        if persona.get('pain_points'):
+            chunk.append(r.bullets("Key Pain Points", persona['pain_points'][:3]))
+        if persona.get('goals'):
+            chunk.append(r.bullets("Primary Goals", persona['goals'][:3]))
+        chunk.append(r.fields([("Business Metrics",
+                                f"Confidence: {_format_confidence(persona.get('confidence_score', 0.85))}, "
+                                f"Market Size: {persona.get('market_size', '25%')}")]))
+        chunk.append(r.end_item())
+        yield "".join(chunk)
+
+    # Campaigns Section
+    yield r.heading(2, "🚀 Campaign Strategies")
+    for i, campaign in enumerate(campaigns):
+        chunk = [r.begin_item(), r.heading(3, campaign.get('title', f'Campaign {i+1}')), r.fields([
+            ("Target Persona", campaign.get('persona_target', 'Target Audience')),
+            ("Campaign Theme", campaign.get('theme', 'Campaign Theme')),
+            ("Expected ROI", campaign.get('predicted_roi', 'N/A'))
+        ])]
+        if campaign.get('key_message'):
+            chunk.append(r.fields([("Key Message", campaign['key_message'])]))
+        if campaign.get('channels'):
+            chunk.append(r.fields([("Primary Channels", ', '.join(campaign['channels'][:4]))]))
+        chunk.append(r.end_item())
+        yield "".join(chunk)
+
+    # Recommendations
+    yield r.heading(2, "💡 Strategic Recommendations")
+    yield r.numbered(STRATEGIC_RECOMMENDATIONS)
+    yield r.footer(["Report generated by AI Marketing Persona Designer",
+                    "Powered by Google Gemini Pro for advanced customer intelligence"])
+    yield r.end()
+
+
+def write_report(stream, personas_data: Optional[Dict], campaigns_data: Optional[Dict],
+                 analysis_data: Optional[Dict] = None, fmt: str = 'markdown',
+                 generated_at: Union[datetime, str, None] = None) -> int:
+    """Stream the report into a text file-like object and return the characters written"""
+    written = 0
+    with get_tracer().span('report.write', format=fmt):
+        for chunk in iter_report(personas_data, campaigns_data, analysis_data, fmt, generated_at):
+            written += stream.write(chunk)
+    return written
+
+
+class ReportCache:
+    """Rendered reports keyed by the fingerprint of their inputs and format (LRU, thread-safe).
+    Cached reports leave the "Generated" time open; it is filled in when a report is served."""
+
+    def __init__(self, max_entries: int = 32):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_render(self, personas_data, campaigns_data, analysis_data=None, fmt: str = 'markdown',
+                      generated_at: Optional[datetime] = None) -> str:
+        key = fingerprint({'format': fmt, 'personas': personas_data, 'campaigns': campaigns_data,
+                           'analysis': analysis_data})
+        with self._lock:
+            report = self._entries.get(key)
+            if report is not None:
+                self._entries.move_to_end(key)
+        get_tracer().count(f"report_cache.{'miss' if report is None else 'hit'}")
+        if report is None:
+            buffer = io.StringIO()
+            write_report(buffer, personas_data, campaigns_data, analysis_data, fmt, _GENERATED_AT_SLOT)
+            report = buffer.getvalue()
+            with self._lock:
+                self._entries[key] = report
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return report.replace(_GENERATED_AT_SLOT, (generated_at or datetime.now()).strftime(REPORT_TIME_FORMAT), 1)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+@functools.lru_cache(maxsize=None)
+def get_report_cache() -> ReportCache:
+    """Process-wide report cache"""
+    return ReportCache()
+
+
+def render_report(personas_data, campaigns_data, analysis_data=None, fmt: str = 'markdown',
+                  generated_at: Optional[datetime] = None) -> str:
+    """The complete report as one string, served from the process-wide cache when the inputs are unchanged"""
+    return get_report_cache().get_or_render(personas_data, campaigns_data, analysis_data, fmt, generated_at)
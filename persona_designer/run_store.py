@@ -0,0 +1,181 @@
+"""SQLite store of completed pipeline runs, indexed by user, time and input hash"""
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional
+
+from .telemetry import has_fallback, strip_provenance
+
+RUN_PAYLOAD_FIELDS = ('analysis', 'personas', 'campaigns', 'additional_results', 'persona_merges')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    input_hash TEXT NOT NULL,
+    model TEXT,
+    num_personas INTEGER,
+    personas_count INTEGER,
+    campaigns_count INTEGER,
+    has_fallback INTEGER NOT NULL DEFAULT 0,
+    fallback_stages TEXT,
+    configuration TEXT
+);
+CREATE INDEX IF NOT EXISTS runs_by_user ON runs (user_id, created_at DESC);
+CREATE INDEX IF NOT EXISTS runs_by_input ON runs (input_hash, created_at DESC);
+CREATE TABLE IF NOT EXISTS run_payloads (
+    run_id TEXT PRIMARY KEY REFERENCES runs (run_id) ON DELETE CASCADE,
+    analysis TEXT,
+    personas TEXT,
+    campaigns TEXT,
+    additional_results TEXT,
+    persona_merges TEXT
+);
+"""
+
+_SUMMARY_COLUMNS = ('run_id', 'user_id', 'created_at', 'input_hash', 'model', 'num_personas', 'personas_count',
+                    'campaigns_count', 'has_fallback', 'fallback_stages', 'configuration')
+
+
+class RunStore:
+    """Completed runs in one SQLite file. Run metadata and payloads live in separate tables so
+    listing history never reads or decodes the (large) analysis/persona/campaign JSON."""
+
+    def __init__(self, path: str):
+        self.path = path
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            if path != ':memory:':
+                self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('PRAGMA foreign_keys=ON')
+            self._conn.executescript(_SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    @staticmethod
+    def _summary(row) -> Dict:
+        summary = {column: row[column] for column in _SUMMARY_COLUMNS}
+        summary['has_fallback'] = bool(summary['has_fallback'])
+        summary['fallback_stages'] = json.loads(summary['fallback_stages'] or '{}')
+        summary['configuration'] = json.loads(summary['configuration'] or '{}')
+        return summary
+
+    def save(self, results: Dict, input_hash: str, user_id: str = 'local', model: Optional[str] = None,
+             num_personas: Optional[int] = None) -> str:
+        """Store a `run_pipeline` result and return its new run id"""
+        run_id = uuid.uuid4().hex[:16]
+        personas = results.get('personas') or {}
+        campaigns = results.get('campaigns') or {}
+        fallback_stages = results.get('fallback_stages') or {}
+        with self._lock, self._conn:
+            self._conn.execute(
+                'INSERT INTO runs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (run_id, user_id, time.time(), input_hash, model, num_personas,
+                 len(personas.get('personas', [])), len(campaigns.get('campaigns', [])),
+                 int(bool(fallback_stages) or any(has_fallback(results.get(f)) for f in RUN_PAYLOAD_FIELDS)),
+                 json.dumps(fallback_stages), json.dumps(results.get('configuration') or {}))
+            )
+            self._conn.execute(
+                'INSERT INTO run_payloads VALUES (?, ?, ?, ?, ?, ?)',
+                (run_id, *(json.dumps(results.get(field), default=str) for field in RUN_PAYLOAD_FIELDS))
+            )
+        return run_id
+
+    def get(self, run_id: str) -> Optional[Dict]:
+        """Run metadata without the payload"""
+        with self._lock:
+            row = self._conn.execute('SELECT * FROM runs WHERE run_id = ?', (run_id,)).fetchone()
+        return self._summary(row) if row else None
+
+    def load(self, run_id: str) -> Optional[Dict]:
+        """Run metadata plus its analysis, personas, campaigns, additional results and merges"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT * FROM runs JOIN run_payloads USING (run_id) WHERE run_id = ?', (run_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        run = self._summary(row)
+        for field in RUN_PAYLOAD_FIELDS:
+            run[field] = json.loads(row[field]) if row[field] is not None else None
+        return run
+
+    def find_by_input(self, input_hash: str, user_id: Optional[str] = None) -> Optional[str]:
+        """Id of the newest run without fallback data for these inputs, or None"""
+        query = 'SELECT run_id FROM runs WHERE input_hash = ? AND has_fallback = 0'
+        params = [input_hash]
+        if user_id is not None:
+            query += ' AND user_id = ?'
+            params.append(user_id)
+        with self._lock:
+            row = self._conn.execute(query + ' ORDER BY created_at DESC LIMIT 1', params).fetchone()
+        return row['run_id'] if row else None
+
+    def list_runs(self, user_id: Optional[str] = None, limit: int = 50, before: Optional[float] = None) -> List[Dict]:
+        """Newest-first run metadata; pass the last `created_at` as `before` for the next page"""
+        query, params = 'SELECT * FROM runs', []
+        clauses = []
+        if user_id is not None:
+            clauses.append('user_id = ?')
+            params.append(user_id)
+        if before is not None:
+            clauses.append('created_at < ?')
+            params.append(before)
+        if clauses:
+            query += ' WHERE ' + ' AND '.join(clauses)
+        query += ' ORDER BY created_at DESC LIMIT ?'
+        params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [self._summary(row) for row in rows]
+
+    def delete(self, run_id: str) -> bool:
+        with self._lock, self._conn:
+            deleted = self._conn.execute('DELETE FROM runs WHERE run_id = ?', (run_id,)).rowcount
+        return bool(deleted)
+
+    def diff(self, run_a: str, run_b: str) -> Dict:
+        """Personas and campaigns added, removed or changed between two runs, matched by name/title"""
+        a, b = self.load(run_a), self.load(run_b)
+        if a is None or b is None:
+            raise KeyError(run_a if a is None else run_b)
+        return {
+            'run_a': run_a,
+            'run_b': run_b,
+            'same_inputs': a['input_hash'] == b['input_hash'],
+            'personas': _diff_items((a['personas'] or {}).get('personas', []),
+                                    (b['personas'] or {}).get('personas', []), 'name'),
+            'campaigns': _diff_items((a['campaigns'] or {}).get('campaigns', []),
+                                     (b['campaigns'] or {}).get('campaigns', []), 'title'),
+            'analysis_changed': sorted(_changed_fields(a['analysis'] or {}, b['analysis'] or {}))
+        }
+
+
+def _changed_fields(a: Dict, b: Dict) -> List[str]:
+    a, b = strip_provenance(a), strip_provenance(b)
+    return [key for key in set(a) | set(b) if a.get(key) != b.get(key)]
+
+
+def _diff_items(items_a: List[Dict], items_b: List[Dict], key: str) -> Dict:
+    by_key_a = {item.get(key, f'#{i}'): item for i, item in enumerate(items_a)}
+    by_key_b = {item.get(key, f'#{i}'): item for i, item in enumerate(items_b)}
+    changed = {}
+    for name in by_key_a.keys() & by_key_b.keys():
+        fields = _changed_fields(by_key_a[name], by_key_b[name])
+        if fields:
+            changed[name] = sorted(fields)
+    return {
+        'added': [name for name in by_key_b if name not in by_key_a],
+        'removed': [name for name in by_key_a if name not in by_key_b],
+        'changed': changed
+    }
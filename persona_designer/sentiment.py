@@ -0,0 +1,88 @@
+"""Lexicon-based sentiment scoring of customer feedback and journey emotions"""
+import functools
+import re
+from bisect import bisect_right
+from typing import Dict, List
+
+import numpy as np
+
+SENTIMENT_WEIGHTS = {
+    # Positive
+    'excited': 1.5, 'exciting': 1.5, 'thrilled': 2.0, 'delighted': 2.0, 'love': 2.0, 'loves': 2.0, 'loved': 2.0,
+    'happy': 1.5, 'glad': 1.0, 'pleased': 1.0, 'satisfied': 1.5, 'confident': 1.5, 'proud': 1.5, 'hopeful': 1.0,
+    'optimistic': 1.0, 'curious': 0.5, 'interested': 0.5, 'intrigued': 0.5, 'eager': 1.0, 'motivated': 1.0,
+    'relieved': 1.5, 'reassured': 1.0, 'empowered': 1.5, 'inspired': 1.5, 'grateful': 1.5, 'impressed': 1.5,
+    'trust': 1.0, 'trusted': 1.0, 'reliable': 1.0, 'loyal': 1.5, 'calm': 1.0, 'comfortable': 1.0, 'accomplished': 1.5,
+    'valued': 1.0, 'supported': 1.0, 'productive': 1.0, 'efficient': 1.0, 'easy': 1.0, 'intuitive': 1.0,
+    'helpful': 1.0, 'fantastic': 2.0, 'excellent': 2.0, 'amazing': 2.0, 'great': 1.5, 'good': 1.0, 'awesome': 2.0,
+    'wonderful': 2.0, 'perfect': 2.0, 'recommend': 1.5, 'game-changer': 2.0, 'game-changers': 2.0, 'worth it': 1.5,
+    'peace of mind': 1.5, 'at ease': 1.0, 'improved': 1.0, 'saves time': 1.5, 'affordable': 0.5,
+    # Negative
+    'anxious': -1.5, 'worried': -1.5, 'nervous': -1.0, 'stressed': -1.5, 'stressful': -1.5, 'frustrated': -1.5,
+    'frustrating': -1.5, 'annoyed': -1.0, 'annoying': -1.0, 'angry': -2.0, 'furious': -2.0, 'disappointed': -1.5,
+    'disappointing': -1.5, 'overwhelmed': -1.5, 'overwhelming': -1.5, 'confused': -1.0, 'confusing': -1.0,
+    'skeptical': -1.0, 'doubtful': -1.0, 'uncertain': -1.0, 'hesitant': -1.0, 'unsure': -0.5, 'impatient': -1.0,
+    'bored': -1.0, 'tedious': -1.0, 'tired': -1.0, 'exhausted': -1.5, 'burned out': -2.0, 'burnt out': -2.0,
+    'regret': -1.5, 'distrust': -1.5, 'betrayed': -2.0, 'helpless': -1.5, 'lost': -1.0, 'stuck': -1.0,
+    'difficult': -1.0, 'hard to': -1.0, 'complicated': -1.0, 'clunky': -1.0, 'slow': -1.0, 'buggy': -1.5,
+    'broken': -1.5, 'expensive': -1.0, 'overpriced': -1.5, 'terrible': -2.0, 'awful': -2.0, 'bad': -1.0,
+    'poor': -1.0, 'hate': -2.0, 'hates': -2.0, 'problem': -0.5, 'problems': -0.5, 'issue': -0.5, 'issues': -0.5,
+    'waste of time': -2.0, 'fed up': -1.5, 'let down': -1.5, 'pain': -1.0, 'struggle': -1.0, 'struggling': -1.0,
+}
+SENTIMENT_NEGATIONS = ('not', 'no', 'never', 'hardly', 'barely', 'without', "isn't", "wasn't", "aren't", "don't",
+                       "doesn't", "didn't", "can't", "cannot", "won't", 'less')
+
+class SentimentLexicon:
+    """Weighted lexicon compiled once into a single alternation regex.
+    Terms match on word boundaries, longest first; a negation up to two words before a term flips its sign."""
+    
+    SEPARATOR = ' | '
+    
+    def __init__(self, weights: Dict[str, float], negations=SENTIMENT_NEGATIONS, negation_window: int = 2):
+        self.weights = {term.lower(): float(weight) for term, weight in weights.items()}
+        terms = sorted(self.weights, key=len, reverse=True)
+        gap = r"[^\w|.!?;]+"
+        negation = '|'.join(map(re.escape, negations))
+        alternation = '|'.join(r'\s+'.join(map(re.escape, t.split())) for t in terms)
+        self.pattern = re.compile(
+            rf"(?:\b(?P<neg>{negation})(?:{gap}\w+){{0,{negation_window}}}{gap})?\b(?P<term>{alternation})\b",
+            re.IGNORECASE
+        )
+    
+    def _weight(self, match) -> float:
+        weight = self.weights.get(' '.join(match.group('term').lower().split()), 0.0)
+        return -weight if match.group('neg') else weight
+    
+    def score(self, text: str) -> float:
+        """Summed sentiment weight of a single text"""
+        return sum(self._weight(m) for m in self.pattern.finditer(text or ''))
+    
+    def score_many(self, texts: List[str]) -> np.ndarray:
+        """Score many texts with one regex scan over their concatenation"""
+        starts, offset = [], 0
+        for text in texts:
+            starts.append(offset)
+            offset += len(text) + len(self.SEPARATOR)
+        scores = np.zeros(len(texts))
+        for m in self.pattern.finditer(self.SEPARATOR.join(texts)):
+            scores[bisect_right(starts, m.start('term')) - 1] += self._weight(m)
+        return scores
+
+@functools.lru_cache(maxsize=None)
+def get_sentiment_lexicon() -> SentimentLexicon:
+    """Shared scorer, compiled once per process"""
+    return SentimentLexicon(SENTIMENT_WEIGHTS)
+
+def score_review_sentiment(customer_data: str, neutral_band: float = 0.25) -> Dict:
+    """Per-line sentiment of raw customer feedback (one review, quote or survey answer per line)"""
+    reviews = [line.strip() for line in (customer_data or '').splitlines() if len(line.split()) >= 3]
+    if not reviews:
+        return {'reviews': 0}
+    
+    scores = get_sentiment_lexicon().score_many(reviews)
+    return {
+        'reviews': len(reviews),
+        'positive_share': float(np.mean(scores > neutral_band)),
+        'negative_share': float(np.mean(scores < -neutral_band)),
+        'average_score': float(scores.mean())
+    }
@@ -0,0 +1,106 @@
+"""Persona similarity and merging of overlapping personas"""
+import re
+import zlib
+from typing import Dict, List
+
+import numpy as np
+
+from .simulation import _parse_number
+
+PERSONA_SIMILARITY_FIELDS = ('demographics', 'psychographics', 'pain_points', 'goals')
+PERSONA_HASH_FEATURES = 2 ** 14
+_TOKEN_PATTERN = re.compile(r"[a-z0-9$+]+(?:[-'.][a-z0-9]+)*")
+_STOP_WORDS = frozenset(
+    "a an and are as at be by for from in into is it of on or over the to with without their they"
+    " more less than that this those these".split()
+)
+
+def _collect_text(value) -> List[str]:
+    """All string leaves of a persona field (dict keys are shared across personas, so they are skipped)"""
+    if isinstance(value, dict):
+        return [text for item in value.values() for text in _collect_text(item)]
+    if isinstance(value, (list, tuple)):
+        return [text for item in value for text in _collect_text(item)]
+    return [str(value)] if value not in (None, '') else []
+
+def _persona_tokens(persona: Dict) -> List[str]:
+    """Field-scoped unigrams and bigrams, e.g. 'goals:efficiency' or 'goals:work-life balance'"""
+    tokens = []
+    for field in PERSONA_SIMILARITY_FIELDS:
+        for text in _collect_text(persona.get(field)):
+            words = [w for w in _TOKEN_PATTERN.findall(text.lower()) if w not in _STOP_WORDS]
+            tokens.extend(f"{field}:{w}" for w in words)
+            tokens.extend(f"{field}:{a} {b}" for a, b in zip(words, words[1:]))
+    return tokens
+
+def persona_feature_matrix(personas: List[Dict], n_features: int = PERSONA_HASH_FEATURES) -> np.ndarray:
+    """Signed hashing-vectorizer embedding (sublinear TF, L2-normalized), one row per persona"""
+    matrix = np.zeros((len(personas), n_features))
+    for row, persona in enumerate(personas):
+        # crc32 is stable across processes, unlike the salted built-in hash()
+        hashes = np.array([zlib.crc32(token.encode('utf-8')) for token in _persona_tokens(persona)], dtype=np.int64)
+        if hashes.size:
+            signs = np.where(hashes & (1 << 31), -1.0, 1.0)
+            np.add.at(matrix[row], hashes % n_features, signs)
+    matrix = np.sign(matrix) * np.log1p(np.abs(matrix))
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.where(norms == 0, 1, norms)
+
+def persona_similarity_matrix(personas: List[Dict]) -> np.ndarray:
+    """Pairwise cosine similarity between personas"""
+    features = persona_feature_matrix(personas)
+    return np.clip(features @ features.T, -1.0, 1.0)
+
+def _persona_confidence(persona: Dict) -> float:
+    confidence = persona.get('confidence_score', 0.85)
+    if isinstance(confidence, dict):
+        confidence = confidence.get('overall_confidence', 0.85)
+    value = _parse_number(confidence, 0.85)
+    return value / 100 if value > 1 else value
+
+def _merge_persona_group(group: List[Dict]) -> Dict:
+    """Fold near-duplicate personas into the most confident one"""
+    primary = max(group, key=_persona_confidence)
+    merged = dict(primary)
+    for field in ('pain_points', 'goals', 'preferred_channels'):
+        combined = []
+        for persona in [primary] + [p for p in group if p is not primary]:
+            values = persona.get(field, [])
+            for value in ([values] if isinstance(values, str) else values or []):
+                if value not in combined:
+                    combined.append(value)
+        if combined:
+            merged[field] = combined
+    
+    sizes = [_parse_number(p.get('market_size'), None) for p in group if not isinstance(p.get('market_size'), dict)]
+    if sizes and all(size is not None for size in sizes):
+        merged['market_size'] = f"{sum(sizes):g}%"
+    merged['merged_from'] = [p.get('name', 'Unknown Persona') for p in group if p is not primary]
+    return merged
+
+def merge_similar_personas(personas_data: Dict, threshold: float = 0.8) -> tuple:
+    """Merge personas whose similarity is at or above the threshold (transitively).
+    Returns (personas_data with merged personas, list of merged name groups)."""
+    personas = (personas_data or {}).get('personas', [])
+    if len(personas) < 2:
+        return personas_data, []
+    
+    similarity = persona_similarity_matrix(personas)
+    parent = list(range(len(personas)))
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+    for i, j in zip(*np.nonzero(np.triu(similarity >= threshold, k=1))):
+        parent[find(j)] = find(i)
+    
+    groups = {}
+    for i in range(len(personas)):
+        groups.setdefault(find(i), []).append(personas[i])
+    if len(groups) == len(personas):
+        return personas_data, []
+    
+    merged_personas = [group[0] if len(group) == 1 else _merge_persona_group(group) for group in groups.values()]
+    merges = [[p.get('name', 'Unknown Persona') for p in group] for group in groups.values() if len(group) > 1]
+    return {**personas_data, 'personas': merged_personas}, merges
@@ -0,0 +1,239 @@
+"""Local Monte Carlo simulation of campaign performance"""
+import re
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .utils import fingerprint
+
+# Funnel priors per channel family: median CPM (USD), CTR, leads per click, sales per qualified lead,
+# and the spend (USD) at which returns have diminished by ~63% (used by the budget optimizer)
+CHANNEL_PRIORS = {
+    'search': {'cpm': 38.0, 'ctr': 0.035, 'lead_rate': 0.060, 'close_rate': 0.20, 'saturation_spend': 20000.0},
+    'linkedin': {'cpm': 33.0, 'ctr': 0.0065, 'lead_rate': 0.080, 'close_rate': 0.18, 'saturation_spend': 15000.0},
+    'facebook': {'cpm': 12.0, 'ctr': 0.012, 'lead_rate': 0.050, 'close_rate': 0.14, 'saturation_spend': 25000.0},
+    'instagram': {'cpm': 10.0, 'ctr': 0.009, 'lead_rate': 0.040, 'close_rate': 0.12, 'saturation_spend': 20000.0},
+    'tiktok': {'cpm': 9.0, 'ctr': 0.010, 'lead_rate': 0.030, 'close_rate': 0.10, 'saturation_spend': 15000.0},
+    'twitter': {'cpm': 7.0, 'ctr': 0.008, 'lead_rate': 0.030, 'close_rate': 0.10, 'saturation_spend': 10000.0},
+    'video': {'cpm': 11.0, 'ctr': 0.005, 'lead_rate': 0.040, 'close_rate': 0.12, 'saturation_spend': 20000.0},
+    'email': {'cpm': 12.0, 'ctr': 0.020, 'lead_rate': 0.060, 'close_rate': 0.14, 'saturation_spend': 8000.0},
+    'events': {'cpm': 90.0, 'ctr': 0.020, 'lead_rate': 0.150, 'close_rate': 0.18, 'saturation_spend': 10000.0},
+    'community': {'cpm': 6.0, 'ctr': 0.015, 'lead_rate': 0.080, 'close_rate': 0.22, 'saturation_spend': 6000.0},
+    'content': {'cpm': 8.0, 'ctr': 0.020, 'lead_rate': 0.050, 'close_rate': 0.14, 'saturation_spend': 10000.0},
+    'offline': {'cpm': 8.0, 'ctr': 0.002, 'lead_rate': 0.050, 'close_rate': 0.12, 'saturation_spend': 12000.0},
+    'default': {'cpm': 15.0, 'ctr': 0.012, 'lead_rate': 0.050, 'close_rate': 0.15, 'saturation_spend': 15000.0},
+}
+
+# Keyword -> channel family, checked in order against the lower-cased channel name
+CHANNEL_KEYWORDS = [
+    ('linkedin', 'linkedin'), ('google', 'search'), ('search', 'search'), ('sem', 'search'),
+    ('facebook', 'facebook'), ('instagram', 'instagram'), ('tiktok', 'tiktok'), ('twitter', 'twitter'),
+    ('youtube', 'video'), ('video', 'video'), ('email', 'email'), ('newsletter', 'email'),
+    ('webinar', 'events'), ('event', 'events'), ('community', 'community'), ('forum', 'community'),
+    ('partner', 'community'), ('referral', 'community'), ('word', 'community'),
+    ('blog', 'content'), ('seo', 'content'), ('content', 'content'), ('podcast', 'content'),
+    ('radio', 'offline'), ('print', 'offline'), ('publication', 'offline'), ('local', 'offline'),
+]
+
+SIMULATION_DEFAULTS = {
+    'total_budget': 25000.0,
+    'avg_order_value': 400.0,
+    'qualification_rate': 0.5,
+    'rate_concentration': 400.0,  # Beta prior strength; higher = tighter rate uncertainty
+    'cpm_sigma': 0.35,
+    'aov_sigma': 0.45,
+    'frequency': 2.6,
+}
+
+def _channel_family(channel: str) -> str:
+    name = str(channel).lower()
+    for keyword, family in CHANNEL_KEYWORDS:
+        if keyword in name:
+            return family
+    return 'default'
+
+def _campaign_channels(campaign: Dict) -> List[str]:
+    """Campaign channel names, tolerating the list/dict/str shapes the model returns"""
+    channels = campaign.get('channels') or campaign.get('primary_channels') or ['Email', 'Social Media']
+    if isinstance(channels, str):
+        channels = [c.strip() for c in re.split(r'[,;]', channels) if c.strip()] or ['Email', 'Social Media']
+    elif isinstance(channels, dict):
+        channels = list(channels.keys())
+    return [str(c) for c in channels[:6]]
+
+NUMBER_SUFFIXES = {'k': 1e3, 'm': 1e6, 'b': 1e9}
+
+def _parse_number(value, default: Optional[float] = None) -> Optional[float]:
+    """Parse numbers like '40%', '$5,000', '$50K', '$1.2M', '3.2x' or 0.4"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = re.search(r'(-?\d+(?:\.\d+)?)(?:\s?([kmb])(?![a-z]))?', str(value).replace(',', '').lower())
+    if not match:
+        return default
+    return float(match.group(1)) * NUMBER_SUFFIXES.get(match.group(2), 1)
+
+def _campaign_budget_split(campaign: Dict, channels: List[str]) -> np.ndarray:
+    """Budget share per channel from budget_allocation, falling back to an even split"""
+    allocation = campaign.get('budget_allocation') or {}
+    weights = np.zeros(len(channels))
+    if isinstance(allocation, dict):
+        for key, value in allocation.items():
+            share = _parse_number(value)
+            if share is None:
+                continue
+            # Match allocation keys to channels by name, then by channel family
+            for i, channel in enumerate(channels):
+                if key.lower() in channel.lower() or channel.lower() in key.lower() or \
+                        _channel_family(key) == _channel_family(channel) != 'default':
+                    weights[i] += share
+                    break
+    if weights.sum() <= 0:
+        weights = np.ones(len(channels))
+    return weights / weights.sum()
+
+def _resolve_channel_priors(channels: List[str], priors: Optional[Dict]) -> Dict[str, np.ndarray]:
+    """Per-channel prior arrays; model-proposed priors override defaults when plausible"""
+    proposed = (priors or {}).get('channels') or {}
+    bounds = {'cpm': (0.5, 500.0), 'ctr': (1e-4, 0.5), 'lead_rate': (1e-4, 0.9), 'close_rate': (1e-4, 0.9)}
+    resolved = {name: np.empty(len(channels)) for name in bounds}
+    for i, channel in enumerate(channels):
+        base = CHANNEL_PRIORS[_channel_family(channel)]
+        override = proposed.get(channel, {}) if isinstance(proposed, dict) else {}
+        for name, (low, high) in bounds.items():
+            value = _parse_number(override.get(name)) if isinstance(override, dict) else None
+            if value is not None and name != 'cpm' and value > 1:
+                value = value / 100  # '3.5' meaning 3.5%
+            resolved[name][i] = min(high, max(low, value)) if value is not None else base[name]
+    return resolved
+
+def _rate_draws(mean: np.ndarray, concentration: float, z: np.ndarray) -> np.ndarray:
+    """Logit-normal draws of a rate, with spread matched to a Beta(mean, concentration) prior"""
+    mean = np.clip(mean, 1e-4, 1 - 1e-4).astype(np.float32)
+    logit_sd = 1.0 / np.sqrt(mean * (1 - mean) * np.float32(concentration + 1))
+    return 1.0 / (1.0 + np.exp(-(np.log(mean / (1 - mean)) + logit_sd * z)))
+
+def _format_count(value: float) -> str:
+    return f"{int(round(value)):,}"
+
+def simulate_campaign_performance(campaign: Dict, priors: Optional[Dict] = None, total_budget: Optional[float] = None,
+                                  n_trials: int = 100_000, seed: Optional[int] = None) -> Dict:
+    """Vectorized Monte Carlo simulation of impressions -> clicks -> leads -> sales and ROI.
+    Returns the same shape the performance display expects, plus percentile distributions."""
+    started = time.perf_counter()
+    priors = priors or {}
+    settings = dict(SIMULATION_DEFAULTS)
+    for key in ('avg_order_value', 'qualification_rate'):
+        value = _parse_number(priors.get(key))
+        if value is not None and value > 0:
+            settings[key] = value / 100 if key == 'qualification_rate' and value > 1 else value
+    
+    if total_budget is None:
+        total_budget = _parse_number(campaign.get('total_budget', campaign.get('budget')))
+    if total_budget is None or not np.isfinite(total_budget) or total_budget <= 0:
+        # ROI is revenue / budget, so a zero or missing budget would leave every trial undefined
+        total_budget = settings['total_budget']
+    if seed is None:
+        seed = int(fingerprint(campaign)[:8], 16)
+    rng = np.random.default_rng(seed)
+    
+    channels = _campaign_channels(campaign)
+    # float32 throughout keeps the trials x channels arrays small and fast
+    channel_priors = {name: values.astype(np.float32) for name, values in _resolve_channel_priors(channels, priors).items()}
+    spend = (total_budget * _campaign_budget_split(campaign, channels)).astype(np.float32)
+    kappa = settings['rate_concentration']
+    
+    # One block of standard-normal draws per trial and channel drives CPM, the four
+    # funnel rates and sales noise; order value is drawn once per trial.
+    z = rng.standard_normal(size=(6, n_trials, len(channels)), dtype=np.float32)
+    cpm = channel_priors['cpm'] * np.exp(np.float32(settings['cpm_sigma']) * z[0])
+    impressions = spend / cpm * 1000
+    clicks = impressions * _rate_draws(channel_priors['ctr'], kappa, z[1])
+    leads = clicks * _rate_draws(channel_priors['lead_rate'], kappa, z[2])
+    qualified = leads * _rate_draws(np.full(len(channels), settings['qualification_rate'], dtype=np.float32), kappa, z[3])
+    expected_sales = qualified * _rate_draws(channel_priors['close_rate'], kappa, z[4])
+    # Counting noise only matters at the small end of the funnel (normal approximation to Poisson)
+    sales = np.maximum(expected_sales + np.sqrt(expected_sales) * z[5], 0)
+    
+    totals = {
+        'impressions': impressions.sum(axis=1),
+        'clicks': clicks.sum(axis=1),
+        'leads': leads.sum(axis=1),
+        'qualified_leads': qualified.sum(axis=1),
+        'sales': sales.sum(axis=1),
+    }
+    aov = np.float32(settings['avg_order_value']) * np.exp(np.float32(settings['aov_sigma']) * rng.standard_normal(n_trials, dtype=np.float32))
+    totals['revenue'] = totals['sales'] * aov
+    totals['roi'] = totals['revenue'] / np.float32(total_budget)
+    
+    # One vectorized sort of every output gives percentiles and scenario bands
+    names = list(totals)
+    ordered = np.sort(np.stack([totals[name] for name in names]), axis=1)
+    quantile_index = {label: min(n_trials - 1, int(q * n_trials)) for label, q in (('p10', 0.1), ('p50', 0.5), ('p90', 0.9))}
+    percentiles = {
+        name: {**{label: float(ordered[row, idx]) for label, idx in quantile_index.items()}, 'mean': float(totals[name].mean())}
+        for row, name in enumerate(names)
+    }
+    median = {name: stats['p50'] for name, stats in percentiles.items()}
+    
+    # Scenario bands: bottom 20% / middle 60% / top 20% of trials by ROI
+    roi = ordered[names.index('roi')]
+    low_cut, high_cut = int(n_trials * 0.2), int(n_trials * 0.8)
+    scenario_roi = {
+        'conservative': float(roi[:low_cut].mean()),
+        'realistic': median['roi'],
+        'optimistic': float(roi[high_cut:].mean()),
+    }
+    counts, edges = np.histogram(totals['roi'], bins=40)
+    
+    channel_ctr = np.median(clicks / np.maximum(impressions, 1), axis=0)
+    frequency = settings['frequency']
+    
+    return {
+        "reach": {
+            "total_impressions": _format_count(median['impressions']),
+            "unique_reach": _format_count(median['impressions'] / frequency),
+            "frequency": f"{frequency:.1f}"
+        },
+        "engagement": {
+            "overall_rate": f"{median['clicks'] / max(median['impressions'], 1):.2%}",
+            "by_channel": {channel: f"{rate:.2%}" for channel, rate in zip(channels, channel_ctr)}
+        },
+        "conversion_funnel": {
+            "impressions": _format_count(median['impressions']),
+            "clicks": _format_count(median['clicks']),
+            "leads": _format_count(median['leads']),
+            "qualified_leads": _format_count(median['qualified_leads']),
+            "sales": _format_count(median['sales']),
+            "conversion_rate": f"{median['sales'] / max(median['clicks'], 1):.2%}"
+        },
+        "roi_scenarios": {
+            "optimistic": {"roi": f"{scenario_roi['optimistic']:.1f}x", "probability": "20%"},
+            "realistic": {"roi": f"{scenario_roi['realistic']:.1f}x", "probability": "60%"},
+            "conservative": {"roi": f"{scenario_roi['conservative']:.1f}x", "probability": "20%"}
+        },
+        "timeline": {
+            "launch_phase": "Weeks 1-2",
+            "optimization_phase": "Weeks 3-6",
+            "scaling_phase": "Weeks 7-12",
+            "full_roi_expected": "Month 4"
+        },
+        "budget_efficiency": {
+            "cost_per_click": f"${total_budget / max(median['clicks'], 1):,.2f}",
+            "cost_per_lead": f"${total_budget / max(median['leads'], 1):,.2f}",
+            "customer_acquisition_cost": f"${total_budget / max(median['sales'], 1):,.2f}",
+            "return_on_ad_spend": f"{median['roi']:.0%}"
+        },
+        "distributions": {
+            **percentiles,
+            "roi_histogram": {"counts": counts.tolist(), "edges": edges.tolist()}
+        },
+        "simulation": {
+            "trials": n_trials,
+            "seed": seed,
+            "total_budget": total_budget,
+            "budget_split": {channel: round(float(amount), 2) for channel, amount in zip(channels, spend)},
+            "priors_source": "model" if priors.get('channels') else "defaults",
+            "runtime_ms": round((time.perf_counter() - started) * 1000, 1)
+        }
+    }
@@ -0,0 +1,143 @@
+"""Columnar export: personas, campaigns, channel allocations and simulations as typed tables for BI tools"""
+import os
+import tempfile
+import zipfile
+from typing import Dict, Iterable, List
+
+from .lazy_imports import optional_module, pd
+from .simulation import _campaign_channels
+from .telemetry import PROVENANCE_KEY, get_tracer
+
+TABLE_NAMES = ('personas', 'campaigns', 'channel_allocations', 'simulations')
+TABLE_FORMATS = ('parquet', 'csv')
+
+# Distribution summaries kept from each simulation (the ROI histogram is chart data, not a column)
+SIMULATION_METRICS = ('impressions', 'clicks', 'leads', 'qualified_leads', 'sales', 'revenue', 'roi')
+
+
+def _numeric(series: 'pd.Series', percent: bool = False) -> 'pd.Series':
+    """First number in each value ('3.4x', '32%', '$1,200' → 3.4, 32.0, 1200.0); percent strings
+    become fractions when `percent` is set, so 0.85 and '85%' agree"""
+    text = series.astype('string')
+    values = pd.to_numeric(text.str.replace(',', '', regex=False).str.extract(r'(-?\d+(?:\.\d+)?)')[0],
+                           errors='coerce').astype('float64')
+    if percent:
+        is_percent = text.str.contains('%', regex=False).fillna(False).astype(bool)
+        values = values.where(~is_percent, values / 100)
+    return values
+
+
+def _join_lists(frame: 'pd.DataFrame') -> 'pd.DataFrame':
+    """List cells become '; '-separated text (CSV and most BI tools have no list type)"""
+    for column in frame.columns[frame.dtypes == object]:
+        is_list = frame[column].map(lambda value: isinstance(value, list))
+        if is_list.any():
+            frame[column] = frame[column].where(~is_list, frame[column][is_list].map(
+                lambda items: '; '.join(str(item) for item in items)))
+    return frame
+
+
+def _normalize(records: List[Dict], index_columns: List[str], drop_prefixes=()) -> 'pd.DataFrame':
+    frame = pd.json_normalize(records, sep='_') if records else pd.DataFrame(columns=index_columns)
+    frame = frame.drop(columns=[column for column in frame.columns
+                                if any(column.startswith(prefix) for prefix in drop_prefixes)])
+    return _join_lists(frame)
+
+
+def build_result_tables(runs: Iterable[Dict]) -> Dict[str, 'pd.DataFrame']:
+    """Flatten pipeline results into one DataFrame per table.
+    Each run is a dict with `run_id`, `personas` and `campaigns` (the engine's documents) and optionally
+    `allocation` (an `optimize_budget_allocation` result) and `simulations` ({campaign title: simulation}).
+    Records from every run are gathered first and normalized in one pass per table."""
+    persona_records, campaign_records, channel_records, allocation_records, simulation_records = [], [], [], [], []
+    for run in runs:
+        run_id = run.get('run_id')
+        personas_data = run.get('personas') or {}
+        for index, persona in enumerate(personas_data.get('personas', [])):
+            persona_records.append({'run_id': run_id, 'persona_index': index,
+                                    'source': (persona.get(PROVENANCE_KEY) or personas_data.get(PROVENANCE_KEY) or {}).get('source'),
+                                    **{key: value for key, value in persona.items() if key != PROVENANCE_KEY}})
+        campaigns_data = run.get('campaigns') or {}
+        for index, campaign in enumerate(campaigns_data.get('campaigns', [])):
+            title = campaign.get('title', f'Campaign {index + 1}')
+            campaign_records.append({'run_id': run_id, 'campaign_index': index,
+                                     'source': (campaign.get(PROVENANCE_KEY) or campaigns_data.get(PROVENANCE_KEY) or {}).get('source'),
+                                     **{key: value for key, value in campaign.items() if key != PROVENANCE_KEY}})
+            shares = campaign.get('budget_allocation') if isinstance(campaign.get('budget_allocation'), dict) else {}
+            for channel in dict.fromkeys(_campaign_channels(campaign) + list(shares)):
+                channel_records.append({'run_id': run_id, 'campaign': title, 'channel': channel,
+                                        'budget_share': shares.get(channel)})
+        for row in (run.get('allocation') or {}).get('allocations', []):
+            allocation_records.append({'run_id': run_id, 'campaign': row['campaign'], 'channel': row['channel'],
+                                       'optimized_spend': row['spend'],
+                                       'optimized_expected_revenue': row['expected_revenue']})
+        for title, simulation in (run.get('simulations') or {}).items():
+            distributions = simulation.get('distributions') or {}
+            simulation_records.append({
+                'run_id': run_id, 'campaign': title,
+                **{key: value for key, value in (simulation.get('simulation') or {}).items() if key != 'budget_split'},
+                **{metric: distributions[metric] for metric in SIMULATION_METRICS if metric in distributions}
+            })
+
+    with get_tracer().span('tables.normalize', personas=len(persona_records), campaigns=len(campaign_records)):
+        personas = _normalize(persona_records, ['run_id', 'persona_index'])
+        for column in ('confidence_score', 'market_size'):
+            if column in personas:
+                personas[column] = _numeric(personas[column], percent=True)
+        personas['is_refined'] = (personas['is_refined'].fillna(False) if 'is_refined' in personas else False)
+        personas['is_refined'] = personas['is_refined'].astype(bool)
+
+        campaigns = _normalize(campaign_records, ['run_id', 'campaign_index'], drop_prefixes=('budget_allocation',))
+        if 'predicted_roi' in campaigns:
+            campaigns['predicted_roi'] = _numeric(campaigns['predicted_roi'])
+        if 'conversion_rate' in campaigns:
+            campaigns['conversion_rate'] = _numeric(campaigns['conversion_rate'], percent=True)
+
+        channels = pd.DataFrame(channel_records, columns=['run_id', 'campaign', 'channel', 'budget_share'])
+        channels['budget_share'] = _numeric(channels['budget_share'], percent=True)
+        if allocation_records:
+            # Optimizer channels absent from a campaign's own channel list still get a row
+            channels = channels.merge(pd.DataFrame(allocation_records), on=['run_id', 'campaign', 'channel'], how='outer')
+
+        simulations = _normalize(simulation_records, ['run_id', 'campaign'])
+
+    return {'personas': personas, 'campaigns': campaigns, 'channel_allocations': channels, 'simulations': simulations}
+
+
+def resolve_table_format(fmt: str = 'auto') -> str:
+    """'auto' is Parquet when pyarrow is installed, else CSV"""
+    if fmt == 'auto':
+        return 'parquet' if optional_module('pyarrow') is not None else 'csv'
+    if fmt not in TABLE_FORMATS:
+        raise ValueError(f"Unknown table format '{fmt}' (expected auto, {', '.join(TABLE_FORMATS)})")
+    if fmt == 'parquet' and optional_module('pyarrow') is None:
+        raise ValueError("Parquet export needs pyarrow (pip install pyarrow); use the csv format instead")
+    return fmt
+
+
+def write_tables(tables: Dict[str, 'pd.DataFrame'], directory: str, fmt: str = 'auto',
+                 prefix: str = '') -> Dict[str, str]:
+    """Write each table to <directory>/<prefix><name>.parquet|.csv and return the paths by table name"""
+    fmt = resolve_table_format(fmt)
+    os.makedirs(directory, exist_ok=True)
+    paths = {}
+    with get_tracer().span('tables.write', format=fmt):
+        for name, frame in tables.items():
+            path = os.path.join(directory, f"{prefix}{name}.{fmt}")
+            if fmt == 'parquet':
+                frame.to_parquet(path, index=False)
+            else:
+                frame.to_csv(path, index=False)
+            paths[name] = path
+    return paths
+
+
+def export_tables_zip(tables: Dict[str, 'pd.DataFrame'], fmt: str = 'auto') -> str:
+    """Write all tables into one zip in a new temporary file and return its path; the caller deletes it"""
+    with tempfile.TemporaryDirectory(prefix='persona-tables-') as workdir:
+        paths = write_tables(tables, workdir, fmt)
+        with tempfile.NamedTemporaryFile(suffix='.zip', prefix='persona-tables-', delete=False) as f:
+            with zipfile.ZipFile(f, 'w', zipfile.ZIP_DEFLATED) as archive:
+                for path in paths.values():
+                    archive.write(path, os.path.basename(path))
+    return f.name
@@ -0,0 +1,360 @@
+"""Tracing spans, latency histograms, counters and fallback telemetry"""
+import functools
+import json
+import os
+import sys
+import threading
+import time
+import urllib.request
+from bisect import bisect_left
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+import numpy as np
+
+TRACE_SERVICE_NAME = 'ai-marketing-persona-designer'
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+class Tracer:
+    """In-process spans, latency histograms and counters.
+    Spans nest per thread; finished spans are kept in a bounded buffer and can be exported
+    as JSON lines or as OTLP/HTTP JSON to a local OpenTelemetry collector."""
+    
+    def __init__(self, max_spans: int = 5000, samples_per_name: int = 512):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.spans = deque(maxlen=max_spans)
+        self.histograms = {}  # span name -> bucket counts (last bucket is overflow)
+        self.samples = {}     # span name -> recent durations for percentiles
+        self.counters = defaultdict(float)
+        self.samples_per_name = samples_per_name
+    
+    @contextmanager
+    def span(self, name: str, **attributes):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        parent = stack[-1] if stack else None
+        record = {
+            'name': name,
+            'trace_id': parent['trace_id'] if parent else os.urandom(16).hex(),
+            'span_id': os.urandom(8).hex(),
+            'parent_span_id': parent['span_id'] if parent else None,
+            'start_unix_ns': time.time_ns(),
+            'attributes': dict(attributes),
+            'status': 'ok'
+        }
+        stack.append(record)
+        started = time.perf_counter_ns()
+        try:
+            yield record
+        except BaseException as e:
+            record['status'] = 'error'
+            record['error'] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            duration_ns = time.perf_counter_ns() - started
+            stack.pop()
+            record['end_unix_ns'] = record['start_unix_ns'] + duration_ns
+            record['duration_ms'] = round(duration_ns / 1e6, 3)
+            self._finish(record)
+    
+    def _finish(self, record: Dict):
+        name, duration_ms = record['name'], record['duration_ms']
+        with self._lock:
+            self.spans.append(record)
+            if name not in self.histograms:
+                self.histograms[name] = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+                self.samples[name] = deque(maxlen=self.samples_per_name)
+            self.histograms[name][bisect_left(LATENCY_BUCKETS_MS, duration_ms)] += 1
+            self.samples[name].append(duration_ms)
+    
+    def annotate(self, **attributes):
+        """Add attributes to the innermost open span on this thread"""
+        stack = getattr(self._local, 'stack', None)
+        if stack:
+            stack[-1]['attributes'].update(attributes)
+    
+    def count(self, name: str, value: float = 1):
+        with self._lock:
+            self.counters[name] += value
+    
+    def summary(self) -> List[Dict]:
+        """Per-span-name call counts and latency percentiles (from recent samples)"""
+        with self._lock:
+            rows = []
+            for name, samples in self.samples.items():
+                values = np.fromiter(samples, dtype=float)
+                rows.append({
+                    'span': name,
+                    'count': sum(self.histograms[name]),
+                    'p50_ms': round(float(np.percentile(values, 50)), 2),
+                    'p95_ms': round(float(np.percentile(values, 95)), 2),
+                    'max_ms': round(float(values.max()), 2)
+                })
+        return sorted(rows, key=lambda row: row['p95_ms'] * row['count'], reverse=True)
+    
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                'counters': dict(self.counters),
+                'histograms': {
+                    'bucket_bounds_ms': list(LATENCY_BUCKETS_MS),
+                    'counts': {name: list(counts) for name, counts in self.histograms.items()}
+                },
+                'spans': list(self.spans)
+            }
+    
+    def to_jsonl(self) -> str:
+        """Finished spans, one JSON object per line"""
+        with self._lock:
+            spans = list(self.spans)
+        return "".join(json.dumps(span, default=str) + "\n" for span in spans)
+    
+    def to_otlp(self) -> Dict:
+        """Finished spans as an OTLP/HTTP JSON ExportTraceServiceRequest"""
+        def attribute(key, value):
+            if isinstance(value, bool):
+                return {'key': key, 'value': {'boolValue': value}}
+            if isinstance(value, int):
+                return {'key': key, 'value': {'intValue': str(value)}}
+            if isinstance(value, float):
+                return {'key': key, 'value': {'doubleValue': value}}
+            return {'key': key, 'value': {'stringValue': str(value)}}
+        
+        with self._lock:
+            spans = list(self.spans)
+        otlp_spans = []
+        for span in spans:
+            otlp_span = {
+                'traceId': span['trace_id'],
+                'spanId': span['span_id'],
+                'name': span['name'],
+                'kind': 1,
+                'startTimeUnixNano': str(span['start_unix_ns']),
+                'endTimeUnixNano': str(span['end_unix_ns']),
+                'attributes': [attribute(k, v) for k, v in span['attributes'].items()],
+                'status': {'code': 2, 'message': span.get('error', '')} if span['status'] == 'error' else {'code': 1}
+            }
+            if span['parent_span_id']:
+                otlp_span['parentSpanId'] = span['parent_span_id']
+            otlp_spans.append(otlp_span)
+        return {'resourceSpans': [{
+            'resource': {'attributes': [attribute('service.name', TRACE_SERVICE_NAME)]},
+            'scopeSpans': [{'scope': {'name': 'persona_designer'}, 'spans': otlp_spans}]
+        }]}
+    
+    def export_otlp(self, endpoint: str = 'http://localhost:4318', timeout: float = 5.0) -> int:
+        """POST finished spans to an OTLP/HTTP collector; returns the number of spans sent"""
+        payload = self.to_otlp()
+        request = urllib.request.Request(
+            endpoint.rstrip('/') + '/v1/traces',
+            data=json.dumps(payload).encode('utf-8'),
+            headers={'Content-Type': 'application/json'},
+            method='POST'
+        )
+        with urllib.request.urlopen(request, timeout=timeout):
+            pass
+        return len(payload['resourceSpans'][0]['scopeSpans'][0]['spans'])
+    
+    def reset(self):
+        with self._lock:
+            self.spans.clear()
+            self.histograms.clear()
+            self.samples.clear()
+            self.counters.clear()
+
+@functools.lru_cache(maxsize=None)
+def get_tracer() -> Tracer:
+    """Process-wide tracer, shared by every session, the CLI and the HTTP service"""
+    return Tracer()
+
+def traced(name: Optional[str] = None):
+    """Record each call of the decorated function as a span"""
+    def decorator(fn):
+        span_name = name or fn.__name__
+        
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with get_tracer().span(span_name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+# Fallback Telemetry
+FALLBACK_REASONS = ('parse_error', 'quota', 'timeout', 'safety_block', 'backend_error')
+PROVENANCE_KEY = '_provenance'
+
+# Lower-cased markers in an error's type name or message, checked in order
+FALLBACK_REASON_MARKERS = [
+    ('quota', ('resourceexhausted', 'quota', '429', 'rate limit', 'too many requests')),
+    ('timeout', ('timeout', 'timed out', 'deadlineexceeded', 'deadline exceeded')),
+    ('safety_block', ('safety', 'blocked', 'stopcandidate', 'finish_reason', 'prohibited content'))
+]
+
+def classify_fallback_reason(error: Exception) -> str:
+    """Map an engine exception to one of FALLBACK_REASONS"""
+    if isinstance(error, json.JSONDecodeError):
+        return 'parse_error'
+    if isinstance(error, TimeoutError):
+        return 'timeout'
+    text = f"{type(error).__name__} {error}".lower()
+    for reason, markers in FALLBACK_REASON_MARKERS:
+        if any(marker in text for marker in markers):
+            return reason
+    if isinstance(error, (ValueError, KeyError, TypeError)):
+        # json.JSONDecodeError is a ValueError; Key/TypeError come from malformed response shapes
+        return 'parse_error'
+    return 'backend_error'
+
+class FallbackText(str):
+    """Text an engine method returned in place of a model answer; carries its provenance record"""
+
+    def __new__(cls, text: str, record: Optional[Dict] = None):
+        self = super().__new__(cls, text)
+        self.provenance = record
+        return self
+
+def provenance(data) -> Optional[Dict]:
+    """Provenance record of an engine result ({'source': 'model' | 'fallback', ...}), if any"""
+    if isinstance(data, FallbackText):
+        return data.provenance
+    return data.get(PROVENANCE_KEY) if isinstance(data, dict) else None
+
+def is_fallback(data) -> bool:
+    return (provenance(data) or {}).get('source') == 'fallback'
+
+def has_fallback(data) -> bool:
+    """True if any result nested in a JSON-like structure came from fallback data"""
+    if isinstance(data, dict):
+        return is_fallback(data) or any(has_fallback(value) for value in data.values())
+    if isinstance(data, list):
+        return any(has_fallback(value) for value in data)
+    return is_fallback(data)
+
+def strip_provenance(data):
+    """Copy of a JSON-like structure without provenance records (for prompts and fingerprints)"""
+    if isinstance(data, dict):
+        return {key: strip_provenance(value) for key, value in data.items() if key != PROVENANCE_KEY}
+    if isinstance(data, list):
+        return [strip_provenance(value) for value in data]
+    return data
+
+class FallbackRegistry:
+    """Per-method counters of model successes and fallbacks by reason.
+    Alarm hooks fire once when the fallback share of the last `window` calls reaches
+    `alarm_rate` (after at least `min_calls`), and re-arm when it drops back below."""
+
+    def __init__(self, window: int = 50, alarm_rate: float = 0.3, min_calls: int = 10):
+        self._lock = threading.Lock()
+        self.window = window
+        self.alarm_rate = alarm_rate
+        self.min_calls = min_calls
+        self.successes = defaultdict(int)  # method -> model results
+        self.fallbacks = defaultdict(int)  # (method, reason) -> fallback results
+        self.last_errors = {}              # (method, reason) -> most recent error message
+        self._recent = deque(maxlen=window)
+        self._alarm_hooks = []
+        self.alarm_active = False
+
+    def add_alarm_hook(self, hook):
+        """Register `hook(status)`, called with `status()` when the alarm trips"""
+        with self._lock:
+            self._alarm_hooks.append(hook)
+
+    def record_success(self, method: str):
+        with self._lock:
+            self.successes[method] += 1
+            fire = self._observe(False)
+        if fire:
+            self._fire_alarm()
+
+    def record_fallback(self, method: str, reason: str, error: Optional[Exception] = None):
+        with self._lock:
+            self.fallbacks[(method, reason)] += 1
+            if error is not None:
+                self.last_errors[(method, reason)] = f"{type(error).__name__}: {error}"[:200]
+            fire = self._observe(True)
+        if fire:
+            self._fire_alarm()
+
+    def _observe(self, fell_back: bool) -> bool:
+        """Add a call to the window and re-evaluate the alarm (lock held); True when it has just tripped"""
+        self._recent.append(fell_back)
+        rate = sum(self._recent) / len(self._recent)
+        tripped = len(self._recent) >= self.min_calls and rate >= self.alarm_rate
+        fire = tripped and not self.alarm_active
+        self.alarm_active = tripped
+        return fire
+
+    def _fire_alarm(self):
+        status = self.status()
+        for hook in list(self._alarm_hooks):
+            try:
+                hook(status)
+            except Exception as e:
+                # A failing hook (e.g. an unreachable webhook) must not break the engine call
+                print(f"Fallback alarm hook failed: {e}", file=sys.stderr)
+
+    def recent_fallback_rate(self) -> float:
+        with self._lock:
+            return sum(self._recent) / len(self._recent) if self._recent else 0.0
+
+    def status(self) -> Dict:
+        """Counts per method and reason, overall and recent fallback rates and alarm state"""
+        with self._lock:
+            methods = {}
+            for method, count in self.successes.items():
+                methods.setdefault(method, {'model': 0, 'fallback': {}})['model'] = count
+            for (method, reason), count in self.fallbacks.items():
+                methods.setdefault(method, {'model': 0, 'fallback': {}})['fallback'][reason] = count
+            total_fallbacks = sum(self.fallbacks.values())
+            total = total_fallbacks + sum(self.successes.values())
+            return {
+                'methods': methods,
+                'reasons': {reason: sum(c for (_, r), c in self.fallbacks.items() if r == reason)
+                            for reason in FALLBACK_REASONS},
+                'last_errors': {f"{method}.{reason}": message for (method, reason), message in self.last_errors.items()},
+                'calls': total,
+                'fallbacks': total_fallbacks,
+                'fallback_rate': round(total_fallbacks / total, 4) if total else 0.0,
+                'recent_fallback_rate': round(sum(self._recent) / len(self._recent), 4) if self._recent else 0.0,
+                'alarm_rate': self.alarm_rate,
+                'alarm_active': self.alarm_active
+            }
+
+    def reset(self):
+        with self._lock:
+            self.successes.clear()
+            self.fallbacks.clear()
+            self.last_errors.clear()
+            self._recent.clear()
+            self.alarm_active = False
+
+def webhook_alarm_hook(url: str, timeout: float = 5.0):
+    """Alarm hook POSTing the registry status as JSON to `url` (e.g. a chat or paging webhook)"""
+    def hook(status: Dict):
+        body = json.dumps({'alert': 'fallback_rate', **status}).encode('utf-8')
+        request = urllib.request.Request(url, data=body, headers={'Content-Type': 'application/json'})
+        with urllib.request.urlopen(request, timeout=timeout):
+            pass
+    return hook
+
+def stderr_alarm_hook(status: Dict):
+    """Alarm hook logging the tripped alarm to stderr (used by the CLI and HTTP service)"""
+    reasons = ', '.join(f"{reason} {count}" for reason, count in status['reasons'].items() if count)
+    print(f"WARNING: model fallback rate {status['recent_fallback_rate']:.0%} over recent calls "
+          f"(alarm at {status['alarm_rate']:.0%}; {reasons})", file=sys.stderr)
+
+@functools.lru_cache(maxsize=None)
+def get_fallback_registry() -> FallbackRegistry:
+    """Process-wide fallback registry; alarm threshold and webhook come from the environment"""
+    registry = FallbackRegistry(
+        alarm_rate=float(os.getenv('PERSONA_DESIGNER_FALLBACK_ALARM_RATE', '0.3')),
+        min_calls=int(os.getenv('PERSONA_DESIGNER_FALLBACK_ALARM_MIN_CALLS', '10'))
+    )
+    webhook = os.getenv('PERSONA_DESIGNER_FALLBACK_WEBHOOK')
+    if webhook:
+        registry.add_alarm_hook(webhook_alarm_hook(webhook))
+    return registry
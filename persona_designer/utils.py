@@ -0,0 +1,8 @@
+"""Shared helpers"""
+import hashlib
+import json
+
+
+def fingerprint(data) -> str:
+    """Stable content hash of a JSON-like payload"""
+    return hashlib.sha1(json.dumps(data, sort_keys=True, default=str).encode('utf-8')).hexdigest()
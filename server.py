@@ -0,0 +1,447 @@
+"""Local HTTP service exposing the analysis engine as a JSON API.
+
+    python server.py --port 8080 --max-concurrent 8
+
+Endpoints (all request and response bodies are JSON):
+
+    GET  /v1/health                 service status ("degraded" while the fallback alarm is active),
+                                    cache, concurrency and fallback counters
+    GET  /v1/diagnostics            latency percentiles per span, tracer counters and fallbacks by reason
+    POST /v1/engine/<method>        call one engine method, e.g. /v1/engine/create_personas
+                                    with {"analysis_data": {...}, "num_personas": 3}
+    POST /v1/pipeline               run the full pipeline and return the "Export Data" document:
+                                    {"customer_data": "...", "product_info": "...", "num_personas": 3, "options": {...}}
+    POST /v1/jobs                   same body as /v1/pipeline, runs in the background -> 202 {"job_id": ...}
+    GET  /v1/jobs/<job_id>          job status, and its result once done
+    GET  /v1/runs?user_id=&limit=   saved runs, newest first (with --run-store)
+    GET  /v1/runs/<run_id>          one saved run with its analysis, personas and campaigns
+    GET  /v1/runs/<run_id>/diff/<other_run_id>
+                                    personas and campaigns added, removed or changed between two runs
+
+Engine request bodies are checked against the method's arguments: missing or unexpected
+fields and out-of-range numbers (e.g. "n_trials") are rejected with 400.
+Requests beyond --max-concurrent are rejected with 429 rather than queued. Identical
+engine and pipeline requests are served from a shared in-memory LRU cache; responses
+containing fallback data are not cached. With --run-store, every pipeline run is saved to a
+SQLite file and identical inputs from the same "user_id" are answered from it across restarts.
+"""
+import argparse
+import inspect
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from urllib.parse import parse_qs
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from cli import positive_float
+from persona_designer import (FAKE_ERRORS, EnhancedAIAnalysisEngine, RateLimiter, RunStore, build_export_payload,
+                              fingerprint,
+                              get_fallback_registry, get_tracer, has_fallback, make_backend, run_pipeline,
+                              stderr_alarm_hook)
+
+# Engine method -> keyword arguments accepted from the request body
+ENGINE_ENDPOINTS = {
+    'analyze_customer_data': ('customer_data', 'product_info'),
+    'create_personas': ('analysis_data', 'num_personas'),
+    'create_campaigns': ('personas_data',),
+    'refine_persona': ('original_persona', 'feedback'),
+    'generate_content_sample': ('campaign_data',),
+    'generate_journey_map': ('persona_data',),
+    'answer_query': ('query', 'context'),
+    'simulate_performance': ('campaign_data', 'use_model_priors', 'total_budget', 'n_trials', 'seed'),
+    'generate_ab_test_ideas': ('campaign_data',),
+    'generate_competitor_analysis': ('personas_data',)
+}
+# Engine method -> numeric field -> (type, minimum, maximum), checked before the call
+ENGINE_FIELD_LIMITS = {
+    'create_personas': {'num_personas': (int, 2, 5)},
+    'simulate_performance': {'n_trials': (int, 100, 1_000_000), 'total_budget': (float, 1, 10 ** 12),
+                             'seed': (int, 0, 2 ** 32 - 1)}
+}
+# Limited fields that may be null to use the engine's default (campaign budget, seed from the campaign)
+NULLABLE_FIELDS = ('total_budget', 'seed')
+MAX_BODY_BYTES = 5 * 1024 * 1024
+
+
+class ApiError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class ResponseCache:
+    """Thread-safe LRU of response bodies keyed by request fingerprint"""
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: str, value):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class EngineService:
+    """Request handling independent of HTTP: engine calls, pipeline runs, background jobs"""
+
+    def __init__(self, engine, max_concurrent: int = 8, cache_size: int = 256, job_workers: int = 2,
+                 max_finished_jobs: int = 1000, run_store: RunStore = None):
+        self.engine = engine
+        self.run_store = run_store
+        self.cache = ResponseCache(cache_size)
+        self.max_concurrent = max_concurrent
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+        self._jobs_pool = ThreadPoolExecutor(max_workers=job_workers, thread_name_prefix='pipeline-job')
+        self._jobs = OrderedDict()
+        self._jobs_lock = threading.Lock()
+        self.max_finished_jobs = max_finished_jobs
+        self.rejected = 0
+
+    def call_engine(self, method: str, body: dict):
+        if method not in ENGINE_ENDPOINTS:
+            raise ApiError(404, f"Unknown engine method '{method}'")
+        allowed = ENGINE_ENDPOINTS[method]
+        unexpected = sorted(set(body) - set(allowed))
+        if unexpected:
+            raise ApiError(400, f"Unexpected fields for {method}: {', '.join(unexpected)}")
+        call = getattr(self.engine, method)
+        try:
+            inspect.signature(call).bind(**body)
+        except TypeError as e:
+            raise ApiError(400, f"Invalid fields for {method}: {e}")
+        self._check_field_limits(method, body)
+
+        result = self._cached(('engine', method, body), lambda: call(**body))
+        return {'answer': result} if isinstance(result, str) else result
+
+    def run_pipeline(self, body: dict):
+        request = self._pipeline_request(body)
+        return self._cached(('pipeline', request), lambda: self._execute_pipeline(request))
+
+    def submit_job(self, body: dict) -> dict:
+        request = self._pipeline_request(body)
+        job_id = uuid.uuid4().hex
+        job = {'job_id': job_id, 'status': 'queued', 'submitted_at': time.time()}
+        with self._jobs_lock:
+            self._jobs[job_id] = job
+            self._prune_jobs()
+        self._jobs_pool.submit(self._run_job, job, request)
+        return {'job_id': job_id, 'status': 'queued', 'poll': f"/v1/jobs/{job_id}"}
+
+    def job_status(self, job_id: str) -> dict:
+        with self._jobs_lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                raise ApiError(404, f"Unknown job '{job_id}'")
+            return dict(job)
+
+    def list_runs(self, query: dict) -> dict:
+        try:
+            limit = int(query.get('limit', ['50'])[0])
+        except ValueError:
+            raise ApiError(400, "'limit' must be an integer")
+        return {'runs': self._require_run_store().list_runs(query.get('user_id', [None])[0], min(limit, 500))}
+
+    def get_run(self, run_id: str) -> dict:
+        run = self._require_run_store().load(run_id)
+        if run is None:
+            raise ApiError(404, f"Unknown run '{run_id}'")
+        return run
+
+    def diff_runs(self, run_a: str, run_b: str) -> dict:
+        try:
+            return self._require_run_store().diff(run_a, run_b)
+        except KeyError as e:
+            raise ApiError(404, f"Unknown run '{e.args[0]}'")
+
+    def _require_run_store(self) -> RunStore:
+        if self.run_store is None:
+            raise ApiError(404, "Run history is disabled (start the server with --run-store)")
+        return self.run_store
+
+    def health(self) -> dict:
+        with self._jobs_lock:
+            statuses = [job['status'] for job in self._jobs.values()]
+        fallbacks = get_fallback_registry().status()
+        return {
+            'status': 'degraded' if fallbacks['alarm_active'] else 'ok',
+            'model': getattr(self.engine, 'model_name', None),
+            'backend': getattr(getattr(self.engine, 'backend', None), 'name', None),
+            'usage': dict(getattr(self.engine, 'usage', {})),
+            'max_concurrent': self.max_concurrent,
+            'rejected_requests': self.rejected,
+            'cache': {'entries': len(self.cache), 'hits': self.cache.hits, 'misses': self.cache.misses},
+            'jobs': {status: statuses.count(status) for status in ('queued', 'running', 'done', 'failed')},
+            'fallbacks': fallbacks
+        }
+
+    def try_acquire(self) -> bool:
+        """Claim a request slot without waiting; False means the service is at capacity"""
+        if self._slots.acquire(blocking=False):
+            return True
+        self.rejected += 1
+        return False
+
+    def release(self):
+        self._slots.release()
+
+    def _cached(self, key_data, compute):
+        key = fingerprint(key_data)
+        cached = self.cache.get(key)
+        get_tracer().count(f"response_cache.{'miss' if cached is None else 'hit'}")
+        if cached is not None:
+            return cached
+        result = compute()
+        if not has_fallback(result):
+            # Degraded responses are retried on the next request instead of being served from cache
+            self.cache.put(key, result)
+        return result
+
+    @staticmethod
+    def _check_field_limits(method: str, body: dict):
+        for name, (kind, low, high) in ENGINE_FIELD_LIMITS.get(method, {}).items():
+            if name not in body or (body[name] is None and name in NULLABLE_FIELDS):
+                continue
+            value = body[name]
+            accepted = (int, float) if kind is float else kind
+            if isinstance(value, bool) or not isinstance(value, accepted) or not low <= value <= high:
+                noun = 'an integer' if kind is int else 'a number'
+                raise ApiError(400, f"'{name}' must be {noun} from {low:,} to {high:,}")
+
+    @staticmethod
+    def _pipeline_request(body: dict) -> dict:
+        if not body.get('customer_data') or not body.get('product_info'):
+            raise ApiError(400, "'customer_data' and 'product_info' are required")
+        num_personas = body.get('num_personas', 3)
+        if not isinstance(num_personas, int) or not 2 <= num_personas <= 5:
+            raise ApiError(400, "'num_personas' must be an integer from 2 to 5")
+        return {
+            'customer_data': body['customer_data'],
+            'product_info': body['product_info'],
+            'num_personas': num_personas,
+            'options': body.get('options') or {},
+            'user_id': str(body.get('user_id') or 'api')
+        }
+
+    def _execute_pipeline(self, request: dict) -> dict:
+        results = run_pipeline(
+            self.engine,
+            request['customer_data'],
+            request['product_info'],
+            request['num_personas'],
+            options=request['options'],
+            run_store=self.run_store,
+            user_id=request['user_id']
+        )
+        return build_export_payload(
+            results['analysis'],
+            results['personas'],
+            results['campaigns'],
+            results['additional_results'],
+            results['configuration']
+        )
+
+    def _run_job(self, job: dict, request: dict):
+        with self._jobs_lock:
+            job['status'] = 'running'
+            job['started_at'] = time.time()
+        try:
+            result = self._cached(('pipeline', request), lambda: self._execute_pipeline(request))
+        except Exception as e:
+            update = {'status': 'failed', 'error': str(e)}
+        else:
+            update = {'status': 'done', 'result': result}
+        with self._jobs_lock:
+            job.update(update, finished_at=time.time())
+
+    def _prune_jobs(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job['status'] in ('done', 'failed')]
+        for job_id in finished[:max(0, len(finished) - self.max_finished_jobs)]:
+            del self._jobs[job_id]
+
+    def shutdown(self):
+        self._jobs_pool.shutdown(wait=False)
+
+
+class EngineRequestHandler(BaseHTTPRequestHandler):
+    server_version = "PersonaDesigner/2.0"
+    protocol_version = "HTTP/1.1"
+
+    @property
+    def service(self) -> EngineService:
+        return self.server.service
+
+    def do_GET(self):
+        self._handle('GET')
+
+    def do_POST(self):
+        self._handle('POST')
+
+    def _handle(self, verb: str):
+        path, _, query = self.path.partition('?')
+        parts = [p for p in path.split('/') if p]
+        if parts == ['v1', 'health'] and verb == 'GET':
+            return self._send(200, self.service.health())
+        if parts == ['v1', 'diagnostics'] and verb == 'GET':
+            tracer = get_tracer()
+            return self._send(200, {'latency': tracer.summary(), 'counters': dict(tracer.counters),
+                                    'fallbacks': get_fallback_registry().status()})
+
+        if not self.service.try_acquire():
+            return self._send(429, {'error': 'Too many concurrent requests'}, {'Retry-After': '1'})
+        try:
+            status, payload = self._route(verb, parts, parse_qs(query))
+        except ApiError as e:
+            status, payload = e.status, {'error': str(e)}
+        except Exception as e:
+            status, payload = 500, {'error': f"{type(e).__name__}: {e}"}
+        finally:
+            self.service.release()
+        self._send(status, payload)
+
+    def _route(self, verb: str, parts: list, query: dict):
+        if verb == 'POST' and len(parts) == 3 and parts[:2] == ['v1', 'engine']:
+            return 200, self.service.call_engine(parts[2], self._read_body())
+        if verb == 'POST' and parts == ['v1', 'pipeline']:
+            return 200, self.service.run_pipeline(self._read_body())
+        if verb == 'POST' and parts == ['v1', 'jobs']:
+            return 202, self.service.submit_job(self._read_body())
+        if verb == 'GET' and len(parts) == 3 and parts[:2] == ['v1', 'jobs']:
+            return 200, self.service.job_status(parts[2])
+        if verb == 'GET' and parts == ['v1', 'runs']:
+            return 200, self.service.list_runs(query)
+        if verb == 'GET' and len(parts) == 3 and parts[:2] == ['v1', 'runs']:
+            return 200, self.service.get_run(parts[2])
+        if verb == 'GET' and len(parts) == 5 and parts[:2] == ['v1', 'runs'] and parts[3] == 'diff':
+            return 200, self.service.diff_runs(parts[2], parts[4])
+        raise ApiError(404, f"No route for {verb} {self.path}")
+
+    def _read_body(self) -> dict:
+        length = int(self.headers.get('Content-Length') or 0)
+        if length > MAX_BODY_BYTES:
+            raise ApiError(413, "Request body too large")
+        try:
+            body = json.loads(self.rfile.read(length) or b'{}')
+        except ValueError:
+            raise ApiError(400, "Request body must be valid JSON")
+        if not isinstance(body, dict):
+            raise ApiError(400, "Request body must be a JSON object")
+        return body
+
+    def _send(self, status: int, payload, headers=None):
+        data = json.dumps(payload, default=str).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+
+def make_server(engine, host: str = '127.0.0.1', port: int = 8080, quiet: bool = False, **service_options):
+    """Build (but do not start) a server around any engine-like object"""
+    server = ThreadingHTTPServer((host, port), EngineRequestHandler)
+    server.daemon_threads = True
+    server.service = EngineService(engine, **service_options)
+    server.quiet = quiet
+    return server
+
+
+def build_backend(args, api_key):
+    if args.backend == 'fake':
+        return make_backend('fake', model_name=args.model, latency_ms=args.fake_latency_ms,
+                            error_rate=args.fake_error_rate, error_kinds=args.fake_error_kinds,
+                            malformed_rate=args.fake_malformed_rate, seed=args.seed)
+    return make_backend('gemini', api_key, args.model)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the persona/campaign engine as a JSON API")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--max-concurrent', type=int, default=8, help="Requests handled at once; extra requests get 429")
+    parser.add_argument('--cache-size', type=int, default=256, help="Cached responses kept (0 disables the cache)")
+    parser.add_argument('--job-workers', type=int, default=2, help="Background pipeline jobs run at once")
+    parser.add_argument('--rpm', type=positive_float, default=None, help="Optional global limit on model calls per minute")
+    parser.add_argument('--backend', choices=['gemini', 'fake'], default='gemini',
+                        help="Model backend; 'fake' runs offline with simulated latency and errors")
+    parser.add_argument('--model', default=None, help="Model name (default: gemini-2.0-flash)")
+    parser.add_argument('--api-key', default=None, help="Gemini API key (default: GEMINI_API_KEY)")
+    parser.add_argument('--fake-latency-ms', type=float, default=250.0, help="Median fake-backend latency per call")
+    parser.add_argument('--fake-error-rate', type=float, default=0.0, help="Share of fake-backend calls that fail")
+    parser.add_argument('--fake-error-kinds', nargs='+', choices=list(FAKE_ERRORS), default=['backend_error'],
+                        help="Failure reasons the fake backend simulates (default: backend_error)")
+    parser.add_argument('--fake-malformed-rate', type=float, default=0.0,
+                        help="Share of fake-backend calls returning truncated JSON")
+    parser.add_argument('--seed', type=int, default=0, help="Fake-backend random seed")
+    parser.add_argument('--run-store', default=None, metavar='PATH',
+                        help="Save pipeline runs to this SQLite file and serve identical inputs from it")
+    parser.add_argument('--quiet', action='store_true', help="Do not log individual requests")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    api_key = args.api_key or os.getenv("GEMINI_API_KEY")
+    if args.backend == 'gemini' and not api_key:
+        print("GEMINI_API_KEY is not set (use --api-key, a .env file or --backend fake)", file=sys.stderr)
+        return 2
+
+    engine = EnhancedAIAnalysisEngine(backend=build_backend(args, api_key))
+    if args.rpm:
+        engine.rate_limiter = RateLimiter(args.rpm, burst=4)
+    get_fallback_registry().add_alarm_hook(stderr_alarm_hook)
+
+    server = make_server(
+        engine,
+        args.host,
+        args.port,
+        quiet=args.quiet,
+        max_concurrent=args.max_concurrent,
+        cache_size=args.cache_size,
+        job_workers=args.job_workers,
+        run_store=RunStore(args.run_store) if args.run_store else None
+    )
+    print(f"Serving on http://{args.host}:{args.port}/v1 (max {args.max_concurrent} concurrent requests)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.service.shutdown()
+        server.server_close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,56 @@
+import pytest
+
+from persona_designer import EnhancedAIAnalysisEngine, attach_ab_test_plan, is_fallback, make_backend, plan_ab_tests
+from persona_designer.ab_testing import _ab_test_lift
+
+CAMPAIGN = {'title': 'Efficiency Accelerator Campaign', 'channels': ['Email', 'LinkedIn Ads']}
+
+
+def engine_returning(text):
+    engine = EnhancedAIAnalysisEngine(backend=make_backend('fake', latency_ms=0))
+    engine._generate_text = lambda prompt: text
+    return engine
+
+
+@pytest.mark.parametrize('response', [
+    '[{"test_name": "Headline", "expected_impact": "+10%"}]',
+    '{"ab_tests": ["Test the headline", "Test the CTA colour"]}',
+    '{"ab_tests": []}',
+])
+def test_unusable_response_shapes_fall_back(response):
+    ideas = engine_returning(response).generate_ab_test_ideas(CAMPAIGN)
+    assert is_fallback(ideas)
+    assert ideas['ab_tests'] and 'test_plan' in ideas
+
+
+def test_non_dict_tests_are_skipped():
+    response = ('{"ab_tests": ["Test the headline", '
+                '{"test_name": "CTA colour", "element": "button", "expected_impact": "+8% click-through rate"}]}')
+    ideas = engine_returning(response).generate_ab_test_ideas(CAMPAIGN)
+    assert not is_fallback(ideas)
+    assert [test['test_name'] for test in ideas['ab_tests']] == ['CTA colour']
+    assert len(ideas['test_plan']['tests']) == 1
+
+
+def test_plan_skips_non_dict_tests():
+    ideas = attach_ab_test_plan({'ab_tests': ["just a string", {'test_name': 'Headline'}]}, CAMPAIGN)
+    assert [test['test_name'] for test in ideas['ab_tests']] == ['Headline']
+
+
+@pytest.mark.parametrize('impact, lift', [
+    ("+0.5% conversion rate", 0.005),
+    ("+15% conversion rate", 0.15),
+    ("-8% bounce rate", 0.08),
+    (0.12, 0.12),
+    ("12", 0.12),
+])
+def test_expected_lift_parsing(impact, lift):
+    assert _ab_test_lift({'expected_impact': impact}) == pytest.approx(lift)
+
+
+def test_sub_one_percent_lift_needs_a_larger_sample():
+    tests = [{'test_name': 'Small', 'expected_impact': '+0.5% conversion rate'},
+             {'test_name': 'Large', 'expected_impact': '+50% conversion rate'}]
+    small, large = plan_ab_tests(tests, CAMPAIGN)['tests']
+    assert small['expected_lift'] == pytest.approx(0.005)
+    assert small['sample_size_per_variant'] > 1000 * large['sample_size_per_variant']
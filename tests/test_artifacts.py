@@ -0,0 +1,85 @@
+from persona_designer import (ArtifactStore, EnhancedAIAnalysisEngine, generate_artifacts_batch, is_fallback,
+                              make_backend)
+from persona_designer.fallbacks import get_fallback_personas, thaw
+
+CAMPAIGN = {'title': 'Efficiency Accelerator Campaign', 'channels': ['Email', 'LinkedIn Ads']}
+
+
+def make_engine(fail_when=lambda prompt, calls: False):
+    """Fake-backend engine whose model calls raise while `fail_when(prompt, calls)` is true"""
+    engine = EnhancedAIAnalysisEngine(backend=make_backend('fake', latency_ms=0))
+    original = engine._generate_json
+    calls = []
+
+    def generate_json(prompt):
+        calls.append(prompt)
+        if fail_when(prompt, calls):
+            raise TimeoutError("deadline exceeded")
+        return original(prompt)
+
+    engine._generate_json = generate_json
+    return engine, calls
+
+
+def test_fallback_artifact_is_not_cached():
+    engine, calls = make_engine(lambda prompt, calls: len(calls) == 1)
+    store = ArtifactStore()
+
+    first = store.get_or_generate('content_sample', CAMPAIGN, engine)
+    assert is_fallback(first)
+    assert not store.contains('content_sample', CAMPAIGN)
+    assert store.peek('content_sample', CAMPAIGN) is first
+
+    second = store.get_or_generate('content_sample', CAMPAIGN, engine)
+    assert len(calls) == 2
+    assert not is_fallback(second)
+    assert store.peek('content_sample', CAMPAIGN) is second
+
+    assert store.get_or_generate('content_sample', CAMPAIGN, engine) is second
+    assert len(calls) == 2
+
+
+def test_batch_reports_fallbacks_and_retries_only_them():
+    campaigns = [dict(CAMPAIGN, title=f'Campaign {i}') for i in range(3)]
+    failed_once = set()
+
+    def fail_campaign_1_once(prompt, calls):
+        if 'Campaign 1' in prompt and 'Campaign 1' not in failed_once:
+            failed_once.add('Campaign 1')
+            return True
+        return False
+
+    engine, calls = make_engine(fail_campaign_1_once)
+    store = ArtifactStore()
+
+    first = {i: status for i, status, _ in generate_artifacts_batch(engine, store, 'content_sample', campaigns)}
+    assert first == {0: 'done', 1: 'fallback', 2: 'done'}
+    assert is_fallback(store.peek('content_sample', campaigns[1]))
+
+    second = {i: status for i, status, _ in generate_artifacts_batch(engine, store, 'content_sample', campaigns)}
+    assert second == {0: 'cached', 1: 'done', 2: 'cached'}
+    assert len(calls) == 4
+
+
+def test_failed_persona_journey_map_is_regenerated():
+    personas = thaw(get_fallback_personas(3))['personas']
+    failed_once = []
+
+    def fail_jordan_once(prompt, calls):
+        if 'Jordan the Value Optimizer' in prompt and not failed_once:
+            failed_once.append(prompt)
+            return True
+        return False
+
+    engine, calls = make_engine(fail_jordan_once)
+    store = ArtifactStore()
+
+    first = engine.generate_journey_map({'personas': personas}, store=store)['journey_maps']
+    assert [journey['fallback'] for journey in first] == [False, True, False]
+    assert first[1]['status'] == 'fallback'
+    assert not store.contains('journey_map', personas[1])
+
+    second = engine.generate_journey_map({'personas': personas}, store=store)['journey_maps']
+    assert [journey['status'] for journey in second] == ['cached', 'done', 'cached']
+    assert not any(journey['fallback'] for journey in second)
+    assert len(calls) == 4
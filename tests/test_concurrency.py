@@ -0,0 +1,55 @@
+import threading
+import time
+
+import pytest
+
+import cli
+import server
+from persona_designer import RateLimiter, SingleFlight
+
+
+def test_single_flight_reports_coalescing_per_caller():
+    flight = SingleFlight()
+    release = threading.Event()
+    results = {}
+
+    def slow():
+        release.wait(5)
+        return 'shared'
+
+    def call(name, key, fn):
+        results[name] = flight.do(key, fn)
+
+    leader = threading.Thread(target=call, args=('leader', 'a', slow))
+    leader.start()
+    while not flight._calls:
+        time.sleep(0.001)
+    follower = threading.Thread(target=call, args=('follower', 'a', slow))
+    follower.start()
+    while flight.coalesced_count < 1:
+        time.sleep(0.001)
+    # A different key finishing while 'a' is coalescing is not attributed to it
+    call('other', 'b', lambda: 'own')
+    release.set()
+    leader.join()
+    follower.join()
+
+    assert results == {'leader': ('shared', False), 'follower': ('shared', True), 'other': ('own', False)}
+
+
+def test_rate_limiter_rejects_non_positive_rates():
+    for rate in (0, -5):
+        with pytest.raises(ValueError):
+            RateLimiter(rate)
+
+
+def test_cli_rejects_non_positive_rpm():
+    with pytest.raises(SystemExit):
+        cli.parse_args(['jobs.json', '--rpm', '0'])
+    assert cli.parse_args(['jobs.json', '--rpm', '0.5']).rpm == 0.5
+
+
+def test_server_rejects_non_positive_rpm():
+    with pytest.raises(SystemExit):
+        server.parse_args(['--rpm', '-5'])
+    assert server.parse_args(['--rpm', '0.5']).rpm == 0.5
@@ -0,0 +1,51 @@
+import json
+import pickle
+
+import pytest
+
+from persona_designer import EnhancedAIAnalysisEngine, is_fallback, make_backend, run_pipeline
+from persona_designer.fallbacks import (FrozenDict, FrozenList, get_fallback_ab_tests, get_fallback_personas,
+                                        load_fallback_dataset, thaw)
+
+
+def failing_engine():
+    return EnhancedAIAnalysisEngine(backend=make_backend('fake', latency_ms=0, error_rate=1.0))
+
+
+def test_dataset_is_shared_and_read_only():
+    personas = get_fallback_personas(3)
+    assert personas is get_fallback_personas(3)
+    assert personas['personas'][0] is load_fallback_dataset()['personas'][0]
+    with pytest.raises(TypeError):
+        personas['personas'][0]['goals'].append("anything")
+    with pytest.raises(TypeError):
+        personas['extra'] = True
+
+
+def test_frozen_data_serializes_and_thaws():
+    personas = get_fallback_personas(2)
+    assert json.loads(json.dumps(personas)) == thaw(personas)
+    restored = pickle.loads(pickle.dumps(personas))
+    assert isinstance(restored, FrozenDict) and isinstance(restored['personas'], FrozenList)
+    mutable = thaw(personas)
+    mutable['personas'][0]['goals'].append("anything")
+    assert "anything" not in personas['personas'][0]['goals']
+
+
+def test_engine_fallback_copies_only_the_top_level():
+    engine = failing_engine()
+    journey = engine.generate_journey_map({'name': 'Alex'})
+    assert is_fallback(journey)
+    assert journey['journey_map'] is load_fallback_dataset()['journey_map']['journey_map']
+    assert not is_fallback(load_fallback_dataset()['journey_map'])
+
+    ideas = engine.generate_ab_test_ideas({'title': 'Campaign', 'channels': ['Email']})
+    assert is_fallback(ideas) and 'test_plan' in ideas
+    assert all('sample_size_per_variant' in test for test in ideas['ab_tests'])
+    assert not any('sample_size_per_variant' in test for test in get_fallback_ab_tests()['ab_tests'])
+
+
+def test_pipeline_completes_on_fallback_data():
+    results = run_pipeline(failing_engine(), "customer data", "product", 3)
+    assert set(results['fallback_stages']) == {'analysis', 'personas', 'campaigns', 'competitor_analysis', 'ab_tests'}
+    assert len(results['personas']['personas']) == 3
@@ -0,0 +1,46 @@
+from persona_designer import (EnhancedAIAnalysisEngine, PipelineCheckpointStore, RunStore, has_fallback,
+                              make_backend, run_pipeline)
+
+CUSTOMER_DATA = "Age 34, engineer: love the product but pricing is confusing."
+PRODUCT_INFO = "Workflow automation SaaS, $29/month"
+
+
+def make_engine():
+    return EnhancedAIAnalysisEngine(backend=make_backend('fake', latency_ms=0))
+
+
+def fail_once(engine, method):
+    original = getattr(engine, method)
+    calls = []
+
+    def flaky(*args, **kwargs):
+        calls.append(args)
+        if len(calls) == 1:
+            raise RuntimeError("429 quota exceeded")
+        return original(*args, **kwargs)
+
+    setattr(engine, method, flaky)
+    return calls
+
+
+def test_stage_built_on_fallback_is_recomputed_on_resume(tmp_path):
+    checkpoints = PipelineCheckpointStore(str(tmp_path / 'checkpoints'))
+    run_store = RunStore(str(tmp_path / 'runs.sqlite3'))
+    engine = make_engine()
+    fail_once(engine, 'create_campaigns')
+
+    first = run_pipeline(engine, CUSTOMER_DATA, PRODUCT_INFO, 3, checkpoints=checkpoints, run_id='job',
+                         run_store=run_store)
+    assert first['fallback_stages'] == {'campaigns': 'quota'}
+
+    second = run_pipeline(engine, CUSTOMER_DATA, PRODUCT_INFO, 3, checkpoints=checkpoints, run_id='job',
+                          run_store=run_store)
+    assert not second['served_from_store']
+    assert second['fallback_stages'] == {}
+    assert second['resumed_stages'] == ['analysis', 'personas', 'competitor_analysis']
+    assert not has_fallback(second['campaigns'])
+    assert not has_fallback(second['additional_results']['ab_tests'])
+
+    third = run_pipeline(make_engine(), CUSTOMER_DATA, PRODUCT_INFO, 3, checkpoints=checkpoints, run_id='job')
+    assert third['resumed_stages'] == ['analysis', 'personas', 'campaigns', 'competitor_analysis', 'ab_tests']
+    assert third['campaigns'] == second['campaigns']
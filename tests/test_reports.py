@@ -0,0 +1,19 @@
+from datetime import datetime
+
+import pytest
+
+from persona_designer import REPORT_FORMATS, ReportCache, get_tracer, iter_report
+from persona_designer.fallbacks import get_fallback_campaigns, get_fallback_personas
+
+
+@pytest.mark.parametrize('fmt', list(REPORT_FORMATS))
+def test_cached_report_shows_the_time_it_was_served(fmt):
+    cache = ReportCache()
+    personas, campaigns = get_fallback_personas(2), get_fallback_campaigns()
+    hits = get_tracer().counters.get('report_cache.hit', 0)
+    first = cache.get_or_render(personas, campaigns, fmt=fmt, generated_at=datetime(2026, 1, 2, 3, 4, 5))
+    second = cache.get_or_render(personas, campaigns, fmt=fmt, generated_at=datetime(2026, 6, 7, 8, 9, 10))
+    assert get_tracer().counters['report_cache.hit'] == hits + 1
+    assert '2026-01-02 03:04:05' in first and '2026-01-02 03:04:05' not in second
+    assert '2026-06-07 08:09:10' in second
+    assert first == "".join(iter_report(personas, campaigns, fmt=fmt, generated_at=datetime(2026, 1, 2, 3, 4, 5)))
@@ -0,0 +1,126 @@
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+
+from persona_designer import DEMO_CUSTOMER_DATA, DEMO_PRODUCT_INFO, EnhancedAIAnalysisEngine, is_fallback, make_backend
+from server import ApiError, EngineService, make_server
+
+
+def failing_engine():
+    return EnhancedAIAnalysisEngine(backend=make_backend('fake', latency_ms=0, error_rate=1.0))
+
+
+def test_failed_refine_and_answer_are_marked_as_fallbacks():
+    engine = failing_engine()
+    persona = {'name': 'Alex', 'goals': ['Save time']}
+    refined = engine.refine_persona(persona, "Make Alex older")
+    assert is_fallback(refined) and refined is not persona
+    assert {key: value for key, value in refined.items() if key != '_provenance'} == persona
+    answer = engine.answer_query("Which channel?", {})
+    assert answer.startswith("I apologize") and is_fallback(answer)
+
+
+def test_failed_refine_and_answer_are_not_cached():
+    service = EngineService(failing_engine())
+    try:
+        refine = {'original_persona': {'name': 'Alex'}, 'feedback': "Make Alex older"}
+        query = {'query': "Which channel?", 'context': {}}
+        for _ in range(2):
+            service.call_engine('refine_persona', refine)
+            service.call_engine('answer_query', query)
+        assert len(service.cache) == 0
+        assert service.cache.hits == 0
+    finally:
+        service.shutdown()
+
+
+@pytest.mark.parametrize('method, body, message', [
+    ('create_personas', {}, "missing a required argument: 'analysis_data'"),
+    ('create_personas', {'analysis_data': {}, 'num_personas': 9}, "'num_personas' must be an integer"),
+    ('simulate_performance', {'campaign_data': {}, 'n_trials': 0}, "'n_trials' must be an integer"),
+    ('simulate_performance', {'campaign_data': {}, 'n_trials': 10 ** 9}, "'n_trials' must be an integer"),
+    ('simulate_performance', {'campaign_data': {}, 'total_budget': -5}, "'total_budget' must be a number"),
+    ('simulate_performance', {'campaign_data': {}, 'seed': 'abc'}, "'seed' must be an integer"),
+    ('generate_journey_map', {'persona_data': {}, 'store': {}}, "Unexpected fields for generate_journey_map: store")
+])
+def test_invalid_engine_bodies_are_rejected_with_400(method, body, message):
+    service = EngineService(EnhancedAIAnalysisEngine(backend=make_backend('fake', latency_ms=0)))
+    try:
+        with pytest.raises(ApiError) as error:
+            service.call_engine(method, body)
+        assert error.value.status == 400 and message in str(error.value)
+    finally:
+        service.shutdown()
+
+
+@pytest.fixture
+def server():
+    engine = EnhancedAIAnalysisEngine(backend=make_backend('fake', latency_ms=0))
+    server = make_server(engine, port=0, quiet=True, max_concurrent=2)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.service.shutdown()
+    server.server_close()
+
+
+def request(server, path, body=None):
+    """(status, headers, JSON payload) of a GET, or of a POST when a body is given"""
+    data = json.dumps(body).encode('utf-8') if body is not None else None
+    url = f"http://127.0.0.1:{server.server_address[1]}{path}"
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, data=data), timeout=30) as response:
+            return response.status, response.headers, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, e.headers, json.loads(e.read())
+
+
+def test_engine_endpoint_over_http(server):
+    status, _, payload = request(server, '/v1/engine/simulate_performance',
+                                 {'campaign_data': {'channels': ['Email']}, 'n_trials': 1000, 'seed': 1})
+    assert status == 200 and payload['simulation']['trials'] == 1000
+    status, _, payload = request(server, '/v1/engine/create_personas', {})
+    assert status == 400 and 'analysis_data' in payload['error']
+
+
+def test_identical_engine_requests_are_served_from_cache(server):
+    body = {'campaign_data': {'channels': ['Email']}, 'n_trials': 1000, 'seed': 1}
+    first = request(server, '/v1/engine/simulate_performance', body)[2]
+    second = request(server, '/v1/engine/simulate_performance', body)[2]
+    other = request(server, '/v1/engine/simulate_performance', {**body, 'seed': 2})[2]
+    assert first == second != other
+    cache = request(server, '/v1/health')[2]['cache']
+    assert cache == {'entries': 2, 'hits': 1, 'misses': 2}
+
+
+def test_job_is_submitted_and_polled_until_done(server):
+    status, _, submitted = request(server, '/v1/jobs', {'customer_data': DEMO_CUSTOMER_DATA,
+                                                        'product_info': DEMO_PRODUCT_INFO, 'num_personas': 2})
+    assert status == 202 and submitted['status'] == 'queued'
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        status, _, job = request(server, submitted['poll'])
+        if job['status'] in ('done', 'failed'):
+            break
+        time.sleep(0.05)
+    assert status == 200 and job['status'] == 'done'
+    assert len(job['result']['personas']['personas']) == 2
+    assert request(server, '/v1/jobs/unknown')[0] == 404
+
+
+def test_requests_beyond_capacity_get_429(server):
+    service = server.service
+    assert service.try_acquire() and service.try_acquire()
+    try:
+        status, headers, payload = request(server, '/v1/engine/simulate_performance', {'campaign_data': {}})
+        assert status == 429 and headers['Retry-After'] == '1'
+        assert service.rejected == 1
+    finally:
+        service.release()
+        service.release()
+    assert request(server, '/v1/engine/simulate_performance', {'campaign_data': {}, 'n_trials': 1000})[0] == 200
@@ -0,0 +1,29 @@
+import pytest
+
+from persona_designer import SIMULATION_DEFAULTS, simulate_campaign_performance
+from persona_designer.simulation import _parse_number
+
+CAMPAIGN = {'campaign_name': 'Launch', 'channels': ['LinkedIn', 'Email']}
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('$50K', 50_000.0), ('$1.5M', 1_500_000.0), ('2b', 2e9), ('$5,000', 5_000.0),
+    ('40%', 40.0), ('3.2x', 3.2), ('12 months', 12.0), (0.4, 0.4), ('n/a', None)
+])
+def test_parse_number_reads_thousand_and_million_suffixes(value, expected):
+    assert _parse_number(value) == expected
+
+
+def test_campaign_budget_with_suffix_is_used():
+    result = simulate_campaign_performance({**CAMPAIGN, 'budget': '$50K'}, n_trials=1000, seed=1)
+    assert result['simulation']['total_budget'] == 50_000.0
+
+
+@pytest.mark.parametrize('total_budget, campaign_budget', [
+    (0, None), (-100.0, None), (float('nan'), None), (float('inf'), None), (None, '$0'), (None, 'TBD')
+])
+def test_unusable_budgets_fall_back_to_the_default(total_budget, campaign_budget):
+    campaign = {**CAMPAIGN, 'budget': campaign_budget} if campaign_budget else CAMPAIGN
+    result = simulate_campaign_performance(campaign, total_budget=total_budget, n_trials=1000, seed=1)
+    assert result['simulation']['total_budget'] == SIMULATION_DEFAULTS['total_budget']
+    assert result['distributions']['roi']['mean'] > 0
@@ -0,0 +1,29 @@
+import pytest
+
+from persona_designer import build_result_tables, optimize_budget_allocation
+
+PERSONAS = {'personas': [{'name': 'Alex', 'confidence_score': 0.9, 'market_size': '32%', 'goals': ['a', 'b']}]}
+
+
+def channel_rows(campaigns, allocation=None):
+    tables = build_result_tables([{'run_id': 'run', 'personas': PERSONAS, 'campaigns': campaigns,
+                                   'allocation': allocation}])
+    return tables['channel_allocations']
+
+
+def test_string_channels_give_one_row_per_channel():
+    campaigns = {'campaigns': [{'title': 'Launch', 'channels': "Email, LinkedIn Ads",
+                                'budget_allocation': {'Email': '60%', 'LinkedIn Ads': '40%'}}]}
+    channels = channel_rows(campaigns, optimize_budget_allocation(campaigns, 10000))
+    assert sorted(channels['channel']) == ['Email', 'LinkedIn Ads']
+    assert channels.set_index('channel')['budget_share'].to_dict() == pytest.approx({'Email': 0.6,
+                                                                                    'LinkedIn Ads': 0.4})
+    assert channels['optimized_spend'].notna().all()
+
+
+def test_list_and_dict_channels():
+    campaigns = {'campaigns': [{'title': 'A', 'channels': ['Email', 'Search']},
+                               {'title': 'B', 'channels': {'Facebook': 'Awareness'}}]}
+    channels = channel_rows(campaigns)
+    assert list(zip(channels['campaign'], channels['channel'])) == [('A', 'Email'), ('A', 'Search'),
+                                                                    ('B', 'Facebook')]